@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+import os, sys
+import queue
+import threading
+import time
+
+F_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(F_PATH)
+from face_gallery import delta_path, update_delta
+
+
+class EnrollmentEncoder:
+    """Encode the saved face crops on a background thread while the student is being enrolled.
+
+    Crops are queued with put() next to the image writer, encoded in batches with the models
+    train_faces uses (face_encoding.encode_batch), and on close() the student's encodings are
+    written to the delta file next to the gallery. A running AttendanceGUI polls that file,
+    so the student is recognized a few seconds after the session ends, without retraining.
+    The next train_faces run folds the student into the gallery and removes them from the delta.
+    """
+
+    def __init__(self, face_id, encodings_file, batch_size=8, max_queue=256):
+        self.face_id = face_id
+        self.encodings_file = encodings_file
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.max_queue = max_queue
+        self.encodings = []
+        self.dropped = 0  # Crops refused because the queue was full
+        self.errors = 0
+        self.last_error = None
+        self.closed = False
+        self.saved = False  # The delta file holds this session's encodings
+        self.closed_at = None
+        self.save_seconds = None  # From close() to the delta file being written
+        self.thread = threading.Thread(target=self._run, name="enrollment-encoder", daemon=True)
+        self.thread.start()
+
+    @property
+    def path(self):
+        return delta_path(self.encodings_file)
+
+    def put(self, roi, location):
+        """Queue a BGR crop and its face box (top, right, bottom, left) in the crop. Returns False if full."""
+        try:
+            self.queue.put_nowait((roi, location))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def depth(self):
+        """Crops waiting to be encoded."""
+        return self.queue.qsize()
+
+    def close(self, wait=True):
+        """Encode the remaining crops and write the delta file. With wait=False this returns at once."""
+        if not self.closed:
+            self.closed = True
+            self.closed_at = time.time()
+            self.queue.put((None, None))  # Blocks only while the queue is full
+        if wait:
+            self.thread.join()
+
+    def _run(self):
+        try:
+            # Loading the face_recognition models takes seconds: do it here, not on the Tk thread
+            from face_encoding import encode_batch
+        except Exception as e:
+            encode_batch = None
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+        finished = False
+        while not finished:
+            batch = []
+            roi, location = self.queue.get()
+            while roi is not None:
+                batch.append((roi, location))
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    roi, location = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            finished = roi is None
+            if batch and encode_batch is not None:
+                self._encode(encode_batch, batch)
+        if self.encodings:
+            try:
+                update_delta(self.encodings_file, {self.face_id: self.encodings})
+                self.saved = True
+                self.save_seconds = time.time() - self.closed_at
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def _encode(self, encode_batch, batch):
+        images = [np.ascontiguousarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)) for roi, _ in batch]
+        try:
+            for image_encodings in encode_batch(images, [[location] for _, location in batch]):
+                self.encodings.extend(image_encodings)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
@@ -1,10 +1,8 @@
 import cv2
-import dlib
 import numpy as np
 import os, sys
 import tkinter as tk
 from tkinter import messagebox, filedialog
-from PIL import Image, ImageTk
 import threading
 import time
 import shutil
@@ -15,6 +13,15 @@ sys.path.append(HOME)
 print("Root directory:", HOME)
 
 F_PATH = os.path.abspath(os.path.join(HOME, ".."))
+sys.path.append(F_PATH)
+from face_detectors import create_detector, detector_params
+from face_render import FrameRenderer, update_label
+from face_metrics import draw_overlay, from_config as metrics_from_config
+from face_models import BackgroundLoader, shape_predictor
+from image_writer import ImageWriter
+from enrollment_encoder import EnrollmentEncoder
+from frame_selection import FrameSelector, landmark_array
+
 config_path = os.path.join(F_PATH,"config.json")
 with open(config_path,'r') as js: 
     config = json.load(js)
@@ -24,10 +31,28 @@ CAM_ID = config['CAM_ID'] # Default camera ID, change if needed
 NUM_IMAGES = cfg['NUM_IMAGES']  # Number of images to collect for each direction
 DELAY = cfg['DELAY'] # Delay between saves in seconds
 PADD = cfg['PADD'] # Padding around face ROI
+IMAGE_FORMAT = cfg['FORMAT'] # jpg, png or webp
+IMAGE_QUALITY = cfg['QUALITY'] # JPEG/WebP quality (0-100) or PNG compression (0-9)
+PACK = cfg['PACK'] # None (one file per image), "zip" or "npz" (one file per session)
+QUEUE_SIZE = cfg['QUEUE_SIZE'] # Images waiting for the writer thread before new ones are refused
+DISPLAY_FPS = cfg['DISPLAY_FPS'] # Preview redraws per second, every frame is still processed
+ENCODE = cfg['ENCODE'] # Encode crops during the session so the attendance app picks the student up without retraining
+ENCODINGS_FILE = os.path.join(F_PATH, cfg['ENCODINGS_FILE']) # Gallery of the attendance app, the delta is saved next to it
+SELECTION = cfg['SELECTION'] # Quality gate and top-N diverse frames per direction, None saves every frame
+LAZY_STARTUP = cfg['LAZY_STARTUP'] # Show the window and preview at once, load the models in the background
+
+# Face detector (same backend as the attendance app, see config.json "DETECTOR") and landmark predictor,
+# loaded by FaceDataCollector.poll_models instead of at import (the .dat file alone takes seconds)
+# Frames are not downscaled here, so HOG needs no upsampling
+DETECTOR_BACKEND, DETECTOR_PARAMS = detector_params(config["DETECTOR"], upsample=0)
+PREDICTOR_FILE = os.path.join(F_PATH, "shape_predictor_68_face_landmarks.dat")
+detector = None
+predictor = None
+dlib = None  # Imported once with the landmark model (poll_models), kept out of the startup imports
 
-# Load face detector and landmark predictor
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor(os.path.join(F_PATH, "shape_predictor_68_face_landmarks.dat"))
+# Stage timers and counters (config.json "METRICS"), a no-op unless enabled
+metrics, metrics_exporter, profiler = metrics_from_config(config["METRICS"], prefix="collector")
+SHOW_OVERLAY = metrics.enabled and config["METRICS"].get("OVERLAY", True)
 
 class FaceDataCollector:
     def __init__(self, root, saving_dir):
@@ -36,8 +61,19 @@ class FaceDataCollector:
         self.root.title("Face Data Collection")
         self.root.geometry("900x700")
         
+        # Load the models on a background thread, the preview shows meanwhile
+        self.loader = BackgroundLoader([
+            ("detector", "Loading face detector...", lambda results: create_detector(DETECTOR_BACKEND, **DETECTOR_PARAMS)),
+            ("predictor", "Loading landmark model...", lambda results: shape_predictor(PREDICTOR_FILE)),
+        ])
+        if not LAZY_STARTUP:
+            self.loader.run()
+        
         # Create interface
         self.create_widgets()
+        self.renderer = FrameRenderer(self.video_label, max_fps=DISPLAY_FPS, size=(640, 480))
+        if LAZY_STARTUP:
+            self.loader.start()
         
         # State variables
         self.collecting = False
@@ -48,6 +84,11 @@ class FaceDataCollector:
         self.cap = None
         self.face_id = ""
         self.output_dir = ""
+        self.writer = None
+        self.encoder = None
+        self.selector = None
+        self.overlay_lines = []
+        self.next_overlay_update = 0.0
         
         # Initialize webcam
         self.init_camera()
@@ -68,6 +109,10 @@ class FaceDataCollector:
         self.status_label.pack(anchor='w')
         self.direction_label = tk.Label(status_frame, text="Direction: -", font=("Arial", 10))
         self.direction_label.pack(anchor='w')
+        self.writer_label = tk.Label(status_frame, text="Writer: idle", font=("Arial", 9), fg="gray")
+        self.writer_label.pack(anchor='w')
+        self.encoder_label = tk.Label(status_frame, text="Encoder: idle", font=("Arial", 9), fg="gray")
+        self.encoder_label.pack(anchor='w')
 
         # Progress frame
         progress_frame = tk.Frame(left_frame)
@@ -113,13 +158,43 @@ class FaceDataCollector:
             self.update_result("Cannot open camera. Please check the connection.")
             return
         
+        if metrics_exporter is not None:
+            metrics_exporter.start()
+        if profiler is not None:
+            # One window at startup, F9 records another
+            profiler.start(self.root)
+            self.root.bind("<F9>", lambda event: profiler.start(self.root))
+        
         # Start updating video
         self.update_video()
     
+    def poll_models(self):
+        """Show the loading progress and use the models once the loader is done"""
+        global detector, predictor, dlib
+        results = self.loader.take()
+        if results is None:
+            if not self.loader.done.is_set():
+                update_label(self.status_label, text=f"Status: {self.loader.progress()[1]}")
+            return
+        if self.loader.error:
+            update_label(self.status_label, text="Status: Models failed to load")
+            self.update_result(f"Cannot load the face models: {self.loader.error}")
+            return
+        import dlib  # Already loaded by the predictor step, binds the module global
+        detector, predictor = results["detector"], results["predictor"]
+        update_label(self.status_label, text="Status: Waiting to start")
+        self.update_result(f"Models loaded in {self.loader.seconds:.1f}s")
+    
     def update_video(self):
+        if detector is None:
+            self.poll_models()
         if self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
+            with metrics.timer("capture"):
+                ret, frame = self.cap.read()
+            if not ret:
+                metrics.count("frame_drops")
+            else:
+                metrics.count("frames")
                 # Detect face and draw result
                 cv2.flip(frame, 1, frame)  # Mirror horizontally
                 processed_frame, face_info = self.process_frame(frame)
@@ -127,19 +202,46 @@ class FaceDataCollector:
                 # Show face direction
                 if face_info:
                     direction = face_info.get("direction", "-")
-                    self.direction_label.config(text=f"Direction: {direction}")
-                
-                # Convert frame to display in Tkinter
-                cv_image = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(cv_image)
-                img = img.resize((640, 480), Image.LANCZOS)
-                imgtk = ImageTk.PhotoImage(image=img)
+                    update_label(self.direction_label, text=f"Direction: {direction}")
                 
-                self.video_label.imgtk = imgtk
-                self.video_label.configure(image=imgtk)
+                # Display in Tkinter, at most DISPLAY_FPS times per second
+                if self.renderer.due():
+                    if SHOW_OVERLAY:
+                        if time.time() >= self.next_overlay_update:
+                            self.next_overlay_update = time.time() + 0.5
+                            self.overlay_lines = metrics.overlay_lines()
+                        draw_overlay(processed_frame, self.overlay_lines)
+                    with metrics.timer("render"):
+                        self.renderer.render(processed_frame)
         
+        self.update_writer_status()
+        self.update_encoder_status()
         self.root.after(10, self.update_video)
     
+    def update_writer_status(self):
+        """Show queue depth and counters of the image writer"""
+        if self.writer is None:
+            return
+        text = (f"Writer: queue {self.writer.depth()}/{self.writer.max_queue}, "
+                f"{self.writer.written} saved, {self.writer.dropped} dropped")
+        if self.writer.errors:
+            text += f", {self.writer.errors} errors ({self.writer.last_error})"
+        update_label(self.writer_label, text=text)
+    
+    def update_encoder_status(self):
+        """Show progress of the live encoding and when the student is available to the attendance app"""
+        if self.encoder is None:
+            return
+        if self.encoder.saved:
+            text = (f"Encoder: {len(self.encoder.encodings)} encodings live "
+                    f"({self.encoder.save_seconds:.1f}s after the session)")
+        else:
+            text = (f"Encoder: queue {self.encoder.depth()}/{self.encoder.max_queue}, "
+                    f"{len(self.encoder.encodings)} encoded, {self.encoder.dropped} dropped")
+        if self.encoder.errors:
+            text += f", {self.encoder.errors} errors ({self.encoder.last_error})"
+        update_label(self.encoder_label, text=text)
+    
     def determine_face_direction(self, shape, frame_width):
         """Determine the orientation of the face based on landmarks"""
         # Get important eye and nose points
@@ -172,19 +274,25 @@ class FaceDataCollector:
         """Process frame to detect face and determine direction"""
         # Create a copy to avoid affecting original frame
         processed_frame = frame.copy()
+        if detector is None:
+            return processed_frame, {}  # Models still loading: preview only
         
         # Convert to grayscale
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = detector(gray)
+        with metrics.timer("detect"):
+            faces = detector.detect(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        metrics.count("faces", len(faces))
         
         face_info = {}
         
         if len(faces) > 0:
             # Take the first face
-            face = faces[0]
+            top, right, bottom, left = faces[0]
+            face = dlib.rectangle(left, top, right, bottom)
             
             # Detect landmarks
-            landmarks = predictor(gray, face)
+            with metrics.timer("landmarks"):
+                landmarks = predictor(gray, face)
             shape = []
             for i in range(68):
                 x = landmarks.part(i).x
@@ -212,18 +320,23 @@ class FaceDataCollector:
             
             # Save ROI if collecting and matches current direction
             if self.collecting and direction == self.current_direction:
-                # Compute ROI with padding
-                roi = processed_frame[y1:y2, x1:x2]
+                # Compute ROI with padding, from the original frame (no rectangle or text drawn on it)
+                roi = frame[y1:y2, x1:x2].copy()
+                # Face box inside the crop (top, right, bottom, left), for the encoder
+                face_box = (y - y1, x - x1 + w, y - y1 + h, x - x1)
+                # Unpadded face and landmarks, for the frame selector
+                gray_face = gray[max(0, y):y + h, max(0, x):x + w]
+                points = landmark_array(shape)
                 
                 # Check if need to save
                 current_time = time.time()
                 if hasattr(self, 'last_save_time'):
                     if current_time - self.last_save_time >= DELAY:  # Save every 0.1 seconds
-                        self.save_face_roi(roi)
+                        self.save_face_roi(roi, face_box, gray_face, points)
                         self.last_save_time = current_time
                 else:
                     self.last_save_time = current_time
-                    self.save_face_roi(roi)
+                    self.save_face_roi(roi, face_box, gray_face, points)
         
         return processed_frame, face_info
     
@@ -233,17 +346,33 @@ class FaceDataCollector:
         if not self.face_id:
             messagebox.showerror("Error", "Please enter Face ID")
             return
+        if detector is None:
+            messagebox.showinfo("Please wait", "The face models are still loading.")
+            return
         
         # Create output directory
         self.output_dir = os.path.join(self.saving_dir, f"face_dataset/{self.face_id}")
+        if self.writer is not None:
+            # Finish the previous session before its files are replaced
+            self.writer.close()
+        if self.encoder is not None:
+            self.encoder.close()
         if os.path.exists(self.output_dir):
             # Remove old directory if exists
             shutil.rmtree(self.output_dir)
-        os.makedirs(self.output_dir, exist_ok=True)
+        for ext in (".zip", ".npz"):
+            if os.path.exists(self.output_dir + ext):
+                os.remove(self.output_dir + ext)
         
-        # Create subdirectories for each direction
-        for direction in self.directions:
-            os.makedirs(f"{self.output_dir}/{direction}", exist_ok=True)
+        if PACK is None:
+            # Create subdirectories for each direction
+            for direction in self.directions:
+                os.makedirs(f"{self.output_dir}/{direction}", exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(self.output_dir), exist_ok=True)
+        self.writer = ImageWriter(self.output_dir, IMAGE_FORMAT, IMAGE_QUALITY, PACK, QUEUE_SIZE)
+        self.encoder = EnrollmentEncoder(self.face_id, ENCODINGS_FILE, max_queue=QUEUE_SIZE) if ENCODE else None
+        self.selector = FrameSelector.from_config(SELECTION) if SELECTION is not None else None
         
         # Reset state
         self.collecting = True
@@ -276,20 +405,20 @@ class FaceDataCollector:
     def update_status(self):
         """Update status on the interface"""
         direction_text = self.get_direction_text(self.current_direction)
-        self.status_label.config(text=f"Status: Collecting - {direction_text}")
+        update_label(self.status_label, text=f"Status: Collecting - {direction_text}")
         self.progress_var.set(self.image_count)
     
-    def save_face_roi(self, roi):
-        """Save cropped face image"""
+    def save_face_roi(self, roi, face_box, gray_face=None, points=None):
+        """Queue cropped face image for the writer thread (and the encoder), or keep it as a candidate"""
         if roi.size == 0:
             return
 
-        # Create filename
-        direction_dir = f"{self.output_dir}/{self.current_direction}"
-        filename = f"{direction_dir}/{self.image_count:03d}.jpg"
-        print(filename)
-        # Save image
-        cv2.imwrite(filename, roi)
+        if self.selector is not None:
+            # Scored and kept in memory, the best diverse frames are saved when the direction ends
+            if self.selector.add(roi, face_box, gray_face, points, self.current_direction) is not None:
+                return  # Failed the quality gate: does not count towards the direction
+        elif not self.queue_face(f"{self.current_direction}/{self.image_count:03d}", roi, face_box):
+            return  # Writer is behind: skip this frame, the next one is 0.1 s away
 
         # Update image count
         self.image_count += 1
@@ -297,6 +426,7 @@ class FaceDataCollector:
 
         # Check if 50 images completed
         if self.image_count >= NUM_IMAGES:
+            self.flush_selection()
             self.image_count = 0
             self.direction_index += 1
 
@@ -305,17 +435,51 @@ class FaceDataCollector:
                 self.update_result(f"Completed.\n===>Please look {self.get_direction_text(self.current_direction)}")
             else:
                 self.stop_collection()
-                self.update_result("Data collection completed!")
+                self.update_result(f"Data collection completed! Saved to {self.writer.path}")
+                if self.encoder is not None:
+                    self.update_result(f"Encodings go to {self.encoder.path}, "
+                                       "the attendance app picks them up without retraining")
                 self.update_result('-' * 50)  # Add 50 dashes to split samples
                 messagebox.showinfo("Success", "Data collection complete!")
     
+    def queue_face(self, name, roi, face_box):
+        """Send a crop to the writer (name relative to the session, without extension) and the encoder"""
+        if not self.writer.put(name, roi):
+            return False
+        if self.encoder is not None:
+            self.encoder.put(roi, face_box)
+        return True
+    
+    def flush_selection(self):
+        """Save the best diverse candidates of the current direction"""
+        if self.selector is None or not self.selector.candidates:
+            return
+        frames, summary = self.selector.select()
+        for i, (roi, face_box) in enumerate(frames):
+            self.queue_face(f"{self.current_direction}/{i:03d}", roi, face_box)
+        message = (f"Kept {summary['kept']}/{summary['candidates']} {self.current_direction} frames "
+                   f"(mean score {summary['mean_score']:.2f} -> {summary['kept_score']:.2f})")
+        if summary["rejected"]:
+            message += ", rejected " + ", ".join(f"{count} {reason}"
+                                                 for reason, count in sorted(summary["rejected"].items()))
+        self.update_result(message)
+    
     def stop_collection(self):
         """Stop data collection process"""
+        if self.collecting:
+            # Frames collected for an unfinished direction are still saved
+            self.flush_selection()
         self.collecting = False
+        if self.writer is not None:
+            # Queued images are still written, the archive is finished afterwards
+            self.writer.close(wait=False)
+        if self.encoder is not None:
+            # Crops encoded so far are saved to the delta file once the queue is empty
+            self.encoder.close(wait=False)
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.face_id_entry.config(state=tk.NORMAL)
-        self.status_label.config(text="Status: Collection stopped")
+        update_label(self.status_label, text="Status: Collection stopped")
         self.update_result("Data collection stopped")
     
     def update_result(self, message):
@@ -329,6 +493,12 @@ class FaceDataCollector:
         """Handle window closing event"""
         if self.cap and self.cap.isOpened():
             self.cap.release()
+        if self.writer is not None:
+            self.writer.close()
+        if self.encoder is not None:
+            self.encoder.close()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
         self.root.destroy()
 
 def select_saving_dir(default_dir):
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+# Default settings of FrameSelector, overridden by COLLECTION["SELECTION"] in config.json
+SELECTION_DEFAULTS = {
+    "KEEP": 30,  # Frames kept per direction, None keeps every frame that passes the gate
+    "MIN_SIZE": 48,  # Face height in pixels
+    "MIN_SHARPNESS": 30.0,  # Variance of the Laplacian of the face
+    "MIN_BRIGHTNESS": 40,  # Mean gray level of the face
+    "MAX_BRIGHTNESS": 220,
+    "MIN_DISTANCE": 0.05,  # Landmark difference (in eye distances) below which two frames are duplicates
+}
+SHARPNESS_REF = 150.0  # Laplacian variance scored as fully sharp
+SIZE_REF = 160  # Face height scored as large enough
+YAW_TARGETS = {"straight": 0.0, "left": 0.25, "right": 0.25}  # Expected |yaw| of each direction
+YAW_RANGE = 0.25  # |yaw| this far from the target scores 0
+
+
+def landmark_array(shape):
+    """(68, 2) float array of dlib points."""
+    return np.array([(point.x, point.y) for point in shape], dtype=np.float64)
+
+
+def estimate_yaw(points):
+    """Horizontal offset of the nose tip from the middle of the eyes, in eye distances (0 = frontal)."""
+    left_eye, right_eye, nose_tip = points[36], points[45], points[30]
+    eye_distance = np.linalg.norm(right_eye - left_eye) + 1e-5
+    return (nose_tip[0] - (left_eye[0] + right_eye[0]) / 2) / eye_distance
+
+
+def landmark_descriptor(points):
+    """Landmarks centered and scaled by the eye distance, to compare pose and expression across frames."""
+    eye_distance = np.linalg.norm(points[45] - points[36]) + 1e-5
+    return (points - points.mean(axis=0)) / eye_distance
+
+
+class FrameSelector:
+    """Score the candidate frames of a direction and keep the best diverse ones.
+
+    Every candidate passes a gate (size, brightness, Laplacian sharpness) and gets a score in
+    [0, 1]: the product of sharpness, exposure, face size and how well its yaw fits the
+    direction being collected. select() then takes candidates by decreasing score, skipping
+    near-duplicates of frames already kept (landmarks closer than MIN_DISTANCE), so a student
+    who barely moved gets fewer than KEEP frames instead of copies of the same one.
+    """
+
+    def __init__(self, keep=30, min_size=48, min_sharpness=30.0, min_brightness=40, max_brightness=220,
+                 min_distance=0.05):
+        self.keep = keep
+        self.min_size = min_size
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.min_distance = min_distance
+        self.candidates = []  # (roi, face box, score, landmark descriptor)
+        self.rejected = {}  # key: reason, value: number of frames
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Selector from the COLLECTION["SELECTION"] section of config.json (missing keys use the defaults)."""
+        cfg = {**SELECTION_DEFAULTS, **(cfg or {})}
+        return cls(cfg["KEEP"], cfg["MIN_SIZE"], cfg["MIN_SHARPNESS"], cfg["MIN_BRIGHTNESS"],
+                   cfg["MAX_BRIGHTNESS"], cfg["MIN_DISTANCE"])
+
+    def score(self, gray_face, points, direction):
+        """
+        Quality score of a face, or the reason it fails the gate.
+
+        Args:
+            gray_face (np.ndarray): Grayscale face region (without padding).
+            points (np.ndarray): (68, 2) landmarks.
+            direction (str): Direction being collected.
+
+        Returns:
+            tuple[float, str]: (score in [0, 1], None) or (0.0, rejection reason).
+        """
+        height = gray_face.shape[0]
+        if height < self.min_size or gray_face.shape[1] < self.min_size:
+            return 0.0, "too small"
+        brightness = gray_face.mean()
+        if brightness < self.min_brightness:
+            return 0.0, "too dark"
+        if brightness > self.max_brightness:
+            return 0.0, "too bright"
+        sharpness = cv2.Laplacian(gray_face, cv2.CV_64F).var()
+        if sharpness < self.min_sharpness:
+            return 0.0, "blurry"
+        yaw_error = abs(abs(estimate_yaw(points)) - YAW_TARGETS.get(direction, 0.0))
+        score = (min(1.0, sharpness / SHARPNESS_REF)
+                 * (1.0 - abs(brightness - 128.0) / 128.0)
+                 * min(1.0, height / SIZE_REF)
+                 * max(0.0, 1.0 - yaw_error / YAW_RANGE))
+        return score, None
+
+    def add(self, roi, face_box, gray_face, points, direction):
+        """
+        Score a frame and keep it as a candidate if it passes the gate.
+
+        Returns:
+            str: Rejection reason, or None if the frame became a candidate.
+        """
+        score, reason = self.score(gray_face, points, direction)
+        if reason is not None:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+            return reason
+        self.candidates.append((roi, face_box, score, landmark_descriptor(points)))
+        return None
+
+    def select(self):
+        """
+        Take the best diverse candidates and start over for the next direction.
+
+        Returns:
+            tuple[list[tuple], dict]: (roi, face box) of the kept frames, best first,
+            and a summary: candidates, kept, mean score of candidates and kept frames,
+            and the frames rejected by the gate by reason.
+        """
+        candidates, self.candidates = self.candidates, []
+        keep = len(candidates) if self.keep is None else min(self.keep, len(candidates))
+        order = sorted(range(len(candidates)), key=lambda i: candidates[i][2], reverse=True)
+        chosen = []
+        for i in order:
+            if len(chosen) == keep:
+                break
+            descriptor = candidates[i][3]
+            # Root mean square landmark displacement to every frame already kept
+            if all(np.sqrt(np.mean(np.sum((descriptor - candidates[j][3]) ** 2, axis=1))) > self.min_distance
+                   for j in chosen):
+                chosen.append(i)
+        summary = {
+            "candidates": len(candidates),
+            "kept": len(chosen),
+            "mean_score": float(np.mean([c[2] for c in candidates])) if candidates else 0.0,
+            "kept_score": float(np.mean([candidates[i][2] for i in chosen])) if chosen else 0.0,
+            "rejected": self.rejected,
+        }
+        self.rejected = {}
+        return [(candidates[i][0], candidates[i][1]) for i in chosen], summary
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+import os, sys
+import queue
+import threading
+import zipfile
+
+# cv2.imwrite parameter used for the quality setting of each format
+QUALITY_PARAMS = {
+    "jpg": cv2.IMWRITE_JPEG_QUALITY,   # 0-100, higher is better
+    "webp": cv2.IMWRITE_WEBP_QUALITY,  # 0-100, above 100 is lossless
+    "png": cv2.IMWRITE_PNG_COMPRESSION, # 0-9, lossless, higher is smaller but slower
+}
+PACK_MODES = (None, "zip", "npz")
+
+
+class ImageWriter:
+    """Save face images on a background thread so the camera preview never waits for the disk.
+
+    Images are queued with put() and written by one thread. With pack="zip" a session is
+    stored as one uncompressed zip archive (<session_dir>.zip) instead of one file per image,
+    with pack="npz" the raw (lossless) images are stored in one NPZ shard (<session_dir>.npz).
+    """
+
+    def __init__(self, session_dir, fmt="jpg", quality=95, pack=None, max_queue=256):
+        fmt = fmt.lower().lstrip(".").replace("jpeg", "jpg")
+        if fmt not in QUALITY_PARAMS:
+            raise ValueError(f"Unsupported image format: {fmt} (expected one of {list(QUALITY_PARAMS)})")
+        if pack not in PACK_MODES:
+            raise ValueError(f"Unsupported pack mode: {pack} (expected one of {PACK_MODES})")
+        self.session_dir = session_dir
+        self.fmt = fmt
+        self.params = [QUALITY_PARAMS[fmt], int(quality)]
+        self.pack = pack
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0  # Images refused because the queue was full
+        self.errors = 0
+        self.last_error = None
+        self.closed = False
+        self.archive = None
+        self.shard = {}  # NPZ mode: key: member name, value: image
+        self.thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self.thread.start()
+
+    @property
+    def path(self):
+        """Where the session ends up: a folder, a .zip or a .npz file."""
+        return self.session_dir if self.pack is None else f"{self.session_dir}.{self.pack}"
+
+    def put(self, name, image):
+        """Queue an image (name relative to the session, without extension). Returns False if the queue is full."""
+        try:
+            self.queue.put_nowait((name, image))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def depth(self):
+        """Images waiting to be written."""
+        return self.queue.qsize()
+
+    def close(self, wait=True):
+        """Write the remaining images and finish the archive. With wait=False this returns at once."""
+        if not self.closed:
+            self.closed = True
+            self.queue.put((None, None))  # Blocks only while the queue is full
+        if wait:
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            name, image = self.queue.get()
+            if name is None:
+                break
+            try:
+                self._write(name, image)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+        try:
+            self._finish()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+
+    def _write(self, name, image):
+        if self.pack == "npz":
+            self.shard[name] = image
+            return
+        ok, data = cv2.imencode(f".{self.fmt}", image, self.params)
+        if not ok:
+            raise IOError(f"Cannot encode {name} as {self.fmt}")
+        filename = f"{name}.{self.fmt}"
+        if self.pack == "zip":
+            if self.archive is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self.archive = zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED)
+            # Already compressed images: store them as they are
+            self.archive.writestr(filename, data.tobytes())
+        else:
+            path = os.path.join(self.session_dir, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data.tofile(path)
+
+    def _finish(self):
+        if self.archive is not None:
+            self.archive.close()
+        if self.shard:
+            tmp_path = f"{self.session_dir}.tmp.npz"
+            os.makedirs(os.path.dirname(os.path.abspath(tmp_path)), exist_ok=True)
+            np.savez(tmp_path, **self.shard)
+            os.replace(tmp_path, self.path)
+
+
+def unpack_session(path, output_dir=None):
+    """Extract a .zip or .npz session into one image per file, the layout train_faces reads."""
+    output_dir = output_dir or os.path.splitext(path)[0]
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(output_dir)
+            return len(archive.namelist())
+    with np.load(path) as shard:
+        for name in shard.files:
+            filename = os.path.join(output_dir, f"{name}.png")
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            cv2.imwrite(filename, shard[name])
+        return len(shard.files)
+
+
+if __name__ == "__main__":
+    # Unpack sessions before training: python image_writer.py face_dataset/SE123456.zip
+    for session in sys.argv[1:]:
+        print(f"{session}: {unpack_session(session)} images")
@@ -0,0 +1,393 @@
+"""
+Headless attendance engine: detect, encode, match and vote without a display.
+
+AttendanceGUI runs this engine on live camera frames. It can also be run from
+the command line on recorded lecture videos or image folders:
+
+	python attendance_engine.py lecture.mp4 photos/ --encodings student_encodings.pkl \
+		--output attendance.csv --max-fps 5 --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from face_detectors import DETECTORS, create_detector
+from face_encoding import encode_faces
+from face_gallery import FaceGallery, GALLERY_EXTENSION, load_delta, load_gallery
+from face_index import index_path, load_index
+from face_metrics import Metrics
+from face_roi import AdaptiveDetector
+from face_tracking import FaceTracker, IdentityVoter
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+
+
+def load_gallery_file(encodings_file, n_probe=None):
+	"""
+	Load a gallery (.fgal or train_faces pickle) and the index saved next to it.
+
+	Students enrolled by face_id.py since the last training (the delta file next
+	to the gallery) are merged in; the index is then skipped since row ids change.
+
+	Raises:
+		FileNotFoundError: If neither the encodings file nor a delta exists.
+	"""
+	delta = load_delta(encodings_file)
+	if not os.path.exists(encodings_file):
+		if delta:
+			# Nothing trained yet, only students enrolled live
+			return FaceGallery.from_encodings(delta)
+		raise FileNotFoundError(f"Encoding file not found: {encodings_file}")
+	if encodings_file.endswith(GALLERY_EXTENSION):
+		gallery = load_gallery(encodings_file)
+	else:
+		with open(encodings_file, 'rb') as f:
+			gallery = FaceGallery.from_encodings(pickle.load(f))
+	if delta:
+		return gallery.merged(delta)
+	gallery.index = load_index(index_path(encodings_file), gallery.matrix, n_probe, sq_norms=gallery.sq_norms)
+	return gallery
+
+
+class AttendanceEngine:
+	"""
+	Recognition logic shared by the GUI and the batch CLI.
+
+	Each frame is downscaled for face detection, faces are followed across frames
+	by a FaceTracker, encoded on the full-size frame, matched against the gallery
+	in one batch and confirmed by a per-face IdentityVoter.
+	"""
+	def __init__(self, gallery, scale=0.25, tracking=False, detect_every=5, vote_window=10, vote_quorum=10,
+				 vote_weighted=False, vote_min_confidence=0.0, tolerance=0.6, adaptive=False, door_zone=None,
+				 detect_budget_ms=None, full_scan_every=10, detector_backend="hog", detector_params=None,
+				 metrics=None):
+		"""
+		Args:
+			gallery (FaceGallery): Known faces.
+			scale (float): Detection runs on the frame resized by this factor (tracking always does).
+			tracking (bool): Detect every `detect_every` frames and track in between.
+			detect_every (int): Frames between full detections in tracking mode.
+			vote_window, vote_quorum, vote_weighted, vote_min_confidence: See IdentityVoter. The window
+				and quorum count encodings; in tracking mode a face is encoded once per detection.
+			tolerance (float): Match distance threshold.
+			adaptive (bool): Detect with an AdaptiveDetector: crops around recent faces and the
+							 door zone at a scale picked from the face sizes, full scans in between.
+			door_zone (tuple): (left, top, right, bottom) frame fractions always scanned in adaptive mode.
+			detect_budget_ms (float): Latency budget of one adaptive detection.
+			full_scan_every (int): Detections between full-frame scans in adaptive mode.
+			detector_backend (str): Face detector, see face_detectors.DETECTORS.
+			detector_params (dict): Parameters of the detector backend.
+			metrics (Metrics): Stage timers and counters (detect, encode, match), disabled by default.
+		"""
+		self.gallery = gallery
+		self.metrics = metrics or Metrics()
+		self.scale = scale
+		self.face_detector = create_detector(detector_backend, **(detector_params or {}))
+		self.detector = None
+		if adaptive:
+			self.detector = AdaptiveDetector(base_scale=scale, budget_ms=detect_budget_ms, door_zone=door_zone,
+											 full_scan_every=full_scan_every, detect=self.face_detector.detect)
+		self.tolerance = tolerance
+		voter_factory = lambda: IdentityVoter(vote_window, vote_quorum, tolerance=tolerance, weighted=vote_weighted,
+											  min_confidence=vote_min_confidence)
+		self.face_tracker = FaceTracker(detect_every if tracking else 1, voter_factory=voter_factory)
+		self.attendance = {}  # key: student name, value: time of the check-in
+
+	def recognize(self, frame):
+		"""
+		Detect, encode, match and vote on every face in a frame.
+
+		Args:
+			frame (np.ndarray): BGR frame.
+
+		Returns:
+			list[tuple]: ((top, right, bottom, left), match name, distance, track id, confirmed name)
+			per face. The match name is None if the encoding failed or the gallery is empty,
+			the confirmed name is None until the face's vote is decided.
+		"""
+		# Reduce frame size to INCREASE FACE DETECTION SPEED
+		# Detect only on smaller image
+		with self.metrics.timer("resize"):
+			small_frame = cv2.resize(frame, (0, 0), fx=self.scale, fy=self.scale)
+			rgb_small_frame = np.ascontiguousarray(small_frame[:, :, ::-1]) # Convert BGR to RGB
+		factor = 1.0 / self.scale
+
+		def detect(image):
+			with self.metrics.timer("detect"):
+				if self.detector is not None:
+					# The adaptive detector works on the full frame, tracks stay on the small one
+					return [tuple(int(v * self.scale) for v in location) for location in self.detector.detect(frame)]
+				# Detect face locations in the small frame
+				return self.face_detector.detect(image)
+
+		def encode_and_match(locations_scaled):
+			# Scale back coordinates to ORIGINAL image size
+			return self.encode_and_match(frame, [tuple(int(v * factor) for v in location)
+												 for location in locations_scaled])
+
+		tracks = self.face_tracker.update(rgb_small_frame, detect, encode_and_match)
+		self.metrics.count("frames")
+		self.metrics.count("faces", len(tracks))
+		return [(tuple(int(v * factor) for v in location), name, distance, track_id, confirmed_name)
+				for track_id, location, name, distance, confirmed_name in tracks]
+
+	def encode_and_match(self, frame, face_locations):
+		"""
+		Encode faces at the given locations of the full frame and match them in one batch.
+
+		Args:
+			frame (np.ndarray): BGR frame at full size.
+			face_locations (list[tuple]): (top, right, bottom, left) in frame pixels.
+
+		Returns:
+			list[tuple[str, float]]: (match name, distance) per location, (None, inf) on failure.
+		"""
+		# Encodings in the gallery come from RGB images
+		rgb_frame = np.ascontiguousarray(frame[:, :, ::-1])
+		self.metrics.count("encode_calls")
+		try:
+			# IMPORTANT:
+			# Extract encodings from ORIGINAL frame using rescaled coordinates, all faces in one call
+			with self.metrics.timer("encode"):
+				face_encodings = list(encode_faces(rgb_frame, face_locations))
+		except Exception as e:
+			print(f"Error extracting face encodings: {type(e).__name__}: {e}")
+			# Retry one face at a time so only the failing face is marked as Unknown
+			face_encodings = []
+			for location in face_locations:
+				try:
+					face_encodings.append(encode_faces(rgb_frame, [location])[0])
+				except Exception:
+					face_encodings.append(None)
+
+		valid_encodings = [encoding for encoding in face_encodings if encoding is not None]
+		gallery = self.gallery  # Read once: a reload may swap it meanwhile
+		with self.metrics.timer("match"):
+			matches = iter(gallery.match(valid_encodings))
+		self.metrics.count("faces_encoded", len(valid_encodings))
+		self.metrics.count("match_comparisons", len(valid_encodings) * gallery.comparisons_per_query())
+		return [next(matches) if face_encoding is not None else (None, float('inf'))
+				for face_encoding in face_encodings]
+
+	def process(self, frame, timestamp=None):
+		"""
+		Recognize a frame and record check-ins.
+
+		Args:
+			frame (np.ndarray): BGR frame.
+			timestamp (float): Time of the frame, defaults to now.
+
+		Returns:
+			tuple[list, list[str]]: (faces as returned by recognize, students checked in on this frame).
+		"""
+		if timestamp is None:
+			timestamp = time.time()
+		faces = self.recognize(frame)
+		checked_in = []
+		for _, _, _, _, confirmed_name in faces:
+			if confirmed_name is not None and confirmed_name not in self.attendance:
+				self.attendance[confirmed_name] = timestamp
+				checked_in.append(confirmed_name)
+		return faces, checked_in
+
+
+# Batch processing of recorded sources
+
+def _list_sources(inputs):
+	"""Expand the CLI inputs into (kind, path) sources: videos, image folders and single images."""
+	sources = []
+	for path in inputs:
+		if os.path.isdir(path):
+			images = sorted(os.path.join(root, f) for root, _, files in os.walk(path)
+							for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+			if images:
+				sources.append(("images", path, images))
+		elif path.lower().endswith(IMAGE_EXTENSIONS):
+			sources.append(("images", path, [path]))
+		else:
+			sources.append(("video", path, None))
+	return sources
+
+
+def _plan_work(sources, batch_frames):
+	"""
+	Split every source into batches of consecutive frames: (kind, path, images, start, stop, fps).
+
+	Batches are independent, so they can run in different processes. Face tracks
+	restart at batch boundaries, which only delays a check-in by a few frames.
+	"""
+	work = []
+	for kind, path, images in sources:
+		if kind == "images":
+			total, fps = len(images), 1.0
+		else:
+			capture = cv2.VideoCapture(path)
+			if not capture.isOpened():
+				print(f"Cannot open video: {path}")
+				continue
+			total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+			fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+			capture.release()
+			if total <= 0:
+				# Unknown length (e.g. some streams): one batch read until the end
+				work.append((kind, path, images, 0, sys.maxsize, fps))
+				continue
+		for start in range(0, total, batch_frames):
+			work.append((kind, path, images, start, min(start + batch_frames, total), fps))
+	return work
+
+
+def _sampled_frames(kind, path, images, start, stop, fps, frame_skip, max_fps):
+	"""
+	Yield (frame index, timestamp in seconds, frame) of the frames to process.
+
+	Skipped video frames are only grabbed, not decoded.
+	"""
+	step = frame_skip + 1
+	if max_fps:
+		step = max(step, int(round(fps / max_fps)))
+	if kind == "images":
+		for index in range(start, stop, step):
+			frame = cv2.imread(images[index])
+			if frame is not None:
+				yield index, index / fps, frame
+		return
+	capture = cv2.VideoCapture(path)
+	capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+	try:
+		for index in range(start, stop):
+			if (index - start) % step:
+				if not capture.grab():
+					return
+				continue
+			ret, frame = capture.read()
+			if not ret:
+				return
+			yield index, index / fps, frame
+	finally:
+		capture.release()
+
+
+_galleries = {}  # Galleries already loaded by this process, reused across batches
+
+
+def _process_batch(encodings_file, engine_options, item, frame_skip, max_fps):
+	"""Run one batch of frames in a fresh engine. Returns (path, {name: first time}, frames processed)."""
+	kind, path, images, start, stop, fps = item
+	if encodings_file not in _galleries:
+		_galleries[encodings_file] = load_gallery_file(encodings_file)
+	engine = AttendanceEngine(_galleries[encodings_file], **engine_options)
+	processed = 0
+	for _, timestamp, frame in _sampled_frames(kind, path, images, start, stop, fps, frame_skip, max_fps):
+		engine.process(frame, timestamp)
+		processed += 1
+	return path, engine.attendance, processed
+
+
+def run_batch(inputs, encodings_file, output=None, frame_skip=0, max_fps=None, workers=1, batch_frames=3000,
+			  **engine_options):
+	"""
+	Take attendance from recorded videos and image folders.
+
+	Args:
+		inputs (list[str]): Video files, image folders or images.
+		encodings_file (str): Gallery file (.fgal or train_faces pickle).
+		output (str): Result file, .csv or .json. None only returns the results.
+		frame_skip (int): Frames skipped after every processed frame.
+		max_fps (float): Process at most this many frames per second of video.
+		workers (int): Processes used to run batches in parallel.
+		batch_frames (int): Consecutive frames per batch.
+		**engine_options: Passed to AttendanceEngine (tracking, vote_window, ...).
+
+	Returns:
+		list[dict]: One row per student: name, status, first_seen (seconds) and source.
+	"""
+	gallery = load_gallery_file(encodings_file)
+	work = _plan_work(_list_sources(inputs), batch_frames)
+	first_seen = {}  # key: student name, value: (seconds, source)
+	processed = 0
+	start_time = time.time()
+
+	def merge(path, attendance, count):
+		nonlocal processed
+		processed += count
+		# The same student seen in several batches or sources is counted once
+		for name, timestamp in attendance.items():
+			if name not in first_seen or timestamp < first_seen[name][0]:
+				first_seen[name] = (timestamp, path)
+		print(f"\r  {processed} frames processed, {len(first_seen)} students present", end="", flush=True)
+
+	if workers > 1:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			futures = [executor.submit(_process_batch, encodings_file, engine_options, item, frame_skip, max_fps)
+					   for item in work]
+			for future in as_completed(futures):
+				merge(*future.result())
+	else:
+		for item in work:
+			merge(*_process_batch(encodings_file, engine_options, item, frame_skip, max_fps))
+	elapsed = time.time() - start_time
+	print(f"\nProcessed {processed} frames in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} fps)")
+
+	rows = []
+	for name in sorted(gallery.names):
+		if name in first_seen:
+			seconds, source = first_seen[name]
+			rows.append({"name": name, "status": "Present", "first_seen": round(seconds, 2), "source": source})
+		else:
+			rows.append({"name": name, "status": "Absent", "first_seen": None, "source": None})
+	if output:
+		write_results(rows, output)
+		print(f"Attendance saved to {output}")
+	return rows
+
+
+def write_results(rows, output):
+	"""Write attendance rows to a .json file, or a .csv file for any other extension."""
+	if output.lower().endswith(".json"):
+		with open(output, 'w', encoding='utf-8') as f:
+			json.dump(rows, f, indent=2, ensure_ascii=False)
+	else:
+		with open(output, 'w', newline='', encoding='utf-8') as f:
+			writer = csv.DictWriter(f, fieldnames=["name", "status", "first_seen", "source"])
+			writer.writeheader()
+			writer.writerows(rows)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("inputs", nargs="+", help="Video files, image folders or images")
+	parser.add_argument("--encodings", default="student_encodings.pkl", help="Gallery file (.fgal or .pkl)")
+	parser.add_argument("--output", default="attendance.csv", help="Result file (.csv or .json)")
+	parser.add_argument("--frame-skip", type=int, default=0, help="Frames skipped after each processed frame")
+	parser.add_argument("--max-fps", type=float, default=None, help="Max frames processed per second of video")
+	parser.add_argument("--workers", type=int, default=1, help="Processes running batches in parallel")
+	parser.add_argument("--batch-frames", type=int, default=3000, help="Consecutive frames per batch")
+	parser.add_argument("--scale", type=float, default=0.25, help="Detection downscale factor")
+	parser.add_argument("--tracking", action="store_true", help="Track faces between detections")
+	parser.add_argument("--detect-every", type=int, default=5, help="Frames between detections when tracking")
+	parser.add_argument("--vote-window", type=int, default=10, help="Recent encodings voting per face")
+	parser.add_argument("--vote-quorum", type=int, default=10, help="Encodings of one student needed to check in")
+	parser.add_argument("--adaptive", action="store_true", help="Detect around recent faces at an adaptive scale")
+	parser.add_argument("--door-zone", type=float, nargs=4, metavar=("LEFT", "TOP", "RIGHT", "BOTTOM"),
+						help="Frame fractions always scanned in adaptive mode")
+	parser.add_argument("--detect-budget-ms", type=float, default=None, help="Latency budget of one adaptive detection")
+	parser.add_argument("--detector", default="hog", choices=list(DETECTORS), help="Face detector backend")
+	args = parser.parse_args()
+	run_batch(args.inputs, args.encodings, args.output, frame_skip=args.frame_skip, max_fps=args.max_fps,
+			  workers=args.workers, batch_frames=args.batch_frames, scale=args.scale, tracking=args.tracking,
+			  detect_every=args.detect_every, vote_window=args.vote_window, vote_quorum=args.vote_quorum,
+			  adaptive=args.adaptive, door_zone=args.door_zone, detect_budget_ms=args.detect_budget_ms,
+			  detector_backend=args.detector)
+
+
+if __name__ == "__main__":
+	main()
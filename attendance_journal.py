@@ -0,0 +1,130 @@
+"""
+Durable attendance journal: an append-only SQLite log of check-in events.
+
+AttendanceGUI and the multi-camera server keep attendance in memory; a crash
+used to lose the whole session. Every check-in is now queued to a writer
+thread that commits them in groups (one transaction per batch, WAL mode), so
+the frame loop never waits for the disk. On restart, replay() rebuilds the
+session's attendance from the journal.
+
+	sqlite3 attendance.db "SELECT name, datetime(timestamp, 'unixepoch', 'localtime') FROM events"
+"""
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+	id INTEGER PRIMARY KEY,
+	session TEXT NOT NULL,
+	name TEXT NOT NULL,
+	timestamp REAL NOT NULL,
+	source TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (session, name);
+"""
+
+
+def default_session():
+	"""Session id of today's class: the local date."""
+	return time.strftime("%Y-%m-%d")
+
+
+class AttendanceJournal:
+	"""
+	Append-only check-in log with group commit on a background thread.
+
+	record() only puts the event on a queue. The writer thread takes every
+	event waiting (up to `batch_size`, or what arrives within `flush_interval`)
+	and writes them in one transaction, so hundreds of check-ins per minute
+	cost a handful of commits.
+	"""
+	def __init__(self, path, session=None, batch_size=256, flush_interval=0.2):
+		"""
+		Args:
+			path (str): SQLite database file, created if missing.
+			session (str): Session id the events belong to, defaults to today's date.
+			batch_size (int): Maximum events per transaction.
+			flush_interval (float): Seconds the writer waits for more events before committing.
+		"""
+		self.path = path
+		self.session = session or default_session()
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self.queue = queue.Queue()
+		self.written = 0
+		self.commits = 0
+		self.errors = 0
+		self.last_error = None
+		with contextlib.closing(self._connect()) as connection:
+			connection.executescript(_SCHEMA)
+		self.thread = threading.Thread(target=self._run, name="attendance-journal", daemon=True)
+		self.thread.start()
+
+	def _connect(self):
+		connection = sqlite3.connect(self.path, timeout=10.0)
+		# WAL: readers (replay, reports) never block the writer; NORMAL sync is durable across app crashes
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute("PRAGMA synchronous=NORMAL")
+		return connection
+
+	def record(self, name, timestamp=None, source=None):
+		"""Queue a check-in event. Never blocks."""
+		self.queue.put((self.session, name, time.time() if timestamp is None else timestamp,
+						None if source is None else str(source)))
+
+	def pending(self):
+		"""Events queued but not committed yet."""
+		return self.queue.qsize()
+
+	def replay(self):
+		"""
+		Attendance of this session recorded so far.
+
+		Returns:
+			dict: {student name: (first check-in time, last check-in time)}.
+		"""
+		connection = self._connect()
+		try:
+			rows = connection.execute("SELECT name, MIN(timestamp), MAX(timestamp) FROM events "
+									  "WHERE session = ? GROUP BY name", (self.session,)).fetchall()
+		finally:
+			connection.close()
+		return {name: (first, last) for name, first, last in rows}
+
+	def close(self):
+		"""Commit every queued event and stop the writer."""
+		self.queue.put(None)
+		self.thread.join()
+
+	def _run(self):
+		connection = self._connect()
+		running = True
+		while running:
+			event = self.queue.get()
+			if event is None:
+				break
+			batch = [event]
+			deadline = time.perf_counter() + self.flush_interval
+			# Group commit: gather what arrives shortly after, up to batch_size events
+			while len(batch) < self.batch_size:
+				try:
+					event = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+				except queue.Empty:
+					break
+				if event is None:
+					running = False
+					break
+				batch.append(event)
+			try:
+				with connection:
+					connection.executemany("INSERT INTO events (session, name, timestamp, source) VALUES (?, ?, ?, ?)",
+										   batch)
+				self.written += len(batch)
+				self.commits += 1
+			except sqlite3.Error as e:
+				self.errors += 1
+				self.last_error = f"{type(e).__name__}: {e}"
+		connection.close()
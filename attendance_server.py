@@ -0,0 +1,225 @@
+"""
+Multi-camera attendance server.
+
+One supervisor process starts a worker process per camera or stream. Every
+worker runs its own AttendanceEngine against the same read-only gallery
+(memory-mapped .fgal file, so the pages are shared) and reports check-ins
+back. The supervisor merges them so a student seen at several doors is
+counted once, and restarts workers whose camera drops.
+
+	python attendance_server.py 0 1 rtsp://10.0.0.12/stream --encodings student_encodings.fgal
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import signal
+import tempfile
+import time
+
+from attendance_journal import AttendanceJournal
+from face_detectors import DETECTORS
+from face_gallery import GALLERY_EXTENSION, convert_pickle, delta_path
+from face_index import cells_path, index_path
+
+STATS_INTERVAL = 5.0  # Seconds between per-camera stats reports
+
+
+def parse_source(source):
+	"""Camera index ("0") or stream URL / video path."""
+	return int(source) if str(source).isdigit() else source
+
+
+def camera_worker(camera_id, source, gallery_file, engine_options, events, stop):
+	"""
+	Run one camera: capture, recognize and send events to the supervisor.
+
+	Events are tuples: ("checkin", camera_id, name, timestamp), ("error", camera_id, message)
+	and ("stats", camera_id, frames per second, faces in view, detection ms saved per frame).
+	"""
+	# Heavy imports happen in the worker, the supervisor never loads dlib
+	import cv2
+	from attendance_engine import AttendanceEngine, load_gallery_file
+	from face_pipeline import LatestFrameGrabber, RateMeter
+
+	# Ctrl+C is handled by the supervisor, which stops workers through `stop`
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	capture = cv2.VideoCapture(parse_source(source))
+	if not capture.isOpened():
+		events.put(("error", camera_id, f"Cannot open source {source}"))
+		return
+	engine = AttendanceEngine(load_gallery_file(gallery_file), **engine_options)
+	grabber = LatestFrameGrabber(capture).start()
+	fps = RateMeter()
+	last_stats = time.time()
+	try:
+		while not stop.is_set():
+			_, frame = grabber.take()
+			if frame is None:
+				continue
+			faces, checked_in = engine.process(frame)
+			fps.tick()
+			for name in checked_in:
+				events.put(("checkin", camera_id, name, engine.attendance[name]))
+			if time.time() - last_stats >= STATS_INTERVAL:
+				saved_ms = engine.detector.stats()["saved_ms"] if engine.detector else 0.0
+				events.put(("stats", camera_id, fps.rate(), len(faces), saved_ms))
+				last_stats = time.time()
+	finally:
+		grabber.stop()
+		capture.release()
+
+
+class AttendanceServer:
+	"""Supervises one worker process per camera and merges their attendance."""
+	def __init__(self, sources, encodings_file, output=None, journal=None, session=None, **engine_options):
+		"""
+		Args:
+			sources (list): Camera indexes or stream URLs.
+			encodings_file (str): Gallery file (.fgal or train_faces pickle).
+			output (str): Result file (.csv or .json) written on shutdown.
+			journal (str): SQLite journal of the check-ins (see attendance_journal), None for none.
+						   Check-ins already journaled in this session are restored.
+			session (str): Session id of the journal events, None for today's date.
+			**engine_options: Passed to every AttendanceEngine.
+		"""
+		self.sources = list(sources)
+		self.output = output
+		self.engine_options = engine_options
+		self.tempdir = None  # Private folder of the converted gallery, removed at shutdown
+		self.gallery_file = self._shared_gallery(encodings_file)
+		self.events = mp.Queue()
+		self.stop_event = mp.Event()
+		self.workers = {}  # key: camera id, value: Process
+		self.attendance = {}  # key: student name, value: (timestamp, camera id)
+		self.camera_stats = {}  # key: camera id, value: (fps, faces in view, detection ms saved)
+		self.journal = None
+		if journal:
+			self.journal = AttendanceJournal(journal, session=session)
+			# Camera unknown for restored check-ins
+			self.attendance = {name: (first, None) for name, (first, last) in self.journal.replay().items()}
+
+	def _shared_gallery(self, encodings_file):
+		"""
+		Make sure all workers map one binary gallery instead of unpickling a copy each.
+
+		The converted gallery goes to a folder of this server only, so another server
+		(or a retrain) never replaces the file its workers have mapped.
+		"""
+		if encodings_file.endswith(GALLERY_EXTENSION):
+			return encodings_file
+		self.tempdir = tempfile.mkdtemp(prefix="attendance-server-")
+		gallery_file = os.path.join(self.tempdir,
+									os.path.splitext(os.path.basename(encodings_file))[0] + GALLERY_EXTENSION)
+		convert_pickle(encodings_file, gallery_file)
+		# The index saved next to the pickle is reused for the converted gallery
+		if os.path.exists(index_path(encodings_file)):
+			shutil.copyfile(index_path(encodings_file), index_path(gallery_file))
+			if os.path.exists(cells_path(index_path(encodings_file))):
+				shutil.copyfile(cells_path(index_path(encodings_file)), cells_path(index_path(gallery_file)))
+		# So are the students enrolled since training
+		if os.path.exists(delta_path(encodings_file)):
+			shutil.copyfile(delta_path(encodings_file), delta_path(gallery_file))
+		return gallery_file
+
+	def _start_worker(self, camera_id):
+		process = mp.Process(target=camera_worker, name=f"camera-{camera_id}",
+							 args=(camera_id, self.sources[camera_id], self.gallery_file,
+								   self.engine_options, self.events, self.stop_event), daemon=True)
+		process.start()
+		self.workers[camera_id] = process
+
+	def _handle(self, event):
+		kind, camera_id = event[0], event[1]
+		if kind == "checkin":
+			_, _, name, timestamp = event
+			# Same student at several doors: keep the earliest check-in
+			if name not in self.attendance or timestamp < self.attendance[name][0]:
+				first = name not in self.attendance
+				self.attendance[name] = (timestamp, camera_id)
+				if first:
+					if self.journal is not None:
+						self.journal.record(name, timestamp, source=self.sources[camera_id])
+					print(f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] "
+						  f"{name} checked in at camera {camera_id} ({len(self.attendance)} present)")
+		elif kind == "stats":
+			self.camera_stats[camera_id] = event[2:]
+			print("  " + " | ".join(f"cam {cid}: {fps:.1f} fps, {faces} faces"
+									+ (f", {saved:.1f} ms saved" if saved else "")
+									for cid, (fps, faces, saved) in sorted(self.camera_stats.items())))
+		elif kind == "error":
+			print(f"Camera {camera_id}: {event[2]}")
+
+	def run(self, restart_delay=5.0):
+		"""Run until interrupted, restarting workers that exit."""
+		for camera_id in range(len(self.sources)):
+			self._start_worker(camera_id)
+		print(f"Serving {len(self.sources)} camera(s) with gallery {self.gallery_file}. Press Ctrl+C to stop.")
+		restart_at = {}
+		try:
+			while True:
+				try:
+					self._handle(self.events.get(timeout=1.0))
+				except queue.Empty:
+					pass
+				for camera_id, process in self.workers.items():
+					if not process.is_alive():
+						# Camera dropped or worker crashed: retry after a delay
+						if camera_id not in restart_at:
+							restart_at[camera_id] = time.time() + restart_delay
+						elif time.time() >= restart_at.pop(camera_id):
+							print(f"Restarting camera {camera_id}")
+							self._start_worker(camera_id)
+		except KeyboardInterrupt:
+			print("\nStopping...")
+		finally:
+			self.shutdown()
+
+	def shutdown(self):
+		self.stop_event.set()
+		for process in self.workers.values():
+			process.join(timeout=3.0)
+			if process.is_alive():
+				process.terminate()
+		# Drain check-ins sent while stopping
+		while True:
+			try:
+				self._handle(self.events.get_nowait())
+			except queue.Empty:
+				break
+		if self.output:
+			from attendance_engine import write_results
+			rows = [{"name": name, "status": "Present", "first_seen": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)),
+					 "source": self.sources[camera_id] if camera_id is not None else "journal"}
+					for name, (ts, camera_id) in sorted(self.attendance.items())]
+			write_results(rows, self.output)
+			print(f"Attendance saved to {self.output}")
+		if self.journal is not None:
+			self.journal.close()
+		if self.tempdir is not None:
+			shutil.rmtree(self.tempdir, ignore_errors=True)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("sources", nargs="+", help="Camera indexes or stream URLs")
+	parser.add_argument("--encodings", default="student_encodings.pkl", help="Gallery file (.fgal or .pkl)")
+	parser.add_argument("--output", default="attendance.csv", help="Result file written on exit (.csv or .json)")
+	parser.add_argument("--journal", default=None, help="SQLite journal of check-ins, restored on restart")
+	parser.add_argument("--session", default=None, help="Journal session id (default: today's date)")
+	parser.add_argument("--tracking", action="store_true", help="Track faces between detections")
+	parser.add_argument("--detect-every", type=int, default=5, help="Frames between detections when tracking")
+	parser.add_argument("--adaptive", action="store_true", help="Detect around recent faces at an adaptive scale")
+	parser.add_argument("--detect-budget-ms", type=float, default=None, help="Latency budget of one adaptive detection")
+	parser.add_argument("--detector", default="hog", choices=list(DETECTORS), help="Face detector backend")
+	args = parser.parse_args()
+	server = AttendanceServer(args.sources, args.encodings, args.output, journal=args.journal, session=args.session,
+							  tracking=args.tracking, detect_every=args.detect_every,
+							  adaptive=args.adaptive, detect_budget_ms=args.detect_budget_ms,
+							  detector_backend=args.detector)
+	server.run()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,95 @@
+"""
+Latency and recall of every face detector backend on the collected dataset.
+
+Each dataset image is a face crop saved by Adding_dataset/face_id.py, so it holds
+exactly one face. The crop is placed on a larger canvas (`--context`, in face
+sizes on each side) to look like a camera frame, and optionally downscaled like
+the attendance app does (`--scale`). A detection whose center falls inside the
+crop is a hit; one outside it is a false positive.
+
+Usage:
+	python benchmarks/bench_detectors.py --dataset AI1901_face_dataset --limit 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from attendance_engine import IMAGE_EXTENSIONS
+from face_detectors import DETECTORS, create_detector, detector_params
+
+
+def list_images(dataset_dir):
+	images = []
+	for folder, _, files in os.walk(dataset_dir):
+		images.extend(os.path.join(folder, name) for name in sorted(files) if name.lower().endswith(IMAGE_EXTENSIONS))
+	return sorted(images)
+
+
+def make_frame(image, context, scale):
+	"""Place a face crop on a gray canvas. Returns the RGB frame and the crop box (top, right, bottom, left)."""
+	height, width = image.shape[:2]
+	pad_y, pad_x = int(height * context), int(width * context)
+	frame = cv2.copyMakeBorder(image, pad_y, pad_y, pad_x, pad_x, cv2.BORDER_CONSTANT, value=(127, 127, 127))
+	box = (pad_y, pad_x + width, pad_y + height, pad_x)
+	if scale != 1.0:
+		frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+		box = tuple(int(v * scale) for v in box)
+	return np.ascontiguousarray(frame[:, :, ::-1]), box
+
+
+def run(detector, frames):
+	"""Returns (latencies in ms, hits, false positives)."""
+	latencies, hits, false_positives = [], 0, 0
+	for frame, (top, right, bottom, left) in frames:
+		start = time.perf_counter()
+		locations = detector.detect(frame)
+		latencies.append((time.perf_counter() - start) * 1000)
+		inside = [top <= (t + b) / 2 <= bottom and left <= (l + r) / 2 <= right for t, r, b, l in locations]
+		hits += any(inside)
+		false_positives += inside.count(False)
+	return np.array(latencies), hits, false_positives
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--dataset", required=True, help="Dataset folder (student/direction/images)")
+	parser.add_argument("--backends", nargs="+", default=list(DETECTORS), choices=list(DETECTORS))
+	parser.add_argument("--limit", type=int, default=500, help="Images sampled from the dataset")
+	parser.add_argument("--context", type=float, default=1.0, help="Canvas border around the crop, in crop sizes")
+	parser.add_argument("--scale", type=float, default=1.0, help="Downscale applied to the canvas")
+	parser.add_argument("--config", default=os.path.join(os.path.dirname(__file__), "..", "config.json"))
+	args = parser.parse_args()
+
+	with open(args.config, 'r') as js:
+		cfg = json.load(js)["DETECTOR"]
+	images = list_images(args.dataset)
+	random.Random(0).shuffle(images)
+	frames = [make_frame(image, args.context, args.scale)
+			  for image in (cv2.imread(path) for path in images[:args.limit]) if image is not None]
+	if not frames:
+		print(f"No images found in {args.dataset}")
+		return
+	print(f"{len(frames)} images, canvas {frames[0][0].shape[1]}x{frames[0][0].shape[0]} (first image)\n")
+
+	print(f"{'backend':<10}{'recall':>10}{'false pos':>12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+	for kind in args.backends:
+		try:
+			backend, params = detector_params({**cfg, "BACKEND": kind})
+			detector = create_detector(backend, **params)
+		except (FileNotFoundError, ImportError, AttributeError, cv2.error) as e:
+			print(f"{kind:<10}skipped: {e}")
+			continue
+		detector.detect(frames[0][0])  # Warm up (model load, memory allocation)
+		latencies, hits, false_positives = run(detector, frames)
+		print(f"{kind:<10}{hits / len(frames):>10.3f}{false_positives:>12d}{latencies.mean():>10.2f}"
+			  f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}")
+
+
+if __name__ == "__main__":
+	main()
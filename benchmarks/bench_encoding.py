@@ -0,0 +1,69 @@
+"""
+Faces encoded per second: one face_encodings call per face against the batched
+descriptor calls of face_encoding.py.
+
+"frame" encodes k faces of one frame (encode_faces), "batch" encodes b training
+images with one face each (encode_batch). Face crops come from --dataset if
+given, otherwise random images are used (the ResNet cost does not depend on
+the content).
+
+Usage:
+	python benchmarks/bench_encoding.py --dataset AI1901_face_dataset --sizes 1 4 16 64
+"""
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+import face_recognition
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from face_encoding import encode_batch, encode_faces
+from bench_detectors import list_images
+
+
+def load_crops(dataset, count, size=150):
+	"""RGB face crops resized to size x size; the whole crop is the face box."""
+	if dataset:
+		crops = [cv2.imread(path) for path in list_images(dataset)[:count]]
+		crops = [np.ascontiguousarray(cv2.resize(crop, (size, size))[:, :, ::-1]) for crop in crops if crop is not None]
+	else:
+		rng = np.random.default_rng(0)
+		crops = [rng.integers(0, 256, (size, size, 3), dtype=np.uint8) for _ in range(count)]
+	return crops, (0, size, size, 0)
+
+
+def faces_per_second(encode, n_faces, repeat):
+	encode()  # Warm up
+	start = time.perf_counter()
+	for _ in range(repeat):
+		encode()
+	return n_faces * repeat / (time.perf_counter() - start)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--dataset", default=None, help="Dataset folder with face crops")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+
+	crops, box = load_crops(args.dataset, max(args.sizes))
+	size = crops[0].shape[0]
+	print(f"{len(crops)} crops of {size}x{size}\n")
+	print(f"{'faces':>6}{'per face (f/s)':>16}{'frame (f/s)':>14}{'batch (f/s)':>14}{'speedup':>10}")
+	for k in args.sizes:
+		k = min(k, len(crops))
+		# k faces side by side in one frame
+		frame = np.ascontiguousarray(np.hstack(crops[:k]))
+		locations = [(0, (i + 1) * size, size, i * size) for i in range(k)]
+		single = faces_per_second(lambda: [face_recognition.face_encodings(frame, [location])[0]
+										   for location in locations], k, args.repeat)
+		in_frame = faces_per_second(lambda: encode_faces(frame, locations), k, args.repeat)
+		batched = faces_per_second(lambda: encode_batch(crops[:k], [[box]] * k), k, args.repeat)
+		print(f"{k:>6}{single:>16.1f}{in_frame:>14.1f}{batched:>14.1f}{max(in_frame, batched) / single:>10.2f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,86 @@
+"""
+Startup time and memory of loading the gallery from the pickle vs the binary .fgal format.
+
+Each load runs in a fresh process. RSS is split into anonymous (private) and
+file-backed memory: file-backed pages of a memory-mapped gallery are shared
+between all kiosk processes on the host.
+
+Usage:
+	python benchmarks/bench_gallery_load.py --students 2000 --per-student 300
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+
+def memory_kb():
+	"""(RssAnon, RssFile) of this process in kB, from /proc (Linux only)."""
+	values = {"RssAnon": 0, "RssFile": 0}
+	try:
+		with open("/proc/self/status") as f:
+			for line in f:
+				key = line.split(":")[0]
+				if key in values:
+					values[key] = int(line.split()[1])
+	except OSError:
+		pass
+	return values["RssAnon"], values["RssFile"]
+
+
+def child(path):
+	"""Load the gallery the way AttendanceGUI does and match one face."""
+	import numpy as np
+	from face_gallery import FaceGallery, GALLERY_EXTENSION, load_gallery
+	anon_before, file_before = memory_kb()
+	start = time.perf_counter()
+	if path.endswith(GALLERY_EXTENSION):
+		gallery = load_gallery(path)
+	else:
+		with open(path, 'rb') as f:
+			gallery = FaceGallery.from_encodings(pickle.load(f))
+	load_ms = (time.perf_counter() - start) * 1000
+	gallery.match(np.zeros((1, 128), dtype=np.float32))
+	first_match_ms = (time.perf_counter() - start) * 1000
+	anon_after, file_after = memory_kb()
+	print(json.dumps({"load_ms": load_ms, "first_match_ms": first_match_ms,
+					  "anon_mb": (anon_after - anon_before) / 1024, "file_mb": (file_after - file_before) / 1024}))
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--students", type=int, default=2000)
+	parser.add_argument("--per-student", type=int, default=300)
+	parser.add_argument("--child", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.child:
+		child(args.child)
+		return
+
+	from face_gallery import FaceGallery, convert_pickle
+	from synthetic import make_encodings
+	known_encodings, _ = make_encodings(args.students, args.per_student)
+	with tempfile.TemporaryDirectory() as tmp:
+		pickle_file = os.path.join(tmp, "student_encodings.pkl")
+		with open(pickle_file, 'wb') as f:
+			# train_faces stores float64 arrays
+			pickle.dump({name: [e.astype('float64') for e in encodings] for name, encodings in known_encodings.items()}, f)
+		gallery_file = convert_pickle(pickle_file)
+
+		print(f"\n{'format':<8}{'file MB':>10}{'load ms':>12}{'1st match ms':>14}{'private MB':>12}{'shared MB':>11}")
+		for path in (pickle_file, gallery_file):
+			out = subprocess.check_output([sys.executable, __file__, "--child", path])
+			result = json.loads(out.decode().strip().splitlines()[-1])
+			print(f"{os.path.splitext(path)[1]:<8}{os.path.getsize(path) / 1024 ** 2:>10.1f}{result['load_ms']:>12.1f}"
+				  f"{result['first_match_ms']:>14.1f}{result['anon_mb']:>12.1f}{result['file_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,65 @@
+"""
+Recall and latency of the approximate (ivf) index against exact matching.
+
+Usage:
+	python benchmarks/bench_index.py --students 2000 --per-student 300
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from face_gallery import FaceGallery
+from face_index import BruteForceIndex, IVFIndex
+from synthetic import make_encodings, make_queries
+
+
+def time_search(index, queries, faces_per_frame):
+	"""Mean latency (ms) of one search call with `faces_per_frame` queries."""
+	rows = []
+	start = time.perf_counter()
+	for i in range(0, len(queries), faces_per_frame):
+		rows.append(index.search(queries[i:i + faces_per_frame])[0])
+	elapsed = time.perf_counter() - start
+	return np.concatenate(rows), elapsed * 1000 / (len(queries) / faces_per_frame)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--students", type=int, default=2000)
+	parser.add_argument("--per-student", type=int, default=300)
+	parser.add_argument("--queries", type=int, default=500)
+	parser.add_argument("--faces-per-frame", type=int, default=1)
+	parser.add_argument("--n-lists", type=int, default=None, help="IVF cells (default: sqrt(N))")
+	parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+	args = parser.parse_args()
+
+	known_encodings, centers = make_encodings(args.students, args.per_student)
+	gallery = FaceGallery.from_encodings(known_encodings)
+	queries, _ = make_queries(centers, args.queries)
+	print(f"Gallery: {args.students} students, {len(gallery)} encodings")
+
+	exact = BruteForceIndex(gallery.matrix, gallery.sq_norms)
+	exact_rows, exact_ms = time_search(exact, queries, args.faces_per_frame)
+	exact_owners = gallery.owners[exact_rows]
+
+	start = time.perf_counter()
+	ivf = IVFIndex.build(gallery.matrix, n_lists=args.n_lists)
+	print(f"IVF build: {len(ivf.centroids)} cells in {time.perf_counter() - start:.1f}s\n")
+
+	print(f"{'backend':<16}{'recall@1 (row)':>16}{'recall@1 (student)':>20}{'ms/frame':>12}{'speedup':>10}")
+	print(f"{'exact':<16}{1.0:>16.3f}{1.0:>20.3f}{exact_ms:>12.3f}{1.0:>10.1f}")
+	for n_probe in args.n_probe:
+		if n_probe > len(ivf.centroids):
+			break
+		ivf.n_probe = n_probe
+		rows, ms = time_search(ivf, queries, args.faces_per_frame)
+		row_recall = np.mean(rows == exact_rows)
+		student_recall = np.mean(gallery.owners[rows] == exact_owners)
+		print(f"{'ivf/' + str(n_probe):<16}{row_recall:>16.3f}{student_recall:>20.3f}{ms:>12.3f}{exact_ms / ms:>10.1f}")
+
+
+if __name__ == "__main__":
+	main()
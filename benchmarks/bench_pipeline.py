@@ -0,0 +1,242 @@
+"""
+End-to-end latency of the attendance pipeline, stage by stage, as JSON.
+
+Every frame is decoded, run through AttendanceEngine.recognize (the code the GUI,
+the batch CLI and the server run) and rendered (resize for the video panel,
+without the Tk copy). The engine's own stage timers (face_metrics) give the
+breakdown: resize (downscale + BGR->RGB), detect, encode and match. One pass
+runs per --gallery-sizes, so one run shows how the roster size moves the frame latency.
+
+Workloads:
+	recorded:  --video lecture.mp4 (repeatable) and/or --images folder/
+	synthetic: no input, --frames JPEG-encoded noise frames of --width x --height; the
+	           detector runs, then --faces fixed boxes are handed to the engine for encoding
+	           (with --adaptive only detection is timed, the crops depend on real faces).
+
+Usage:
+	python benchmarks/bench_pipeline.py --video lecture.mp4 --gallery-sizes 100 10000 1000000 --output run.json
+	python benchmarks/bench_pipeline.py --output new.json --baseline run.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from attendance_engine import AttendanceEngine, IMAGE_EXTENSIONS
+from face_detectors import DETECTORS, detector_params
+from face_gallery import FaceGallery
+from face_index import build_index
+from face_metrics import Metrics
+from face_render import fit_size, prepare_image
+from synthetic import make_gallery
+
+STAGES = ("decode", "resize", "detect", "encode", "match", "render")
+
+
+def peak_rss_mb():
+	"""Peak resident memory of this process in MB, or None where the resource module is missing (Windows)."""
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# kB on Linux, bytes on macOS
+	return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def recorded_frames(videos, image_dirs, limit):
+	"""Yield (decode seconds, BGR frame) from videos and image folders, at most `limit` frames."""
+	count = 0
+	for path in videos:
+		capture = cv2.VideoCapture(path)
+		try:
+			while count < limit:
+				start = time.perf_counter()
+				ret, frame = capture.read()
+				if not ret:
+					break
+				count += 1
+				yield time.perf_counter() - start, frame
+		finally:
+			capture.release()
+	for folder in image_dirs:
+		paths = sorted(os.path.join(root, f) for root, _, files in os.walk(folder)
+					   for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+		for path in paths:
+			if count >= limit:
+				return
+			start = time.perf_counter()
+			frame = cv2.imread(path)
+			if frame is None:
+				continue
+			count += 1
+			yield time.perf_counter() - start, frame
+
+
+def synthetic_frames(count, width, height, seed=0):
+	"""Yield (decode seconds, BGR frame) by decoding JPEG-encoded noise frames, like a camera stream."""
+	rng = np.random.default_rng(seed)
+	encoded = []
+	for _ in range(min(count, 8)):
+		frame = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+		encoded.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1])
+	for i in range(count):
+		start = time.perf_counter()
+		frame = cv2.imdecode(encoded[i % len(encoded)], cv2.IMREAD_COLOR)
+		yield time.perf_counter() - start, frame
+
+
+def synthetic_boxes(width, height, faces):
+	"""`faces` face boxes side by side across the middle of the frame (top, right, bottom, left)."""
+	size = min(height // 3, width // max(1, faces + 1))
+	top = (height - size) // 2
+	return [(top, (i + 1) * width // (faces + 1) + size // 2, top + size, (i + 1) * width // (faces + 1) - size // 2)
+			for i in range(faces)]
+
+
+def percentiles(ms):
+	ms = np.asarray(ms, dtype=np.float64)
+	if len(ms) == 0:
+		return {"count": 0}
+	return {"count": int(len(ms)), "mean": float(ms.mean()), "p50": float(np.percentile(ms, 50)),
+			"p95": float(np.percentile(ms, 95)), "p99": float(np.percentile(ms, 99)), "max": float(ms.max())}
+
+
+def run(args):
+	with open(args.config, 'r') as js:
+		cfg = json.load(js)["DETECTOR"]
+	backend, params = detector_params({**cfg, "BACKEND": args.detector})
+	recorded = bool(args.video or args.images)
+
+	times = {stage: [] for stage in ("decode", "render")}
+	stage_times = {}  # Engine stages (resize, detect, encode) of the first gallery size
+	match_times = {}
+	frame_times = {}
+	faces_per_frame = []
+	for n, size in enumerate(args.gallery_sizes):
+		names, matrix, owners, _ = make_gallery(size, args.per_student)
+		gallery = FaceGallery(names, matrix, owners)
+		if args.index != "exact":
+			gallery.index = build_index(args.index, gallery.matrix)
+		# The real engine, with its own stage timers, so tracking, voting, the
+		# BGR->RGB conversions and the adaptive detector are all measured
+		metrics = Metrics(enabled=True, window=args.frames)
+		engine = AttendanceEngine(gallery, scale=args.scale, tracking=args.tracking, detect_every=args.detect_every,
+								  adaptive=args.adaptive, detector_backend=backend, detector_params=params,
+								  metrics=metrics)
+		if not recorded and not args.adaptive:
+			# Noise frames have no face: run the real detector, then hand the fixed boxes
+			# (in detection coordinates) to the engine so encoding and matching run too
+			detect = engine.face_detector.detect
+
+			def synthetic_detect(image, detect=detect):
+				detect(image)
+				return [tuple(int(v * image.shape[0] / args.height) for v in box)
+						for box in synthetic_boxes(args.width, args.height, args.faces)]
+			engine.face_detector.detect = synthetic_detect
+		frames = (recorded_frames(args.video, args.images, args.frames) if recorded
+				  else synthetic_frames(args.frames, args.width, args.height))
+		frame_times[size] = []
+		for decode_s, frame in frames:
+			start = time.perf_counter()
+			faces = engine.recognize(frame)
+			recognize_s = time.perf_counter() - start
+
+			start = time.perf_counter()
+			prepare_image(frame, fit_size(frame.shape[1], frame.shape[0], *args.panel))
+			render_s = time.perf_counter() - start
+			frame_times[size].append((decode_s + recognize_s + render_s) * 1000)
+			if n == 0:
+				times["decode"].append(decode_s * 1000)
+				times["render"].append(render_s * 1000)
+				faces_per_frame.append(len(faces))
+		with metrics.lock:
+			durations = {stage: [seconds * 1000 for seconds in values] for stage, values in metrics.durations.items()}
+		match_times[size] = durations.pop("match", [])
+		if n == 0:
+			stage_times = durations
+
+	report = {
+		"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+		"versions": {"python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__,
+					 "machine": platform.machine(), "processor": platform.processor()},
+		"workload": {"kind": "recorded" if recorded else "synthetic", "video": args.video, "images": args.images,
+					 "frames": len(faces_per_frame), "scale": args.scale, "detector": args.detector, "index": args.index,
+					 "tracking": args.tracking, "detect_every": args.detect_every, "adaptive": args.adaptive,
+					 "faces_per_frame": float(np.mean(faces_per_frame)) if faces_per_frame else 0.0,
+					 "per_student": args.per_student},
+		"stages_ms": {stage: percentiles(times["decode"] if stage == "decode" else times["render"] if stage == "render"
+										 else stage_times.get(stage, [])) for stage in STAGES if stage != "match"},
+		"match_ms": {str(size): percentiles(ms) for size, ms in match_times.items()},
+		"frame_ms": {str(size): percentiles(ms) for size, ms in frame_times.items()},
+		"throughput_fps": {str(size): float(1000 / np.mean(ms)) if ms else 0.0 for size, ms in frame_times.items()},
+		"peak_rss_mb": peak_rss_mb(),
+	}
+	return report
+
+
+def print_report(report, baseline=None):
+	"""Table of p50/p95/p99 per stage, with the change of p50 against a baseline report."""
+	rows = [(stage, stats) for stage, stats in report["stages_ms"].items()]
+	rows += [(f"match@{size}", stats) for size, stats in report["match_ms"].items()]
+	rows += [(f"frame@{size}", stats) for size, stats in report["frame_ms"].items()]
+	previous = {}
+	if baseline:
+		previous.update(baseline.get("stages_ms", {}))
+		previous.update({f"match@{size}": stats for size, stats in baseline.get("match_ms", {}).items()})
+		previous.update({f"frame@{size}": stats for size, stats in baseline.get("frame_ms", {}).items()})
+	print(f"{'stage':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}" + (f"{'vs base':>10}" if baseline else ""))
+	for stage, stats in rows:
+		if not stats.get("count"):
+			continue
+		line = f"{stage:<18}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+		if stage in previous and previous[stage].get("p50"):
+			line += f"{(stats['p50'] / previous[stage]['p50'] - 1) * 100:>+9.1f}%"
+		print(line)
+	print("throughput: " + ", ".join(f"{fps:.1f} fps @ {size}" for size, fps in report["throughput_fps"].items()))
+	if report["peak_rss_mb"] is not None:
+		print(f"peak RSS: {report['peak_rss_mb']:.0f} MB")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--video", nargs="*", default=[], help="Recorded clips")
+	parser.add_argument("--images", nargs="*", default=[], help="Folders of recorded frames")
+	parser.add_argument("--frames", type=int, default=200, help="Frames processed (synthetic: generated)")
+	parser.add_argument("--width", type=int, default=1280, help="Synthetic frame width")
+	parser.add_argument("--height", type=int, default=720, help="Synthetic frame height")
+	parser.add_argument("--faces", type=int, default=1, help="Synthetic faces per frame")
+	parser.add_argument("--scale", type=float, default=0.25, help="Detection downscale, as AttendanceEngine")
+	parser.add_argument("--detector", default="hog", choices=list(DETECTORS))
+	parser.add_argument("--tracking", action="store_true", help="Engine tracking mode")
+	parser.add_argument("--detect-every", type=int, default=5, help="Frames between detections when tracking")
+	parser.add_argument("--adaptive", action="store_true", help="Engine adaptive detection")
+	parser.add_argument("--config", default=os.path.join(os.path.dirname(__file__), "..", "config.json"))
+	parser.add_argument("--gallery-sizes", type=int, nargs="+", default=[100, 10000, 100000])
+	parser.add_argument("--per-student", type=int, default=100, help="Encodings per synthetic student")
+	parser.add_argument("--index", default="exact", choices=["exact", "ivf"])
+	parser.add_argument("--panel", type=int, nargs=2, default=[900, 640], metavar=("WIDTH", "HEIGHT"),
+						help="Video panel size the render stage scales to")
+	parser.add_argument("--output", default=None, help="JSON report path")
+	parser.add_argument("--baseline", default=None, help="Previous JSON report to compare with")
+	args = parser.parse_args()
+
+	report = run(args)
+	baseline = None
+	if args.baseline:
+		with open(args.baseline, 'r') as f:
+			baseline = json.load(f)
+	print_report(report, baseline)
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(report, f, indent=2)
+		print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+	main()
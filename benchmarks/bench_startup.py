@@ -0,0 +1,187 @@
+"""
+Startup time of the attendance app: time to first frame and to first recognition.
+
+Every run is a fresh process that starts the way AttendanceGUI does, without
+the Tk window:
+	eager: the old order, import face_recognition (every dlib model), load the
+	       gallery and the detector, then open the camera and show a frame.
+	lazy:  open the camera and show a frame first, load the gallery, detector and
+	       face models on a BackgroundLoader thread while frames keep coming.
+
+Times are measured from the start of the process's imports:
+	first_frame_s:       first frame read (what the user sees first)
+	ready_s:             gallery, detector and models loaded
+	first_recognition_s: first frame detected, encoded and matched. With --video the
+	                     first frame with a recognized face; synthetic frames have no
+	                     face, so one box is encoded and matched on the first frame after ready.
+
+Usage:
+	python benchmarks/bench_startup.py --runs 5 --output startup.json
+	python benchmarks/bench_startup.py --video lecture.mp4 --encodings student_encodings.fgal
+	python benchmarks/bench_startup.py --prefetch   # model files pre-warmed in the page cache (face_models.py)
+"""
+import time
+
+T0 = time.perf_counter()  # Before the heavy imports, so they are part of the measured startup
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("eager", "lazy")
+METRICS = ("import_s", "first_frame_s", "ready_s", "first_recognition_s")
+
+
+def frame_source(args):
+	"""Callable returning the next BGR frame (None at the end), like the capture thread."""
+	import cv2
+	import numpy as np
+	if args.video or args.camera is not None:
+		capture = cv2.VideoCapture(args.video if args.video else args.camera)
+
+		def read():
+			ret, frame = capture.read()
+			return frame if ret else None
+		return read
+	rng = np.random.default_rng(0)
+	frame = cv2.GaussianBlur(rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8), (9, 9), 0)
+	encoded = cv2.imencode(".jpg", frame)[1]
+	return lambda: cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def child(args):
+	"""One startup, printed as JSON."""
+	times = {}
+	if args.child == "eager":
+		import face_recognition  # noqa: F401 (what face_attendance.py imported at the top)
+	from attendance_engine import AttendanceEngine, load_gallery_file
+	from face_detectors import detector_params
+	from face_models import BackgroundLoader, warm_up
+	times["import_s"] = time.perf_counter() - T0
+
+	with open(args.config, 'r') as js:
+		backend, params = detector_params(json.load(js)["DETECTOR"])
+	loader = BackgroundLoader([
+		("gallery", "Reading gallery...", lambda results: load_gallery_file(args.encodings)),
+		("engine", "Loading face detector...",
+		 lambda results: AttendanceEngine(results["gallery"], detector_backend=backend, detector_params=params)),
+		("models", "Loading and warming up face models...", lambda results: warm_up()),
+	])
+	if args.child == "eager":
+		loader.run()
+	read = frame_source(args)
+	frame = read()
+	times["first_frame_s"] = time.perf_counter() - T0
+	if frame is None:
+		raise SystemExit("No frame from the source")
+	if args.child == "lazy":
+		loader.start()
+		# Preview keeps running while the models load (a clip stays on its first
+		# frame, so both modes look for the first face from the same frame)
+		while not loader.done.wait(1 / 30):
+			frame = read() if not args.video else frame
+	if loader.error:
+		raise SystemExit(loader.error)
+	times["ready_s"] = time.perf_counter() - T0
+
+	engine = loader.results["engine"]
+	times["first_recognition_s"] = None
+	if args.video or args.camera is not None:
+		for _ in range(args.max_frames):
+			if frame is None:
+				break
+			if any(face[1] is not None for face in engine.recognize(frame)):
+				times["first_recognition_s"] = time.perf_counter() - T0
+				break
+			frame = read()
+	else:
+		engine.recognize(frame)
+		height, width = frame.shape[:2]
+		size = min(height, width) // 3
+		engine.encode_and_match(frame, [(height // 3, width // 2 + size // 2, height // 3 + size, width // 2 - size // 2)])
+		times["first_recognition_s"] = time.perf_counter() - T0
+	print(json.dumps(times))
+
+
+def run_child(mode, args):
+	command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--encodings", args.encodings,
+			   "--config", args.config, "--max-frames", str(args.max_frames),
+			   "--width", str(args.width), "--height", str(args.height)]
+	if args.video:
+		command += ["--video", args.video]
+	if args.camera is not None:
+		command += ["--camera", str(args.camera)]
+	start = time.perf_counter()
+	out = subprocess.check_output(command)
+	result = json.loads(out.decode().strip().splitlines()[-1])
+	result["process_s"] = time.perf_counter() - start
+	return result
+
+
+def summarize(runs):
+	import numpy as np
+	summary = {}
+	for metric in METRICS + ("process_s",):
+		values = [run[metric] for run in runs if run.get(metric) is not None]
+		if values:
+			summary[metric] = {"median": float(np.median(values)), "min": float(min(values)), "max": float(max(values))}
+	return summary
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode")
+	parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+	parser.add_argument("--encodings", default=None, help="Gallery file, default a synthetic .fgal of --gallery-size")
+	parser.add_argument("--gallery-size", type=int, default=10000, help="Encodings of the synthetic gallery")
+	parser.add_argument("--video", default=None, help="Recorded clip instead of synthetic frames")
+	parser.add_argument("--camera", type=int, default=None, help="Camera index instead of synthetic frames")
+	parser.add_argument("--max-frames", type=int, default=300, help="Frames tried for the first recognized face")
+	parser.add_argument("--width", type=int, default=1280, help="Synthetic frame width")
+	parser.add_argument("--height", type=int, default=720, help="Synthetic frame height")
+	parser.add_argument("--config", default=os.path.join(ROOT, "config.json"))
+	parser.add_argument("--prefetch", action="store_true", help="Read the model files into the page cache first")
+	parser.add_argument("--output", default=None, help="JSON report path")
+	parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.child:
+		child(args)
+		return
+
+	with tempfile.TemporaryDirectory() as tmp:
+		if args.encodings is None:
+			from face_gallery import FaceGallery
+			from synthetic import make_gallery
+			names, matrix, owners, _ = make_gallery(args.gallery_size)
+			args.encodings = os.path.join(tmp, "student_encodings.fgal")
+			FaceGallery(names, matrix, owners).save(args.encodings)
+		if args.prefetch:
+			from face_models import model_files, prefetch
+			prefetch(model_files())
+
+		report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "encodings": args.encodings,
+				  "source": args.video or (f"camera {args.camera}" if args.camera is not None else "synthetic"), "prefetch": args.prefetch, "modes": {}}
+		for mode in args.modes:
+			runs = [run_child(mode, args) for _ in range(args.runs)]
+			report["modes"][mode] = {"runs": runs, "summary": summarize(runs)}
+
+	print(f"\n{'mode':<8}" + "".join(f"{metric[:-2]:>20}" for metric in METRICS + ("process_s",)))
+	for mode, result in report["modes"].items():
+		summary = result["summary"]
+		print(f"{mode:<8}" + "".join(f"{summary[metric]['median']:>19.2f}s" if metric in summary else f"{'-':>20}"
+									  for metric in METRICS + ("process_s",)))
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(report, f, indent=2)
+		print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Spread of 128-d face encodings: different people are ~0.9 apart,
+# photos of the same person ~0.35 apart (euclidean distance).
+CENTER_STD = 0.056
+SAMPLE_STD = 0.022
+
+
+def make_encodings(n_students, per_student, dim=128, seed=0):
+	"""
+	Generate a synthetic {student name: [encodings]} dict shaped like train_faces output.
+
+	Args:
+		n_students (int): Number of students.
+		per_student (int): Encodings stored for each student.
+		dim (int): Encoding size.
+		seed (int): Random seed.
+
+	Returns:
+		tuple[dict, np.ndarray]: The encodings dict and the (S, dim) student centers.
+	"""
+	rng = np.random.default_rng(seed)
+	centers = rng.normal(0.0, CENTER_STD, (n_students, dim)).astype(np.float32)
+	known_encodings = {}
+	for i, center in enumerate(centers):
+		samples = center + rng.normal(0.0, SAMPLE_STD, (per_student, dim)).astype(np.float32)
+		known_encodings[f"SE{i:06d}"] = list(samples)
+	return known_encodings, centers
+
+
+def make_queries(centers, n_queries, seed=1):
+	"""
+	Generate query encodings of random known students.
+
+	Returns:
+		tuple[np.ndarray, np.ndarray]: (Q, dim) queries and (Q,) true student ids.
+	"""
+	rng = np.random.default_rng(seed)
+	owners = rng.integers(0, len(centers), n_queries)
+	queries = centers[owners] + rng.normal(0.0, SAMPLE_STD, (n_queries, centers.shape[1])).astype(np.float32)
+	return queries.astype(np.float32), owners
+
+
+def make_gallery(n_encodings, per_student=100, dim=128, seed=0, chunk=65536):
+	"""
+	Generate a synthetic packed gallery directly as a matrix (fast and compact up to millions of rows).
+
+	Args:
+		n_encodings (int): Rows in the gallery.
+		per_student (int): Encodings per student (the last student may have fewer).
+		dim (int): Encoding size.
+		seed (int): Random seed.
+		chunk (int): Rows generated at a time, bounds the temporary memory.
+
+	Returns:
+		tuple[list[str], np.ndarray, np.ndarray, np.ndarray]: Student names, (N, dim) float32
+		matrix, (N,) int32 owners and the (S, dim) student centers, ready for FaceGallery.
+	"""
+	rng = np.random.default_rng(seed)
+	owners = (np.arange(n_encodings) // per_student).astype(np.int32)
+	n_students = int(owners[-1]) + 1 if n_encodings else 0
+	centers = rng.normal(0.0, CENTER_STD, (n_students, dim)).astype(np.float32)
+	matrix = np.empty((n_encodings, dim), dtype=np.float32)
+	for start in range(0, n_encodings, chunk):
+		stop = min(start + chunk, n_encodings)
+		matrix[start:stop] = rng.standard_normal((stop - start, dim), dtype=np.float32) * SAMPLE_STD
+		matrix[start:stop] += centers[owners[start:stop]]
+	return [f"SE{i:06d}" for i in range(n_students)], matrix, owners, centers
@@ -1,16 +1,163 @@
-import face_recognition
 import pickle
+import hashlib
+import json
 import os
 import sys
 import time
+import shutil
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+from face_gallery import FaceGallery, GALLERY_EXTENSION, compact_student, compaction_report, delta_path, update_delta
+from face_index import build_index, index_path
+from face_pipeline import LatestFrameGrabber, RateMeter, RecognitionPipeline
+from face_reload import GalleryManager, roster_diff
+from face_render import FrameRenderer, update_label
+from face_roster import RosterView
+from face_metrics import draw_overlay, from_config as metrics_from_config
+from face_models import BackgroundLoader, face_encoder, pose_predictor_5_point, warm_up
+from attendance_engine import AttendanceEngine, IMAGE_EXTENSIONS, load_gallery_file
+from attendance_journal import AttendanceJournal
+from face_detectors import create_detector, detector_params
+from face_encoding import encode_batch, encode_faces
 
 # Part 1: Data preparation (Training)
-def train_faces(dataset_dir, output_file='student_encodings.pkl'):
+
+
+def _list_student_images(student_dir):
+	"""List (image path, capture direction) of every image in a student's folder."""
+	images = []
+	# Iterate through subfolders (if any) or directly images
+	for root, _, files in os.walk(student_dir):
+		# Subfolder written by face_id.py: straight / left / right
+		direction = os.path.relpath(root, student_dir)
+		for img_file in sorted(files):
+			# Only process common image file types
+			if img_file.lower().endswith(IMAGE_EXTENSIONS):
+				images.append((os.path.join(root, img_file), direction))
+	return images
+
+
+# Per-image quality gate of train_faces, opt-in (quality=True or overrides)
+QUALITY_DEFAULTS = {
+	"min_size": 48,  # Face height in pixels
+	"min_sharpness": 30.0,  # Variance of the Laplacian of the face
+	"min_brightness": 40,  # Mean gray level of the face
+	"max_brightness": 220,
+	"max_faces": 1,  # More faces in a student's image: unclear who is who
+}
+
+
+def _check_quality(image, location, quality):
+	"""Reason to reject a face, or None if it passes the quality gate."""
+	top, right, bottom, left = location
+	if bottom - top < quality["min_size"] or right - left < quality["min_size"]:
+		return "too small"
+	gray = cv2.cvtColor(image[top:bottom, left:right], cv2.COLOR_RGB2GRAY)
+	brightness = gray.mean()
+	if brightness < quality["min_brightness"]:
+		return "too dark"
+	if brightness > quality["max_brightness"]:
+		return "too bright"
+	if cv2.Laplacian(gray, cv2.CV_64F).var() < quality["min_sharpness"]:
+		return "blurry"
+	return None
+
+
+# Face detectors of this (worker) process, created once per backend and parameters
+_training_detectors = {}
+
+
+def _training_detector(backend, params):
+	key = (backend, tuple(sorted((params or {}).items())))
+	if key not in _training_detectors:
+		_training_detectors[key] = create_detector(backend, **(params or {}))
+	return _training_detectors[key]
+
+
+def _encode_images(images, crops=False, crop_padding=0, quality=None, detector_backend="hog", detector_params=None):
+	"""
+	Extract encodings from a batch of images. Runs in a worker process in parallel mode.
+
+	Faces are detected image by image (or taken as the whole image for known
+	crops), checked against the quality gate, then every face of the batch is
+	encoded in one descriptor call (see face_encoding.encode_batch).
+
+	Args:
+		images (list[tuple[str, str]]): (image path, direction) pairs.
+		crops (bool): Images are face crops, skip detection.
+		crop_padding (int): Border around the face in the crops (PADD of face_id.py).
+		quality (dict): Quality gate thresholds (see QUALITY_DEFAULTS), None to accept every face.
+		detector_backend (str): Face detector, see face_detectors.DETECTORS.
+		detector_params (dict): Parameters of the detector backend.
+
+	Returns:
+		list[tuple[str, str, list, str, str, float]]: (image path, direction, encodings,
+		error message or None, rejection reason or None, seconds spent on the image).
+	"""
+	errors = {}  # key: image path, value: error message
+	rejected = {}  # key: image path, value: reason
+	seconds = {}  # key: image path, value: load + detection + encoding time
+	loaded = []  # (image path, image, face locations)
+	detector = None if crops else _training_detector(detector_backend, detector_params)
+	for img_path, _ in images:
+		start = time.perf_counter()
+		try:
+			# Load image (RGB, as the encoder expects)
+			image = cv2.imread(img_path, cv2.IMREAD_COLOR)
+			if image is None:
+				raise ValueError(f"Cannot read image {img_path}")
+			image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+			if crops:
+				# The face fills the crop: no need to detect it again
+				height, width = image.shape[:2]
+				pad = min(crop_padding, (height - 1) // 2, (width - 1) // 2)
+				face_locations = [(pad, width - pad, height - pad, pad)]
+			else:
+				# Detect face locations
+				face_locations = detector.detect(image)
+			if quality:
+				if len(face_locations) > quality["max_faces"]:
+					rejected[img_path] = "several faces"
+					face_locations = []
+				reasons = [_check_quality(image, location, quality) for location in face_locations]
+				if reasons and all(reasons):
+					rejected[img_path] = reasons[0]
+				face_locations = [location for location, reason in zip(face_locations, reasons) if reason is None]
+			if face_locations:
+				loaded.append((img_path, image, face_locations))
+		except Exception as e:
+			errors[img_path] = str(e)
+		seconds[img_path] = time.perf_counter() - start
+
+	encodings = {}  # key: image path, value: list of encodings
+	start = time.perf_counter()
+	try:
+		# Extract encodings for each detected face of every image at once
+		batch = encode_batch([image for _, image, _ in loaded], [locations for _, _, locations in loaded])
+		for (img_path, _, _), image_encodings in zip(loaded, batch):
+			encodings[img_path] = list(image_encodings)
+	except Exception:
+		# Encode image by image so only the failing image is reported
+		for img_path, image, locations in loaded:
+			try:
+				encodings[img_path] = list(encode_faces(image, locations))
+			except Exception as e:
+				errors[img_path] = str(e)
+	# The batch call is shared by the images that were encoded
+	for img_path, _, _ in loaded:
+		seconds[img_path] += (time.perf_counter() - start) / len(loaded)
+
+	return [(img_path, direction, encodings.get(img_path, []), errors.get(img_path), rejected.get(img_path),
+			 seconds[img_path]) for img_path, direction in images]
+
+
+def train_faces(dataset_dir, output_file='student_encodings.pkl', index='exact', index_params=None,
+				compact_k=None, compact_epsilon=0.0, workers=1, batch_size=16, checkpoint_dir=None,
+				cache_file=None, hash_contents=False, crops=False, crop_padding=0, quality=None,
+				detector_backend="hog", detector_params=None):
 	"""
 	Train the face recognition model by extracting encodings from images.
 
@@ -18,69 +165,332 @@ def train_faces(dataset_dir, output_file='student_encodings.pkl'):
 		dataset_dir (str): Path to the directory containing student image data.
 						   Each subfolder in dataset_dir represents a student's name
 						   and contains that student's face images.
-		output_file (str): Filename to save extracted encodings.
+		output_file (str): Filename to save extracted encodings. A .fgal extension saves
+						   the binary memory-mapped format instead of a pickle.
+		index (str): Matching index saved next to the encodings: "exact" (brute force)
+					 or "ivf" (approximate, for very large rosters).
+		index_params (dict): Extra index parameters, e.g. {"n_lists": 1024, "n_probe": 16}.
+		compact_k (int): If set, reduce each student to at most this many prototype
+						 encodings (split across capture directions). None keeps all.
+		compact_epsilon (float): When compacting, also drop prototypes closer than this.
+		workers (int): Number of worker processes. 1 processes images in this process.
+		batch_size (int): Images sent to a worker at a time.
+		checkpoint_dir (str): Folder for per-student checkpoints, defaults to
+							  "<output_file without extension>.ckpt". A run that is
+							  interrupted resumes from the students already finished.
+							  The folder is removed once the encodings are saved.
+		cache_file (str): Per-image encoding cache, defaults to
+						  "<output_file without extension>.cache.pkl". Only new or
+						  changed images, or images cached with other crops/crop_padding/quality/
+						  detector options, are encoded; pass False to disable the cache.
+		hash_contents (bool): Identify changed images by a content hash instead of
+							  size and modification time (slower, but survives copies).
+		crops (bool): Images are face crops (as saved by face_id.py): skip detection
+					  and use the whole image as the face box.
+		crop_padding (int): Border around the face in the crops (PADD in config.json).
+		quality (bool | dict): Per-image quality gate, off by default so a retrain gives the
+							   same gallery as before. True applies QUALITY_DEFAULTS, a dict
+							   overrides some of them. Rejected images are not cached.
+		detector_backend (str): Face detector of the images (not used for crops), the same
+								interface as the live app, see face_detectors.DETECTORS.
+		detector_params (dict): Parameters of the backend, e.g. from detector_params(config["DETECTOR"]).
+								The default HOG with one upsampling finds the same faces
+								as face_recognition.face_locations.
 	"""
+	quality = {**QUALITY_DEFAULTS, **(quality if isinstance(quality, dict) else {})} if quality else None
+	if checkpoint_dir is None:
+		checkpoint_dir = os.path.splitext(output_file)[0] + ".ckpt"
+	os.makedirs(checkpoint_dir, exist_ok=True)
+	if cache_file is None:
+		cache_file = os.path.splitext(output_file)[0] + ".cache.pkl"
+	cache = _load_cache(cache_file) if cache_file else {}
+	# Part of every image's signature: cached or checkpointed encodings made with other
+	# options (crops mode, padding, quality gate, detector) are encoded again
+	settings = (bool(crops), crop_padding if crops else 0, tuple(sorted(quality.items())) if quality else None,
+				None if crops else (detector_backend, tuple(sorted((detector_params or {}).items()))))
+
 	known_encodings = {}  # key: student name, value: list of encodings
-	n = 0
-	# Iterate through each student's folder
-	for student_name in os.listdir(dataset_dir):
+	known_directions = {}  # key: student name, value: capture direction of each encoding
+
+	# Collect the work: images not finished by a previous run and not in the cache
+	students = {}  # key: student name, value: list of (image path, direction)
+	results = {}  # key: student name, value: {image path: (direction, encodings)}
+	signatures = {}  # key: image path, value: (file signature, encode settings)
+	to_encode = {}  # key: student name, value: list of (image path, direction)
+	failed = set()  # Images that raised an error or were rejected, never cached
+	n_cached = 0
+	for student_name in sorted(os.listdir(dataset_dir)):
 		# Skip non-folder files
 		if "." in student_name:
 			continue
 		student_dir = os.path.join(dataset_dir, student_name)
 		if os.path.isdir(student_dir):
-			n += 1
-			student_encodings = []
-			print(f"{n}. Processing student: {student_name}")
-			count = 0
-			# Iterate through subfolders (if any) or directly images
-			for root, _, files in os.walk(student_dir):
-				for img_file in files:
-					# Only process common image file types
-					if img_file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-						count += 1
-						sys.stdout.write(f"\r  Processed {count} images ({img_file})")
-						sys.stdout.flush()
-						# time.sleep(0.01)  # Simulate processing delay (optional)
-						img_path = os.path.join(root, img_file)
-						try:
-							# Load image
-							image = face_recognition.load_image_file(img_path)
-							# Detect face locations
-							face_locations = face_recognition.face_locations(image, model="hog")
-							# Extract encodings for each detected face
-							for face_location in face_locations:
-								encodings = face_recognition.face_encodings(image, [face_location])[0]
-								if encodings:
-									encoding = encodings[0]
-									student_encodings.append(encoding)
-						except Exception as e:
-							print(f"\n  Error processing image {img_path}: {e}")
-			print() # New line after processing one student
-			# Save the encoding list for this student
-			if student_encodings:
-				known_encodings[student_name] = student_encodings
-			else:
-				print(f"  No face found in folder for {student_name}.")
+			images = _list_student_images(student_dir)
+			students[student_name] = images
+			for img_path, _ in images:
+				signatures[img_path] = (_image_signature(img_path, hash_contents), settings)
+			# Images finished by an interrupted run, unless they changed since
+			checkpoint, checkpoint_failed = _load_checkpoint(checkpoint_dir, student_name, signatures)
+			if checkpoint:
+				print(f"  Resumed {len(checkpoint)}/{len(images)} images of {student_name} from checkpoint")
+			results[student_name] = {}
+			to_encode[student_name] = []
+			for img_path, direction in images:
+				if img_path in checkpoint:
+					results[student_name][img_path] = checkpoint[img_path]
+					if img_path in checkpoint_failed:
+						failed.add(img_path)
+					continue
+				entry = cache.get(img_path)
+				if entry is not None and entry["signature"] == signatures[img_path]:
+					results[student_name][img_path] = (direction, entry["encodings"])
+					n_cached += 1
+				else:
+					to_encode[student_name].append((img_path, direction))
+
+	# Split every student into batches, remembering how many are still pending
+	batches = []
+	pending = {}
+	for student_name, images in to_encode.items():
+		pending[student_name] = 0
+		for i in range(0, len(images), batch_size):
+			batches.append((student_name, images[i:i + batch_size]))
+			pending[student_name] += 1
+	rejections = {}  # key: reason, value: number of images
+	encode_seconds = []  # Time spent on each image
+	total = sum(len(images) for images in to_encode.values())
+	done = 0
+
+	def finish_student(student_name):
+		"""Checkpoint a student once all of its images have results."""
+		images = students[student_name]
+		_save_checkpoint(checkpoint_dir, student_name, results[student_name],
+						 {img_path: signatures[img_path] for img_path, _ in images},
+						 [img_path for img_path, _ in images if img_path in failed])
+
+	def handle(student_name, batch_results):
+		nonlocal done
+		for img_path, direction, image_encodings, error, rejected, seconds in batch_results:
+			if error is not None:
+				print(f"\n  Error processing image {img_path}: {error}")
+				failed.add(img_path)
+			elif rejected is not None:
+				rejections[rejected] = rejections.get(rejected, 0) + 1
+				failed.add(img_path)
+			results[student_name][img_path] = (direction, image_encodings)
+			encode_seconds.append(seconds)
+		done += len(batch_results)
+		sys.stdout.write(f"\r  Processed {done}/{total} images")
+		sys.stdout.flush()
+		pending[student_name] -= 1
+		if pending[student_name] == 0:
+			finish_student(student_name)
+
+	# Students fully served by the cache are finished right away
+	for student_name in [name for name, count in pending.items() if count == 0]:
+		finish_student(student_name)
+
+	if workers > 1:
+		# Stream results back as soon as any worker finishes a batch
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			futures = {executor.submit(_encode_images, images, crops, crop_padding, quality,
+									   detector_backend, detector_params): student_name
+					   for student_name, images in batches}
+			for future in as_completed(futures):
+				handle(futures[future], future.result())
+	else:
+		for student_name, images in batches:
+			handle(student_name, _encode_images(images, crops, crop_padding, quality, detector_backend, detector_params))
+	print() # New line after processing
+	if encode_seconds:
+		print(f"  {1000 * np.mean(encode_seconds):.1f} ms per image "
+			  f"(p95 {1000 * np.percentile(encode_seconds, 95):.1f} ms, {'crops' if crops else 'detection'} mode)")
+	n_rejected = sum(rejections.values())
+	if n_rejected:
+		print(f"  Rejected {n_rejected}/{total} images: "
+			  + ", ".join(f"{count} {reason}" for reason, count in sorted(rejections.items())))
+
+	# Gather every student's encodings in image order
+	for n, (student_name, images) in enumerate(students.items(), start=1):
+		student_encodings = []
+		student_directions = []
+		for img_path, _ in images:
+			direction, image_encodings = results[student_name][img_path]
+			student_encodings.extend(image_encodings)
+			student_directions.extend([direction] * len(image_encodings))
+		print(f"{n}. {student_name}: {len(student_encodings)} encodings from {len(images)} images")
+		# Save the encoding list for this student
+		if student_encodings:
+			known_encodings[student_name] = student_encodings
+			known_directions[student_name] = student_directions
+		else:
+			print(f"  No face found in folder for {student_name}.")
+
+	if cache_file:
+		# The new cache holds exactly the current images, deleted ones drop out
+		new_cache = {}
+		for student_name, images in students.items():
+			for img_path, _ in images:
+				if img_path not in failed:
+					new_cache[img_path] = {"signature": signatures[img_path],
+										   "encodings": results[student_name][img_path][1]}
+		n_removed = len(set(cache) - set(new_cache))
+		_save_cache(cache_file, new_cache)
+		print(f"Cache: {n_cached} cached, {total} recomputed, {n_removed} removed ({cache_file})")
+
+	# Optional compaction: keep a few prototypes per student instead of every frame
+	if compact_k:
+		report = compaction_report(known_encodings, known_directions, compact_k, compact_epsilon)
+		print(f"Compaction check on a {report['test_size']}-encoding held-out split: "
+			  f"accuracy {report['accuracy_before']:.3f} -> {report['accuracy_after']:.3f}")
+		before = sum(len(encodings) for encodings in known_encodings.values())
+		known_encodings = {name: compact_student(encodings, known_directions[name], compact_k, compact_epsilon)
+						   for name, encodings in known_encodings.items()}
+		after = sum(len(encodings) for encodings in known_encodings.values())
+		# Encodings are pickled as float64 arrays: 128 * 8 bytes each
+		print(f"Compacted {before} -> {after} encodings, "
+			  f"saved {(before - after) * 128 * 8 / 1024 ** 2:.1f} MB")
 
 	# Save data to file
-	with open(output_file, 'wb') as f:
-		pickle.dump(known_encodings, f)
+	gallery = FaceGallery.from_encodings(known_encodings)
+	if output_file.endswith(GALLERY_EXTENSION):
+		gallery.save(output_file)
+	else:
+		# Replaced atomically: a running AttendanceGUI reloads it as soon as it changes
+		_atomic_pickle(output_file, known_encodings)
 	print(f"Encodings saved to {output_file}")
 
+	# Build the matching index over the same packed gallery AttendanceGUI will load
+	if len(gallery) > 0:
+		start = time.time()
+		face_index = build_index(index, gallery.matrix, **(index_params or {}))
+		face_index.save(index_path(output_file))
+		print(f"{index} index built in {time.time() - start:.1f}s and saved to {index_path(output_file)}")
+
+	# Students enrolled live by face_id.py are now part of the gallery itself
+	if os.path.exists(delta_path(output_file)):
+		delta = update_delta(output_file, remove=students)
+		print(f"Enrollment delta: {len(delta)} student(s) not in {dataset_dir} kept in {delta_path(output_file)}")
+
+	# Training finished, checkpoints are no longer needed
+	shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def _checkpoint_file(checkpoint_dir, student_name):
+	return os.path.join(checkpoint_dir, f"{student_name}.pkl")
+
+
+def _save_checkpoint(checkpoint_dir, student_name, image_results, signatures, failed):
+	"""
+	Save one finished student, with the signature of every image and the images that
+	failed or were rejected (so a resumed run never caches them). Written to a temp
+	file first so a crash never leaves half a file.
+	"""
+	_atomic_pickle(_checkpoint_file(checkpoint_dir, student_name),
+				   {"results": image_results, "signatures": signatures, "failed": list(failed)})
+
+
+def _load_checkpoint(checkpoint_dir, student_name, signatures):
+	"""
+	Load a finished student from a previous run.
+
+	Args:
+		signatures (dict): {image path: current signature} (file signature, see
+						   _image_signature, and encode settings).
+
+	Returns:
+		tuple[dict, set]: ({image path: (direction, encodings)}, failed image paths) for
+		the images whose signature did not change; empty if there is no checkpoint.
+	"""
+	path = _checkpoint_file(checkpoint_dir, student_name)
+	if not os.path.exists(path):
+		return {}, set()
+	with open(path, 'rb') as f:
+		checkpoint = pickle.load(f)
+	saved = checkpoint.get("signatures", {})  # Checkpoints of older versions have none: nothing is resumed
+	results = {img_path: result for img_path, result in checkpoint["results"].items()
+			   if img_path in signatures and saved.get(img_path) == signatures[img_path]}
+	return results, set(checkpoint.get("failed", ())) & set(results)
+
+
+def _image_signature(img_path, hash_contents=False):
+	"""Identify the content of an image file: (size, mtime) or (size, sha1 digest)."""
+	stat = os.stat(img_path)
+	if hash_contents:
+		with open(img_path, 'rb') as f:
+			return (stat.st_size, hashlib.sha1(f.read()).hexdigest())
+	return (stat.st_size, stat.st_mtime_ns)
+
+
+def _load_cache(cache_file):
+	"""Load the per-image encoding cache: {image path: {"signature", "encodings"}}."""
+	if not os.path.exists(cache_file):
+		return {}
+	with open(cache_file, 'rb') as f:
+		return pickle.load(f)
+
+
+def _save_cache(cache_file, cache):
+	_atomic_pickle(cache_file, cache)
+
+
+def _atomic_pickle(path, data):
+	"""Pickle to a temp file and rename it, so readers never see a partial file."""
+	with open(path + ".tmp", 'wb') as f:
+		pickle.dump(data, f)
+	os.replace(path + ".tmp", path)
+
 
 class AttendanceGUI:
 	"""
 	GUI class for the face recognition attendance system.
 	Displays webcam video, detected ID, and attendance list.
 	"""
-	def __init__(self, master, encodings_file='student_encodings.pkl'):
+	def __init__(self, master, encodings_file='student_encodings.pkl', n_probe=None, workers=2,
+				 tracking=False, detect_every=5, vote_window=10, vote_quorum=10, vote_weighted=False,
+				 vote_min_confidence=0.0, camera=0, adaptive=False, door_zone=None, detect_budget_ms=None,
+				 full_scan_every=10, detector_backend="hog", detector_params=None, display_fps=30,
+				 metrics_config=None, journal_file=None, session=None, recheck_cooldown=300.0,
+				 lazy_startup=True, warm_models=True):
 		"""
 		Initialize the user interface.
 
 		Args:
 			master (tk.Tk): Tkinter root window object.
 			encodings_file (str): Path to the file containing known face encodings.
+			n_probe (int): Cells visited per face by an approximate (ivf) index.
+						   Higher is more accurate but slower. None keeps the trained value.
+			workers (int): Number of recognition worker threads (detection + encoding).
+			tracking (bool): Run full detection only every `detect_every` frames and follow
+							 faces with a correlation tracker in between (one worker thread,
+							 since tracks depend on the previous frame).
+			detect_every (int): Frames between full detections in tracking mode.
+			vote_window (int): Recent encodings kept per face for the identity vote.
+			vote_quorum (int): Encodings matching one student in the window needed to check them in
+							   (in tracking mode a face is encoded once per detection).
+			vote_weighted (bool): Weight each match by how close it is (1 - distance / 0.6).
+			vote_min_confidence (float): Minimum weighted share of the window for a check-in.
+			camera (int | str): Camera index or stream URL (CAM_ID in config.json).
+			adaptive (bool): Detect only around recent faces and the door zone, at a scale picked
+							 from the face sizes, with a full-frame scan every `full_scan_every` detections.
+			door_zone (tuple): (left, top, right, bottom) frame fractions where people come in.
+			detect_budget_ms (float): Latency budget of one detection in adaptive mode.
+			full_scan_every (int): Detections between full-frame scans in adaptive mode.
+			detector_backend (str): Face detector ("hog", "haar", "ssd" or "yunet").
+			detector_params (dict): Parameters of the detector backend.
+			display_fps (float): Maximum frames drawn per second, independent of recognition.
+			metrics_config (dict): "METRICS" section of config.json: stage timers, overlay,
+								   Prometheus export and profiling (see face_metrics).
+			journal_file (str): SQLite journal every check-in is appended to, None to keep attendance
+								in memory only. Attendance already in the journal is restored at startup.
+			session (str): Session id of the journal events, None for today's date.
+			recheck_cooldown (float): Seconds a checked-in student must be out of view before
+									  seeing them again is journaled as a new check-in.
+			lazy_startup (bool): Show the window and the camera preview at once and load the gallery,
+								 detector and face models on a background thread (with a progress bar).
+								 False loads everything before the window appears.
+			warm_models (bool): Encode a blank face once after loading, so the first real
+								recognition does not pay for the first call.
 		"""
 		self.master = master
 		self.master.title("Face Attendance System")
@@ -88,34 +498,152 @@ class AttendanceGUI:
 		self.master.resizable(True, True) # Allow resizing
 
 		self.encodings_file = encodings_file
-		self.known_encodings = self._load_encodings()
+		self.n_probe = n_probe
+		# Packed matrix of all encodings and the recognition engine, set by the
+		# startup loader (see _poll_startup); the preview runs without them until then
+		self.gallery = FaceGallery.from_encodings({})
+		self.engine = None
+		self.gallery_manager = None
+		self.ready = False
+		self.startup_time = time.perf_counter()
+		self.first_frame_seconds = None
+		self.first_recognition_seconds = None
 
 		# Dictionary to store attendance status: {student_ID: True/False}
-		self.attendance_status = {name: False for name in self.known_encodings.keys()}
+		self.attendance_status = {}
 		self.last_detected_time = {} # To prevent too frequent updates
-
-		self.detect_name_buffer = []
-		self.detect_buffer_size = 10
-		self.last_confirmed_name = None
+		self.recheck_cooldown = recheck_cooldown
+
+		# Append-only log written by a background thread; restarting the app
+		# (or a crash) keeps the attendance taken so far in this session
+		self.journal = None
+		if journal_file:
+			self.journal = AttendanceJournal(journal_file, session=session)
+			for name, (first, last) in self.journal.replay().items():
+				self.attendance_status[name] = True
+				self.last_detected_time[name] = last
+
+		# Stage timers and counters, a no-op unless enabled in the config
+		self.metrics, self.metrics_exporter, self.profiler = metrics_from_config(metrics_config)
+		self.show_overlay = self.metrics.enabled and (metrics_config or {}).get("OVERLAY", True)
+		self.overlay_lines = []
+
+		# Recognition engine: every face is followed across frames and votes on
+		# its own identity, so several students can be confirmed in parallel
+		engine_options = dict(tracking=tracking, detect_every=detect_every,
+							  vote_window=vote_window, vote_quorum=vote_quorum,
+							  vote_weighted=vote_weighted, vote_min_confidence=vote_min_confidence,
+							  adaptive=adaptive, door_zone=door_zone, detect_budget_ms=detect_budget_ms,
+							  full_scan_every=full_scan_every, detector_backend=detector_backend,
+							  detector_params=detector_params, metrics=self.metrics)
+		self.loader = BackgroundLoader([
+			("gallery", "Reading gallery...", lambda results: self._read_gallery()),
+			("engine", "Loading face detector...",
+			 lambda results: AttendanceEngine(self.gallery if results["gallery"] is None else results["gallery"],
+											  **engine_options)),
+			("models", "Loading face models..." if not warm_models else "Loading and warming up face models...",
+			 lambda results: warm_up() if warm_models else (face_encoder(), pose_predictor_5_point())),
+		])
+		if not lazy_startup:
+			self.loader.run() # Everything loaded before the window, picked up by the first _update_frame
+		if tracking:
+			workers = 1 # Correlation tracks depend on the previous frame
 
 		# Initialize camera
-		self.video_capture = cv2.VideoCapture(0)
+		self.video_capture = cv2.VideoCapture(camera)
 		if not self.video_capture.isOpened():
 			messagebox.showerror("Camera Error", "Cannot access webcam. Please check your device.")
+			if self.journal is not None:
+				self.journal.close()
 			self.master.destroy()
 			return
 
 		self._create_widgets()
+		if lazy_startup:
+			self.loader.start()
+
+		# Capture thread -> recognition workers -> GUI, so a slow frame never freezes the UI
+		self.grabber = LatestFrameGrabber(self.video_capture).start()
+		self.pipeline = RecognitionPipeline(self.grabber, self._recognize, workers=workers).start()
+		self.display_fps = RateMeter()
+		self.renderer = FrameRenderer(self.video_frame, max_fps=display_fps)
+		self.pending_frame = None  # Newest recognized frame not drawn yet
+		self.next_stats_update = 0.0
+		self.last_result_seq = 0
+		if self.metrics_exporter is not None:
+			self.metrics_exporter.start()
+		if self.profiler is not None:
+			# One window at startup, F9 records another
+			self.profiler.start(self.master)
+			self.master.bind("<F9>", lambda event: self.profiler.start(self.master))
 		self._update_frame()
 
-	def _load_encodings(self):
-		"""Load saved face encodings from file."""
-		if not os.path.exists(self.encodings_file):
+	def _read_gallery(self):
+		"""
+		Load the gallery of known faces (see attendance_engine.load_gallery_file).
+		Runs on the startup loader thread, so a missing file returns None and is
+		reported by _poll_startup.
+
+		A binary .fgal file is memory-mapped (near-instant, shared between processes);
+		any other file is treated as the pickle written by train_faces. Students
+		enrolled since training (the delta file) are merged in and matched exactly.
+		"""
+		try:
+			return load_gallery_file(self.encodings_file, self.n_probe)
+		except FileNotFoundError:
+			return None
+
+	def _poll_startup(self):
+		"""Show the loading progress, and start recognizing once the startup loader is done."""
+		results = self.loader.take()
+		if results is None:
+			fraction, message = self.loader.progress()
+			update_label(self.loading_bar, value=fraction * 100)
+			update_label(self.loading_label, text=message)
+			return
+		self.ready = True
+		self.loading_frame.grid_remove()
+		self.metrics.gauge("startup_ready_seconds", round(time.perf_counter() - self.startup_time, 3))
+		if self.loader.error:
+			messagebox.showerror("Startup Error", f"Cannot load the face models:\n{self.loader.error}")
+			return
+		gallery = results["gallery"]
+		if gallery is None:
 			messagebox.showerror("Data Error", f"Encoding file not found: {self.encodings_file}\n"
 											   "Please run the training function first.")
-			return {}
-		with open(self.encodings_file, 'rb') as f:
-			return pickle.load(f)
+			gallery = self.gallery
+		self.engine = results["engine"]
+		self._swap_gallery(gallery)
+
+		# New versions written by train_faces or face_id.py are loaded in the background
+		# and swapped in between two frames, so the app never restarts
+		self.gallery_manager = GalleryManager(
+			lambda: load_gallery_file(self.encodings_file, self.n_probe),
+			[self.encodings_file, index_path(self.encodings_file), delta_path(self.encodings_file)]).start()
+
+	def _recognize(self, frame):
+		"""Runs on the pipeline threads. Until the engine is loaded frames are only previewed."""
+		engine = self.engine
+		return engine.recognize(frame) if engine is not None else []
+
+	def _swap_gallery(self, gallery):
+		"""
+		Switch to a reloaded gallery between two frames.
+
+		Workers read engine.gallery once per frame, so a frame is matched entirely
+		against one version. Attendance already taken is kept, and students
+		removed from the gallery stay on the list if they were checked in.
+		"""
+		added, removed = roster_diff(self.gallery.names, gallery.names)
+		self.gallery = gallery
+		self.engine.gallery = gallery
+		for name in added:
+			self.attendance_status.setdefault(name, False)
+			self.roster_view.add(name, self.attendance_status[name])
+		for name in removed:
+			if not self.attendance_status.get(name):
+				self.attendance_status.pop(name, None)
+				self.roster_view.remove(name)
 
 	def _create_widgets(self):
 		"""Create and arrange UI widgets."""
@@ -132,6 +660,18 @@ class AttendanceGUI:
 									 anchor="center", font=("Arial", 16))
 		self.video_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
+		# Pipeline status under the video: per-stage FPS and queue depth
+		self.pipeline_label = ttk.Label(self.main_frame, text="", font=("Consolas", 9), foreground="gray")
+		self.pipeline_label.grid(row=1, column=0, sticky="w", padx=5)
+
+		# Startup progress under the video, removed once the models are loaded
+		self.loading_frame = ttk.Frame(self.main_frame)
+		self.loading_frame.grid(row=2, column=0, sticky="w", padx=5, pady=(5, 0))
+		self.loading_bar = ttk.Progressbar(self.loading_frame, mode="determinate", maximum=100, length=200)
+		self.loading_bar.pack(side="left")
+		self.loading_label = ttk.Label(self.loading_frame, text="Starting...", foreground="gray")
+		self.loading_label.pack(side="left", padx=(10, 0))
+
 		# Right frame: contains Detected ID and Attendance List
 		self.right_frame = ttk.Frame(self.main_frame)
 		self.right_frame.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
@@ -150,163 +690,169 @@ class AttendanceGUI:
 		self.attendance_list_frame = ttk.LabelFrame(self.right_frame, text="Attendance List", padding="10")
 		self.attendance_list_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
 
-		# Use Canvas and Scrollbar for long lists
-		self.canvas_attendance = tk.Canvas(self.attendance_list_frame, background="#f0f0f0")
-		self.scrollbar_attendance = ttk.Scrollbar(self.attendance_list_frame, orient="vertical", command=self.canvas_attendance.yview)
-		self.scrollable_frame = ttk.Frame(self.canvas_attendance)
-
-		self.scrollable_frame.bind(
-			"<Configure>",
-			lambda e: self.canvas_attendance.configure(
-				scrollregion=self.canvas_attendance.bbox("all")
-			)
-		)
-
-		self.canvas_attendance.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-		self.canvas_attendance.configure(yscrollcommand=self.scrollbar_attendance.set)
-
-		self.canvas_attendance.pack(side="left", fill="both", expand=True)
-		self.scrollbar_attendance.pack(side="right", fill="y")
-
-		self.student_labels = {} # Store Labels for each student
-		self._populate_attendance_list()
-
-	def _populate_attendance_list(self):
-		"""Fill the attendance list on the interface."""
-		for i, name in enumerate(sorted(self.known_encodings.keys())):
-			status_text = "Not Checked In"
-			color = "red"
-			if self.attendance_status[name]:
-				status_text = "Checked In"
-				color = "green"
-
-			label_text = f"• {name}: {status_text}"
-			student_label = ttk.Label(self.scrollable_frame, text=label_text,
-									  font=("Arial", 12), foreground=color)
-			student_label.grid(row=i, column=0, sticky="w", padx=5, pady=2)
-			self.student_labels[name] = student_label
+		# Only the rows in view are drawn, so thousands of students cost the same as a few.
+		# attendance_status also holds students restored from the journal who left the gallery
+		self.roster_view = RosterView(self.attendance_list_frame, self.attendance_status)
+		self.roster_view.pack(fill="both", expand=True)
 
 	def _update_attendance_list(self, detected_name):
 		"""Update attendance status on the GUI."""
-		if detected_name != "Unknown" and not self.attendance_status[detected_name]:
+		# A name confirmed against a gallery swapped out since is no longer on the list
+		if detected_name in self.attendance_status and not self.attendance_status[detected_name]:
 			self.attendance_status[detected_name] = True
-			# Update that student's label
-			if detected_name in self.student_labels:
-				self.student_labels[detected_name].config(text=f"✓ {detected_name}: Checked In", foreground="green")
+			# Moves that student to the checked-in rows, redrawn at the next idle time
+			self.roster_view.set_status(detected_name, True)
+
+	def _check_in(self, name, current_time):
+		"""
+		Record a confirmed student. The first confirmation, and the first one after
+		`recheck_cooldown` seconds out of view, are appended to the journal.
+		Names removed from the gallery by a reload (a result still in flight) are ignored.
+		"""
+		if name not in self.attendance_status:
+			return
+		last = self.last_detected_time.get(name)
+		if self.journal is not None and (last is None or current_time - last >= self.recheck_cooldown):
+			self.journal.record(name, current_time)
+		self.last_detected_time[name] = current_time
+		if not self.attendance_status.get(name):
+			self._update_attendance_list(name)
+
+	def _apply_results(self, frame, faces):
+		"""
+		Check in confirmed faces and draw every face on the frame.
+		Runs on the Tk thread, in frame order.
+		"""
+		current_time = time.time()
+		confirmed_names = []
+
+		# For each detected face
+		for (top, right, bottom, left), match_name, min_distance, track_id, confirmed_name in faces:
+			# Checking in from the track's confirmed name (not a one-frame event)
+			# keeps check-ins safe when a result is dropped from the queue.
+			if confirmed_name is not None:
+				self._check_in(confirmed_name, current_time)
+				confirmed_names.append(confirmed_name)
+			detected_name = confirmed_name or "Unknown"
+
+			# Draw rectangle and name on frame
+			color = (0, 0, 255) if detected_name == "Unknown" else (0, 255, 0) # Red for Unknown, Green for Known
+			cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+			text_y = top - 10 if top - 10 > 10 else top + 20
+			cv2.putText(frame, detected_name, (left + 6, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+
+
+		# Update Detected ID label on GUI (only redrawn when the text or color changes)
+		# Show every confirmed student in view
+		if faces: # If faces detected
+			if not confirmed_names:
+				update_label(self.detected_id_label, text="Unknown", foreground="red")
+			else:
+				update_label(self.detected_id_label, text=", ".join(confirmed_names), foreground="green")
+		else: # No face
+			update_label(self.detected_id_label, text="Waiting...", foreground="blue")
 
 	def _update_frame(self):
 		"""
-		Update webcam frame and perform face recognition.
+		Show the newest recognized frame. Recognition itself runs on the pipeline threads.
 		This function is called repeatedly.
 		"""
-		ret, frame = self.video_capture.read()
-		if ret:
-			# Reduce frame size to INCREASE FACE DETECTION SPEED
-			# Detect only on smaller image
-			small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-			rgb_small_frame = small_frame[:, :, ::-1] # Convert BGR to RGB
-
-			# Detect face locations in the small frame
-			face_locations_scaled = face_recognition.face_locations(rgb_small_frame, model="hog")
-			
-			detected_name = "Unknown" # Default to Unknown
-			current_time = time.time()
-
-			# For each detected face in the small frame
-			for (top_s, right_s, bottom_s, left_s) in face_locations_scaled:
-				# Scale back coordinates to ORIGINAL image size (×4 since reduced to 0.25)
-				top = top_s * 4
-				right = right_s * 4
-				bottom = bottom_s * 4
-				left = left_s * 4
-
-				face_encoding = None
-				try:
-					# IMPORTANT:
-					# Extract encoding from ORIGINAL frame using rescaled coordinates
-					face_encoding = face_recognition.face_encodings(frame, [(top, right, bottom, left)])[0]
-				except Exception as e:
-					print(f"Error extracting face encoding: {type(e).__name__}: {e}")
-					# If error, skip this face or mark as Unknown
-					face_encoding = None # Ensure None for skipping
-
-				if face_encoding is not None:
-					min_distances = []
-					for name, encodings in self.known_encodings.items():
-						if encodings:
-							# Compute distance from current encoding to all encodings of this student
-							distances = face_recognition.face_distance(encodings, face_encoding)
-							min_distance = min(distances) if distances.size > 0 else float('inf')
-							min_distances.append((min_distance, name))
-						else:
-							min_distances.append((float('inf'), name))
-
-					# Find the student with smallest distance
-					if min_distances:
-						min_distance, match_name = min(min_distances)
-						if min_distance < 0.6:
-							self.detect_name_buffer.append(match_name)
-							if len(self.detect_name_buffer) > self.detect_buffer_size:
-								self.detect_name_buffer.pop(0)
-
-							# Check if all recent frames are the same name
-							if len(self.detect_name_buffer) >= self.detect_buffer_size and \
-							all(name == match_name for name in self.detect_name_buffer):
-								self.detect_name_buffer = []
-								detected_name = match_name
-								if self.last_confirmed_name != detected_name:  # Prevent repeated check-ins
-									self._update_attendance_list(detected_name)
-									self.last_detected_time[detected_name] = current_time
-									self.last_confirmed_name = detected_name
-						else:
-							self.detect_name_buffer.append("Unknown")
-							if len(self.detect_name_buffer) > self.detect_buffer_size:
-								self.detect_name_buffer.pop(0)
-							detected_name = "Unknown"
-					else:
-						detected_name = "Unknown"
-				else:
-					detected_name = "Unknown" # If failed to extract encoding
-
-				# Draw rectangle and name on frame
-				color = (0, 0, 255) if detected_name == "Unknown" else (0, 255, 0) # Red for Unknown, Green for Known
-				cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-				text_y = top - 10 if top - 10 > 10 else top + 20
-				cv2.putText(frame, detected_name, (left + 6, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-
+		if not self.ready:
+			self._poll_startup()
+		elif self.gallery_manager is not None:
+			gallery = self.gallery_manager.take()
+			if gallery is not None:
+				self._swap_gallery(gallery)
+
+		results = self.pipeline.poll()
+		# Results can finish out of order with several workers: drop stale ones
+		results = [item for item in results if item[0] > self.last_result_seq]
+		if results:
+			# Every fresh result still feeds the vote, only the newest is rendered
+			with self.metrics.timer("apply"):
+				for seq, frame, faces in results:
+					self._apply_results(frame, faces)
+					if self.first_recognition_seconds is None and any(face[1] is not None for face in faces):
+						self.first_recognition_seconds = time.perf_counter() - self.startup_time
+						self.metrics.gauge("startup_first_recognition_seconds", round(self.first_recognition_seconds, 3))
+			self.last_result_seq = seq
+			self.pending_frame = frame
+		# Drawing is capped at display_fps, a frame replaced before its turn is never drawn
+		if self.pending_frame is not None and self.renderer.due():
+			if self.show_overlay:
+				draw_overlay(self.pending_frame, self.overlay_lines)
+			with self.metrics.timer("render"):
+				self.renderer.render(self.pending_frame)
+			self.pending_frame = None
+			self.display_fps.tick()
+			if self.first_frame_seconds is None:
+				self.first_frame_seconds = time.perf_counter() - self.startup_time
+				self.metrics.gauge("startup_first_frame_seconds", round(self.first_frame_seconds, 3))
+
+		if time.time() >= self.next_stats_update:
+			self.next_stats_update = time.time() + 0.5
+			self._update_stats()
 
-			# Update Detected ID label on GUI
-			# Optionally display "Multiple" if multiple known faces and none Unknown
-			if face_locations_scaled: # If faces detected
-				if detected_name == "Unknown":
-					self.detected_id_label.config(text="Unknown", foreground="red")
-				else:
-					self.detected_id_label.config(text=detected_name, foreground="green")
-			else: # No face
-				 self.detected_id_label.config(text="Waiting...", foreground="blue")
-
-
-			# Convert OpenCV frame to Tkinter-compatible format
-			img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-			img_width, img_height = img.size
-			frame_width = self.video_frame.winfo_width()
-			frame_height = self.video_frame.winfo_height()
-
-			if frame_width > 1 and frame_height > 1:
-				ratio = min(frame_width / img_width, frame_height / img_height)
-				new_width = int(img_width * ratio)
-				new_height = int(img_height * ratio)
-				img = img.resize((new_width, new_height), Image.LANCZOS)
+		self.master.after(10, self._update_frame)
 
-			self.photo = ImageTk.PhotoImage(image=img)
-			self.video_frame.config(image=self.photo)
-			self.video_frame.image = self.photo
+	def _update_stats(self):
+		"""Per-stage rates and counters under the video, refreshed twice per second."""
+		stats = self.pipeline.stats()
+		engine = ""
+		if self.engine is not None:
+			tracker = self.engine.face_tracker
+			engine = f" | {tracker.detections} detections, {tracker.encodings} encodings in {tracker.frame_count} frames"
+			if self.engine.detector is not None:
+				detector_stats = self.engine.detector.stats()
+				engine += (f" | Detect x{detector_stats['scale']:.2f} on {detector_stats['scanned_fraction']:.0%} of frame, "
+						   f"{detector_stats['detect_ms']:.1f} ms ({detector_stats['saved_ms']:+.1f} ms saved)")
+		gallery = f" | Gallery {len(self.gallery.names)} students"
+		if self.gallery_manager is not None:
+			gallery += f", {self.gallery_manager.reloads} reloads" + (
+				f" ({self.gallery_manager.errors} failed: {self.gallery_manager.last_error})"
+				if self.gallery_manager.errors else "")
+		startup = ""
+		if self.first_frame_seconds is not None:
+			startup = f" | Startup: first frame {self.first_frame_seconds:.2f}s"
+			if self.loader.seconds is not None:
+				startup += f", models {self.loader.seconds:.2f}s"
+			if self.first_recognition_seconds is not None:
+				startup += f", first recognition {self.first_recognition_seconds:.2f}s"
+		update_label(self.pipeline_label, text=(
+			f"Capture {stats['capture_fps']:.1f} fps ({stats['capture_dropped']} skipped) | "
+			f"Recognition {stats['process_fps']:.1f} fps, busy {stats['workers_busy']}/{stats['workers']} | "
+			f"Results queue {stats['results_queued']} ({stats['results_dropped']} dropped) | "
+			f"Display {self.display_fps.rate():.1f} fps, {self.renderer.render_ms:.1f} ms"
+			f"{engine}{gallery}{startup}"
+			+ (f" | Journal {self.journal.written} saved, {self.journal.pending()} pending"
+			   + (f" ({self.journal.errors} failed: {self.journal.last_error})" if self.journal.errors else "")
+			   if self.journal is not None else "")
+			+ (f" | Profiling ({self.profiler.mode})..." if self.profiler is not None and self.profiler.running
+			   else f" | Profile saved to {self.profiler.output}" if self.profiler is not None and self.profiler.output
+			   else "")))
+		if self.metrics.enabled:
+			self.metrics.gauge("frame_drops", stats["capture_dropped"] + stats["results_dropped"])
+			self.metrics.gauge("capture_fps", round(stats["capture_fps"], 2))
+			self.metrics.gauge("process_fps", round(stats["process_fps"], 2))
+			self.metrics.gauge("display_fps", round(self.display_fps.rate(), 2))
+			self.metrics.gauge("workers_busy", stats["workers_busy"])
+			self.metrics.gauge("gallery_encodings", len(self.gallery))
+			if self.journal is not None:
+				self.metrics.gauge("journal_pending", self.journal.pending())
+			if self.show_overlay:
+				self.overlay_lines = self.metrics.overlay_lines()
 
-		self.master.after(10, self._update_frame)
-		
 	def on_closing(self):
 		"""Handle window closing event."""
 		if messagebox.askokcancel("Exit", "Do you want to exit the application?"):
+			self.pipeline.stop()
+			self.grabber.stop()
+			if self.gallery_manager is not None:
+				self.gallery_manager.stop()
+			if self.journal is not None:
+				self.journal.close() # Commits the check-ins still queued
+			if self.metrics_exporter is not None:
+				self.metrics_exporter.stop()
 			self.video_capture.release()
 			cv2.destroyAllWindows()
 			self.master.destroy()
@@ -316,12 +862,32 @@ if __name__ == "__main__":
 	dataset_dir = r'D:\Documents\Learning\FPT\SU25\CPV\excersice\Project\Code\CPV\AI1901_face_dataset'
 	output_encodings_file = 'student_encodings.pkl'
 
+	with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"), 'r') as js:
+		config = json.load(js)
+	# Training and recognition use the same detector ("DETECTOR" section)
+	detector_backend, detector_options = detector_params(config["DETECTOR"])
+
 	# Step 1: Train the model (only once or when new data is added)
 	# Uncomment the line below to run training
-	# train_faces(dataset_dir, output_encodings_file)
+	# (use workers=os.cpu_count() to encode images in parallel, crops=True, crop_padding=20
+	#  for folders written by face_id.py to skip face detection, and quality=True to drop
+	#  small, blurry, badly lit or multi-face images)
+	# train_faces(dataset_dir, output_encodings_file, detector_backend=detector_backend, detector_params=detector_options)
 
 	# Step 2: Run the attendance GUI
+	# For several doors on one machine run attendance_server.py with one source per camera
+	cfg = config["ATTENDANCE"]
 	root = tk.Tk()
-	app = AttendanceGUI(root, encodings_file=output_encodings_file)
+	app = AttendanceGUI(root, encodings_file=output_encodings_file, camera=config["CAM_ID"],
+						workers=cfg["WORKERS"], tracking=cfg["TRACKING"], detect_every=cfg["DETECT_EVERY"],
+						vote_window=cfg["VOTE_WINDOW"], vote_quorum=cfg["VOTE_QUORUM"],
+						vote_weighted=cfg["VOTE_WEIGHTED"], vote_min_confidence=cfg["VOTE_MIN_CONFIDENCE"],
+						adaptive=cfg["ADAPTIVE_DETECTION"], door_zone=cfg["DOOR_ZONE"],
+						detect_budget_ms=cfg["DETECT_BUDGET_MS"], full_scan_every=cfg["FULL_SCAN_EVERY"],
+						detector_backend=detector_backend, detector_params=detector_options,
+						display_fps=cfg["DISPLAY_FPS"], metrics_config=config["METRICS"],
+						journal_file=cfg["JOURNAL"], session=cfg["SESSION"],
+						recheck_cooldown=cfg["RECHECK_COOLDOWN"], lazy_startup=cfg["LAZY_STARTUP"],
+						warm_models=cfg["WARM_UP"])
 	root.protocol("WM_DELETE_WINDOW", app.on_closing) # Handle window close event
 	root.mainloop()
@@ -0,0 +1,173 @@
+"""
+Face detector backends shared by the attendance app and the dataset collector.
+
+Every backend takes an RGB image and returns (top, right, bottom, left) boxes,
+the same format as face_recognition.face_locations. Pick one with the
+"DETECTOR" section of config.json:
+
+	"DETECTOR" : {"BACKEND" : "yunet", "YUNET" : {"MODEL" : "face_detection_yunet_2023mar.onnx"}}
+
+The DNN backends need their model files next to config.json:
+	ssd:   deploy.prototxt and res10_300x300_ssd_iter_140000.caffemodel (OpenCV face_detector sample)
+	yunet: face_detection_yunet_2023mar.onnx (OpenCV Zoo, needs OpenCV >= 4.8)
+"""
+import inspect
+import os
+import threading
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _clip(top, right, bottom, left, height, width):
+	return max(0, int(top)), min(width, int(right)), min(height, int(bottom)), max(0, int(left))
+
+
+class HogDetector:
+	"""dlib HOG + linear SVM, the detector used by face_recognition (model="hog")."""
+	kind = "hog"
+
+	def __init__(self, upsample=1):
+		"""
+		Args:
+			upsample (int): Times the image is upsampled first; finds faces half as small each time.
+		"""
+		import dlib
+		self.upsample = upsample
+		self.detector = dlib.get_frontal_face_detector()
+
+	def detect(self, image):
+		height, width = image.shape[:2]
+		return [_clip(rect.top(), rect.right(), rect.bottom(), rect.left(), height, width)
+				for rect in self.detector(image, self.upsample)]
+
+
+class HaarDetector:
+	"""OpenCV Haar cascade. Fastest, but misses turned faces and has more false positives."""
+	kind = "haar"
+
+	def __init__(self, scale_factor=1.1, min_neighbors=5, min_size=30,
+				 cascade="haarcascade_frontalface_default.xml"):
+		"""
+		Args:
+			scale_factor (float): Image pyramid step.
+			min_neighbors (int): Overlapping hits needed to keep a face.
+			min_size (int): Smallest face in pixels.
+			cascade (str): Cascade file, looked up in OpenCV's data folder.
+		"""
+		path = cascade if os.path.exists(cascade) else os.path.join(cv2.data.haarcascades, cascade)
+		self.classifier = cv2.CascadeClassifier(path)
+		if self.classifier.empty():
+			raise FileNotFoundError(f"Haar cascade not found: {cascade}")
+		self.scale_factor = scale_factor
+		self.min_neighbors = min_neighbors
+		self.min_size = (min_size, min_size)
+		self.lock = threading.Lock()
+
+	def detect(self, image):
+		gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+		with self.lock:
+			boxes = self.classifier.detectMultiScale(gray, self.scale_factor, self.min_neighbors,
+													 minSize=self.min_size)
+		return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in boxes]
+
+
+class SsdDetector:
+	"""OpenCV DNN res10 SSD (Caffe). Robust to pose and scale, runs on a fixed 300x300 input."""
+	kind = "ssd"
+
+	def __init__(self, prototxt="deploy.prototxt", model="res10_300x300_ssd_iter_140000.caffemodel",
+				 confidence=0.6):
+		"""
+		Args:
+			prototxt, model (str): Network files, relative to the project folder.
+			confidence (float): Minimum detection score.
+		"""
+		prototxt, model = _model_path(prototxt), _model_path(model)
+		self.net = cv2.dnn.readNetFromCaffe(prototxt, model)
+		self.confidence = confidence
+		self.lock = threading.Lock()  # A cv2.dnn.Net must not run two forward passes at once
+
+	def detect(self, image):
+		height, width = image.shape[:2]
+		# The network was trained on BGR images with these channel means
+		blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0),
+									 swapRB=True)
+		with self.lock:
+			self.net.setInput(blob)
+			detections = self.net.forward()[0, 0]
+		detections = detections[detections[:, 2] >= self.confidence]
+		boxes = detections[:, 3:7] * np.array([width, height, width, height])
+		return [_clip(y1, x2, y2, x1, height, width) for x1, y1, x2, y2 in boxes]
+
+
+class YuNetDetector:
+	"""OpenCV YuNet (cv2.FaceDetectorYN). Small CNN, fast on CPU at any input size."""
+	kind = "yunet"
+
+	def __init__(self, model="face_detection_yunet_2023mar.onnx", confidence=0.8, nms=0.3):
+		"""
+		Args:
+			model (str): ONNX model, relative to the project folder.
+			confidence (float): Minimum detection score.
+			nms (float): Non-maximum suppression IoU threshold.
+		"""
+		self.detector = cv2.FaceDetectorYN.create(_model_path(model), "", (320, 320), confidence, nms)
+		self.lock = threading.Lock()  # The input size is detector state
+
+	def detect(self, image):
+		height, width = image.shape[:2]
+		bgr = np.ascontiguousarray(image[:, :, ::-1])
+		with self.lock:
+			self.detector.setInputSize((width, height))
+			_, faces = self.detector.detect(bgr)
+		if faces is None:
+			return []
+		return [_clip(y, x + w, y + h, x, height, width) for x, y, w, h in faces[:, :4]]
+
+
+def _model_path(name):
+	path = name if os.path.isabs(name) else os.path.join(ROOT, name)
+	if not os.path.exists(path):
+		raise FileNotFoundError(f"Detector model not found: {path} (see face_detectors.py for download notes)")
+	return path
+
+
+DETECTORS = {
+	HogDetector.kind: HogDetector,
+	HaarDetector.kind: HaarDetector,
+	SsdDetector.kind: SsdDetector,
+	YuNetDetector.kind: YuNetDetector,
+}
+
+
+def create_detector(kind="hog", **params):
+	"""
+	Create a detector backend.
+
+	Args:
+		kind (str): "hog", "haar", "ssd" or "yunet".
+		**params: Backend-specific parameters (e.g. upsample for "hog", confidence for "yunet").
+	"""
+	if kind not in DETECTORS:
+		raise ValueError(f"Unknown detector: {kind} (expected one of {list(DETECTORS)})")
+	return DETECTORS[kind](**params)
+
+
+def detector_params(cfg, **overrides):
+	"""
+	Backend name and parameters from the "DETECTOR" section of config.json.
+
+	Overrides only apply to backends that take them, e.g. `upsample=0` for HOG
+	on full-size frames.
+
+	Returns:
+		tuple[str, dict]: Arguments for create_detector.
+	"""
+	kind = cfg.get("BACKEND", HogDetector.kind)
+	params = {key.lower(): value for key, value in cfg.get(kind.upper(), {}).items()}
+	accepted = inspect.signature(DETECTORS[kind]).parameters
+	params.update({key: value for key, value in overrides.items() if key in accepted})
+	return kind, params
@@ -0,0 +1,66 @@
+"""
+Batched face encoding with dlib's descriptor API.
+
+face_recognition.face_encodings runs the ResNet once per call, so encoding the
+faces of a frame one location at a time pays the per-call overhead for every
+face. These helpers compute the 5-point landmarks of every face first and then
+all 128-d descriptors in one compute_face_descriptor call: per image for the
+faces of a frame, or over a list of images for training.
+
+The models are the ones face_recognition loads, so the encodings are the same as
+face_recognition.face_encodings(image, locations) (model="small"). They are loaded
+on first use (see face_models), not when this module is imported.
+"""
+import numpy as np
+from face_models import face_encoder, pose_predictor_5_point
+
+
+def _landmarks(image, locations):
+	import dlib
+	predictor = pose_predictor_5_point()
+	shapes = dlib.full_object_detections()
+	for top, right, bottom, left in locations:
+		shapes.append(predictor(image, dlib.rectangle(int(left), int(top), int(right), int(bottom))))
+	return shapes
+
+
+def encode_faces(image, locations, num_jitters=1):
+	"""
+	Encode every face of one image in a single descriptor call.
+
+	Args:
+		image (np.ndarray): RGB image.
+		locations (list[tuple]): (top, right, bottom, left) face boxes.
+		num_jitters (int): Random re-samples averaged per face (slower, slightly more accurate).
+
+	Returns:
+		np.ndarray: (len(locations), 128) float64 encodings.
+	"""
+	if not locations:
+		return np.empty((0, 128))
+	return np.array(face_encoder().compute_face_descriptor(image, _landmarks(image, locations), num_jitters))
+
+
+def encode_batch(images, locations, num_jitters=1):
+	"""
+	Encode the faces of several images in a single descriptor call.
+
+	Args:
+		images (list[np.ndarray]): RGB images (sizes may differ).
+		locations (list[list[tuple]]): Face boxes of each image.
+		num_jitters (int): Random re-samples averaged per face.
+
+	Returns:
+		list[np.ndarray]: (faces in the image, 128) encodings per image.
+	"""
+	# Images without faces are left out of the call, dlib rejects empty detections
+	batch = [i for i, image_locations in enumerate(locations) if image_locations]
+	results = [np.empty((0, 128)) for _ in images]
+	if not batch:
+		return results
+	descriptors = face_encoder().compute_face_descriptor([images[i] for i in batch],
+														 [_landmarks(images[i], locations[i]) for i in batch],
+														 num_jitters)
+	for i, image_descriptors in zip(batch, descriptors):
+		results[i] = np.array(image_descriptors)
+	return results
@@ -0,0 +1,443 @@
+import json
+import os
+import pickle
+import numpy as np
+
+# Binary gallery file (.fgal):
+#   magic b"FGAL" | uint32 version | uint32 header length | JSON header | padding
+#   float32 matrix (count x dim) | float32 squared norms (count) | int32 owners (count)
+# Every array starts on a 64-byte boundary so it can be memory-mapped in place.
+GALLERY_MAGIC = b"FGAL"
+GALLERY_VERSION = 1
+GALLERY_EXTENSION = ".fgal"
+# Students enrolled by face_id.py since the last train_faces run, in the .fgal format
+# (never a pickle: the delta sits on the same shared storage as the gallery)
+DELTA_SUFFIX = ".delta" + GALLERY_EXTENSION
+_ALIGN = 64
+
+
+class FaceGallery:
+	"""
+	Packed gallery of known face encodings.
+
+	All encodings are stored in one contiguous float32 matrix, with an owner
+	index array mapping each row to a student label. Rows of the same student
+	are kept contiguous so per-student minimums can be reduced in one call.
+	"""
+	def __init__(self, names, matrix, owners, index=None, sq_norms=None):
+		"""
+		Args:
+			names (list[str]): Student labels, indexed by owner id.
+			matrix (np.ndarray): (N, 128) float32 matrix of encodings.
+			owners (np.ndarray): (N,) int32 array, owner id of each row (sorted).
+			index: Optional nearest-neighbour index built over `matrix` (see face_index).
+				   When None, matching is exact with a per-student min-reduction.
+			sq_norms (np.ndarray): Precomputed squared norms of the rows, if available.
+		"""
+		self.index = index
+		self.names = list(names)
+		self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+		self.owners = np.ascontiguousarray(owners, dtype=np.int32)
+		# Squared norms are reused for every query
+		if sq_norms is None:
+			sq_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+		self.sq_norms = sq_norms
+		# Start row of each student's block (for np.minimum.reduceat)
+		self.counts = np.bincount(self.owners, minlength=len(self.names))
+		self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64)
+
+	@classmethod
+	def from_encodings(cls, known_encodings):
+		"""
+		Build a gallery from the {student name: [encodings]} dict saved by train_faces.
+
+		Args:
+			known_encodings (dict): key: student name, value: list of 128-d encodings.
+		"""
+		names = sorted(known_encodings.keys())
+		blocks = []
+		owners = []
+		for owner_id, name in enumerate(names):
+			encodings = known_encodings[name]
+			if len(encodings) == 0:
+				continue
+			block = np.asarray(encodings, dtype=np.float32).reshape(len(encodings), -1)
+			blocks.append(block)
+			owners.append(np.full(len(block), owner_id, dtype=np.int32))
+		if blocks:
+			matrix = np.vstack(blocks)
+			owners = np.concatenate(owners)
+		else:
+			matrix = np.zeros((0, 128), dtype=np.float32)
+			owners = np.zeros(0, dtype=np.int32)
+		return cls(names, matrix, owners)
+
+	def __len__(self):
+		return len(self.matrix)
+
+	def comparisons_per_query(self):
+		"""Stored encodings one query is compared with (all of them, or the probed cells of an IVF index)."""
+		n_lists = len(getattr(self.index, "centroids", ()))
+		if n_lists:
+			return len(self.matrix) * self.index.n_probe // n_lists + n_lists
+		return len(self.matrix)
+
+	def merged(self, known_encodings):
+		"""
+		New gallery with the given students added, replacing any rows they already had.
+
+		Row ids change, so the result has no index (matching is exact).
+
+		Args:
+			known_encodings (dict): key: student name, value: list of 128-d encodings.
+		"""
+		students = {name: self.matrix[start:start + count]
+					for name, start, count in zip(self.names, self.starts, self.counts)
+					if name not in known_encodings}
+		students.update(known_encodings)
+		return FaceGallery.from_encodings(students)
+
+	def save(self, path):
+		"""
+		Save the gallery in the binary .fgal format (see load_gallery).
+
+		Args:
+			path (str): Output file path.
+		"""
+		count, dim = self.matrix.shape
+		header = {"version": GALLERY_VERSION, "count": int(count), "dim": int(dim),
+				  "dtype": "float32", "names": self.names}
+		header_bytes = json.dumps(header).encode("utf-8")
+		prefix = len(GALLERY_MAGIC) + 8 + len(header_bytes)
+		tmp_path = path + ".tmp"
+		with open(tmp_path, 'wb') as f:
+			f.write(GALLERY_MAGIC)
+			f.write(np.array([GALLERY_VERSION, len(header_bytes)], dtype='<u4').tobytes())
+			f.write(header_bytes)
+			f.write(b"\0" * (-prefix % _ALIGN))
+			for array in (self.matrix.astype('<f4'), np.asarray(self.sq_norms, dtype='<f4'),
+						  self.owners.astype('<i4')):
+				f.write(array.tobytes())
+				f.write(b"\0" * (-array.nbytes % _ALIGN))
+		# Replace atomically so running kiosks never map a half-written file
+		os.replace(tmp_path, path)
+
+	def distances(self, face_encodings):
+		"""
+		Euclidean distance from every query face to every stored encoding.
+
+		Args:
+			face_encodings (array-like): (F, 128) query encodings.
+
+		Returns:
+			np.ndarray: (F, N) float32 distance matrix.
+		"""
+		queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+		# ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b, computed as one matrix product
+		sq = np.einsum('ij,ij->i', queries, queries)[:, None] + self.sq_norms[None, :]
+		sq -= 2.0 * (queries @ self.matrix.T)
+		np.maximum(sq, 0.0, out=sq)
+		return np.sqrt(sq)
+
+	def student_distances(self, face_encodings):
+		"""
+		Minimum distance from every query face to every student.
+
+		Students without any encoding get an infinite distance.
+
+		Returns:
+			np.ndarray: (F, S) float32 matrix, columns ordered as self.names.
+		"""
+		queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+		result = np.full((len(queries), len(self.names)), np.inf, dtype=np.float32)
+		if len(self.matrix) == 0 or len(queries) == 0:
+			return result
+		distances = self.distances(queries)
+		present = self.counts > 0
+		# Per-student min-reduction over each contiguous block of rows
+		result[:, present] = np.minimum.reduceat(distances, self.starts[present], axis=1)
+		return result
+
+	def match(self, face_encodings):
+		"""
+		Find the closest student for every query face.
+
+		Args:
+			face_encodings (array-like): (F, 128) query encodings.
+
+		Returns:
+			list[tuple[str, float]]: (student name, distance) for each query,
+			or (None, inf) if the gallery is empty.
+		"""
+		queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+		if len(queries) == 0:
+			return []
+		if len(self.matrix) == 0:
+			return [(None, float('inf'))] * len(queries)
+		if self.index is not None:
+			rows, distances = self.index.search(queries)
+			return [(self.names[self.owners[row]], float(distance)) if row >= 0 else (None, float('inf'))
+					for row, distance in zip(rows, distances)]
+		per_student = self.student_distances(queries)
+		results = []
+		for face, row in zip(queries, per_student):
+			best = int(np.argmin(row))
+			# Recompute the winner exactly, the expanded form loses a little precision
+			start, stop = self.starts[best], self.starts[best] + self.counts[best]
+			distance = float(np.min(np.linalg.norm(self.matrix[start:stop] - face, axis=1)))
+			results.append((self.names[best], distance))
+		return results
+
+
+def load_gallery(path, mmap=True):
+	"""
+	Load a gallery saved with FaceGallery.save.
+
+	Args:
+		path (str): Path of the .fgal file.
+		mmap (bool): Map the arrays with numpy.memmap instead of reading them.
+					 Startup is near-instant and processes on one host share the pages.
+
+	Returns:
+		FaceGallery: The gallery (arrays are read-only when memory-mapped).
+	"""
+	with open(path, 'rb') as f:
+		magic = f.read(len(GALLERY_MAGIC))
+		if magic != GALLERY_MAGIC:
+			raise ValueError(f"{path} is not a gallery file")
+		version, header_len = np.frombuffer(f.read(8), dtype='<u4')
+		if version > GALLERY_VERSION:
+			raise ValueError(f"{path} has gallery version {version}, this code reads up to {GALLERY_VERSION}")
+		header = json.loads(f.read(int(header_len)).decode("utf-8"))
+	count, dim = header["count"], header["dim"]
+	offset = len(GALLERY_MAGIC) + 8 + int(header_len)
+	offset += -offset % _ALIGN
+
+	arrays = []
+	for dtype, shape in (('<f4', (count, dim)), ('<f4', (count,)), ('<i4', (count,))):
+		nbytes = int(np.prod(shape)) * 4
+		if count == 0:
+			arrays.append(np.zeros(shape, dtype=dtype))
+		elif mmap:
+			arrays.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape))
+		else:
+			arrays.append(np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape))
+		offset += nbytes + (-nbytes % _ALIGN)
+	matrix, sq_norms, owners = arrays
+	return FaceGallery(header["names"], matrix, owners, sq_norms=sq_norms)
+
+
+def convert_pickle(pickle_file, gallery_file=None):
+	"""
+	Convert a student_encodings.pkl file written by train_faces to the .fgal format.
+
+	Args:
+		pickle_file (str): Input pickle path.
+		gallery_file (str): Output path, defaults to the pickle path with a .fgal extension.
+
+	Returns:
+		str: The output path.
+	"""
+	if gallery_file is None:
+		gallery_file = os.path.splitext(pickle_file)[0] + GALLERY_EXTENSION
+	with open(pickle_file, 'rb') as f:
+		known_encodings = pickle.load(f)
+	gallery = FaceGallery.from_encodings(known_encodings)
+	gallery.save(gallery_file)
+	print(f"Converted {len(gallery.names)} students / {len(gallery)} encodings to {gallery_file}")
+	return gallery_file
+
+
+def delta_path(encodings_file):
+	"""Path of the enrollment delta stored next to an encodings file."""
+	return os.path.splitext(encodings_file)[0] + DELTA_SUFFIX
+
+
+def load_delta(encodings_file):
+	"""
+	Load the students enrolled since the last training.
+
+	Returns:
+		dict: {student name: [encodings]}, empty if there is no delta file.
+	"""
+	path = delta_path(encodings_file)
+	if not os.path.exists(path):
+		return {}
+	# Read, not mapped: update_delta replaces the file while apps hold the result
+	gallery = load_gallery(path, mmap=False)
+	return {name: gallery.matrix[start:start + count]
+			for name, start, count in zip(gallery.names, gallery.starts, gallery.counts) if count}
+
+
+def update_delta(encodings_file, updates=None, remove=()):
+	"""
+	Add or replace students in the enrollment delta, and drop others.
+
+	The file is replaced atomically (running apps poll it) and deleted once empty.
+
+	Args:
+		encodings_file (str): Gallery file the delta belongs to.
+		updates (dict): {student name: [encodings]} to add or replace.
+		remove (iterable): Student names to drop, e.g. once train_faces covers them.
+
+	Returns:
+		dict: The delta after the update.
+	"""
+	delta = load_delta(encodings_file)
+	delta.update(updates or {})
+	for name in remove:
+		delta.pop(name, None)
+	path = delta_path(encodings_file)
+	if not delta:
+		if os.path.exists(path):
+			os.remove(path)
+		return delta
+	FaceGallery.from_encodings(delta).save(path)  # Atomic replace
+	return delta
+
+
+def _kmeans(points, k, n_iter=10, seed=0):
+	"""Plain k-means, returns the cluster id of every point."""
+	rng = np.random.default_rng(seed)
+	centroids = points[rng.choice(len(points), k, replace=False)].copy()
+	for _ in range(n_iter):
+		sq = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+		assign = np.argmin(sq, axis=1)
+		for c in range(k):
+			members = points[assign == c]
+			if len(members):
+				centroids[c] = members.mean(axis=0)
+	return assign
+
+
+def dedupe_encodings(encodings, epsilon):
+	"""
+	Drop near-duplicate encodings.
+
+	An encoding is kept only if it is farther than `epsilon` from every encoding
+	already kept, so the first of a group of near-identical frames survives.
+	"""
+	kept = []
+	for encoding in encodings:
+		if not kept or np.min(np.linalg.norm(np.asarray(kept) - encoding, axis=1)) > epsilon:
+			kept.append(encoding)
+	return kept
+
+
+def compact_student(encodings, directions=None, k=9, epsilon=0.0, seed=0):
+	"""
+	Reduce one student's encodings to at most `k` representative prototypes.
+
+	Encodings are split by capture direction (the straight/left/right subfolders
+	written by face_id.py) and each direction gets its share of the k prototypes,
+	handed out one at a time to the directions with the most encodings first (so
+	with more directions than k, only the k largest keep a prototype).
+	Within a direction, encodings are clustered with k-means and each cluster is
+	replaced by its medoid (the real encoding closest to the cluster mean), so
+	prototypes are always genuine face encodings.
+
+	Args:
+		encodings (list[np.ndarray]): The student's 128-d encodings.
+		directions (list[str]): Capture direction of each encoding (None = one group).
+		k (int): Maximum number of prototypes kept for the student.
+		epsilon (float): Prototypes closer than this to a kept one are dropped.
+		seed (int): Random seed for k-means.
+
+	Returns:
+		list[np.ndarray]: The prototype encodings.
+	"""
+	if len(encodings) == 0:
+		return []
+	points = np.asarray(encodings, dtype=np.float64)
+	if directions is None:
+		directions = [""] * len(points)
+	directions = np.asarray(directions)
+	groups = sorted(set(directions))
+	sizes = {group: int(np.sum(directions == group)) for group in groups}
+	# Split k across the directions round-robin, larger directions first; a direction
+	# never gets more prototypes than encodings, so the total is min(k, len(encodings))
+	quotas = dict.fromkeys(groups, 0)
+	budget = max(int(k), 1)
+	order = sorted(groups, key=lambda group: -sizes[group])
+	while budget > 0 and any(quotas[group] < sizes[group] for group in order):
+		for group in order:
+			if budget > 0 and quotas[group] < sizes[group]:
+				quotas[group] += 1
+				budget -= 1
+	prototypes = []
+	for group in groups:
+		n_clusters = quotas[group]
+		if n_clusters == 0:
+			continue
+		members = points[directions == group]
+		assign = _kmeans(members, n_clusters, seed=seed)
+		for c in range(n_clusters):
+			cluster = members[assign == c]
+			if len(cluster) == 0:
+				continue
+			center = cluster.mean(axis=0)
+			prototypes.append(cluster[np.argmin(np.linalg.norm(cluster - center, axis=1))])
+	if epsilon > 0:
+		prototypes = dedupe_encodings(prototypes, epsilon)
+	return prototypes
+
+
+def compaction_report(known_encodings, known_directions=None, k=9, epsilon=0.0, holdout=0.2,
+					  tolerance=0.6, seed=0):
+	"""
+	Measure memory saved and accuracy change of compact_student on a held-out split.
+
+	Every student's encodings are shuffled and split; the training part builds
+	a full and a compacted gallery, and the held-out encodings are matched
+	against both (correct = right student within `tolerance`).
+
+	Args:
+		known_encodings (dict): {student name: [encodings]} as built by train_faces.
+		known_directions (dict): {student name: [direction of each encoding]}.
+		k, epsilon: Passed to compact_student.
+		holdout (float): Fraction of each student's encodings held out for testing.
+		tolerance (float): Match distance threshold, same as AttendanceGUI.
+
+	Returns:
+		dict: encodings/bytes before and after, and accuracy of both galleries.
+	"""
+	rng = np.random.default_rng(seed)
+	full, compact, tests = {}, {}, []
+	for name, encodings in known_encodings.items():
+		if len(encodings) == 0:
+			continue
+		directions = (known_directions or {}).get(name) or [""] * len(encodings)
+		order = rng.permutation(len(encodings))
+		n_test = int(len(encodings) * holdout) if len(encodings) > 1 else 0
+		train_ids, test_ids = order[n_test:], order[:n_test]
+		full[name] = [encodings[i] for i in train_ids]
+		compact[name] = compact_student(full[name], [directions[i] for i in train_ids], k, epsilon, seed)
+		tests.extend((name, encodings[i]) for i in test_ids)
+
+	def accuracy(gallery):
+		if not tests:
+			return float('nan')
+		matches = gallery.match([encoding for _, encoding in tests])
+		return float(np.mean([match == name and distance < tolerance
+							  for (name, _), (match, distance) in zip(tests, matches)]))
+
+	full_gallery = FaceGallery.from_encodings(full)
+	compact_gallery = FaceGallery.from_encodings(compact)
+	return {
+		"encodings_before": len(full_gallery),
+		"encodings_after": len(compact_gallery),
+		"bytes_before": full_gallery.matrix.nbytes,
+		"bytes_after": compact_gallery.matrix.nbytes,
+		"accuracy_before": accuracy(full_gallery),
+		"accuracy_after": accuracy(compact_gallery),
+		"test_size": len(tests),
+	}
+
+
+if __name__ == "__main__":
+	import argparse
+	parser = argparse.ArgumentParser(description="Convert student_encodings.pkl to the binary .fgal gallery format.")
+	parser.add_argument("pickle_file", help="Encodings pickle written by train_faces")
+	parser.add_argument("gallery_file", nargs="?", help="Output .fgal path (default: next to the pickle)")
+	args = parser.parse_args()
+	convert_pickle(args.pickle_file, args.gallery_file)
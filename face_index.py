@@ -0,0 +1,269 @@
+import hashlib
+import os
+import numpy as np
+
+
+def index_path(encodings_file):
+	"""Path of the index file stored next to an encodings file."""
+	return os.path.splitext(encodings_file)[0] + ".index.npz"
+
+
+def cells_path(path):
+	"""Path of the cell-ordered rows saved with an IVF index (memory-mapped when loaded)."""
+	return os.path.splitext(path)[0] + ".cells.npy"
+
+
+def gallery_fingerprint(matrix, max_rows=65536):
+	"""
+	Fingerprint of a gallery matrix, saved in its index to detect a stale index.
+
+	Hashes the shape and up to `max_rows` evenly spaced rows (every row of
+	galleries up to that size), so a retrain or compaction that keeps the row
+	count still changes it, without reading all of a memory-mapped gallery.
+	"""
+	step = max(1, -(-len(matrix) // max_rows))
+	digest = hashlib.blake2b(np.asarray(matrix.shape, dtype='<i8').tobytes(), digest_size=16)
+	digest.update(np.ascontiguousarray(matrix[::step], dtype='<f4').tobytes())
+	return digest.hexdigest()
+
+
+def _sq_distances(queries, points, point_sq_norms):
+	"""Squared euclidean distances (Q, P) using ||a||^2 + ||b||^2 - 2 a.b."""
+	sq = np.einsum('ij,ij->i', queries, queries)[:, None] + point_sq_norms[None, :]
+	sq -= 2.0 * (queries @ points.T)
+	np.maximum(sq, 0.0, out=sq)
+	return sq
+
+
+class BruteForceIndex:
+	"""
+	Exact nearest-neighbour search over every row of the gallery.
+	"""
+	kind = "exact"
+
+	def __init__(self, matrix, sq_norms=None):
+		self.matrix = matrix
+		self.sq_norms = sq_norms if sq_norms is not None else np.einsum('ij,ij->i', matrix, matrix)
+
+	def search(self, queries):
+		"""
+		Nearest stored row for each query.
+
+		Args:
+			queries (np.ndarray): (Q, D) float32 query encodings.
+
+		Returns:
+			tuple[np.ndarray, np.ndarray]: (Q,) row ids and (Q,) distances.
+		"""
+		sq = _sq_distances(queries, self.matrix, self.sq_norms)
+		rows = np.argmin(sq, axis=1)
+		return rows, np.sqrt(sq[np.arange(len(rows)), rows])
+
+	def save(self, path):
+		np.savez(path, kind=self.kind, n_rows=len(self.matrix), fingerprint=gallery_fingerprint(self.matrix))
+
+
+class IVFIndex:
+	"""
+	Approximate nearest-neighbour search with an inverted file (IVF).
+
+	Rows are partitioned into `n_lists` cells with k-means. A query is only
+	compared with the rows of its `n_probe` closest cells, so raising
+	`n_probe` trades latency for recall (n_probe == n_lists is exact).
+	"""
+	kind = "ivf"
+
+	def __init__(self, matrix, centroids, list_offsets, list_rows, n_probe=8, sq_norms=None, cell_matrix=None):
+		"""
+		Args:
+			matrix (np.ndarray): (N, D) float32 gallery matrix.
+			centroids (np.ndarray): (L, D) float32 cell centroids.
+			list_offsets (np.ndarray): (L + 1,) start of each cell in list_rows.
+			list_rows (np.ndarray): (N,) row ids grouped by cell.
+			n_probe (int): Number of cells visited per query.
+			sq_norms (np.ndarray): Squared norms of the gallery rows, computed if None.
+			cell_matrix (np.ndarray): matrix[list_rows], e.g. memory-mapped from the saved
+									  index so processes share its pages. Copied from
+									  `matrix` if None.
+		"""
+		self.matrix = matrix
+		self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+		self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+		self.list_rows = np.asarray(list_rows, dtype=np.int64)
+		self.n_probe = max(1, min(int(n_probe), len(self.centroids)))
+		self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+		# Rows reordered by cell so every probed cell is one contiguous slice
+		if cell_matrix is None:
+			cell_matrix = np.ascontiguousarray(matrix[self.list_rows])
+		self.cell_matrix = cell_matrix
+		if sq_norms is None:
+			sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+		self.cell_sq_norms = sq_norms[self.list_rows]
+
+	@classmethod
+	def build(cls, matrix, n_lists=None, n_probe=8, n_iter=20, sample_size=65536, seed=0):
+		"""
+		Train k-means centroids and assign every row to its closest cell.
+
+		Args:
+			matrix (np.ndarray): (N, D) float32 gallery matrix.
+			n_lists (int): Number of cells, defaults to about sqrt(N).
+			n_probe (int): Default number of cells visited per query.
+			n_iter (int): K-means iterations.
+			sample_size (int): Max number of rows used to train the centroids.
+			seed (int): Random seed for reproducible indexes.
+		"""
+		rng = np.random.default_rng(seed)
+		n_rows = len(matrix)
+		if n_lists is None:
+			n_lists = int(np.sqrt(n_rows))
+		n_lists = max(1, min(int(n_lists), n_rows))
+
+		sample = matrix
+		if n_rows > sample_size:
+			sample = matrix[rng.choice(n_rows, sample_size, replace=False)]
+		centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+		sample_sq = np.einsum('ij,ij->i', sample, sample)
+		for _ in range(n_iter):
+			assign = cls._assign(sample, sample_sq, centroids)
+			counts = np.bincount(assign, minlength=n_lists)
+			filled = counts > 0
+			# Sum the members of every cell with one sorted reduction
+			order = np.argsort(assign, kind='stable')
+			starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+			centroids[filled] = np.add.reduceat(sample[order], starts, axis=0) / counts[filled, None]
+			# Re-seed empty cells with random rows
+			if not filled.all():
+				centroids[~filled] = sample[rng.choice(len(sample), int((~filled).sum()))]
+
+		return cls.from_centroids(matrix, centroids, n_probe=n_probe)
+
+	@classmethod
+	def from_centroids(cls, matrix, centroids, n_probe=8, sq_norms=None):
+		"""Assign every row to its closest cell of already trained centroids (one pass, no k-means)."""
+		if sq_norms is None:
+			sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+		assign = cls._assign(matrix, sq_norms, centroids)
+		list_rows = np.argsort(assign, kind='stable')
+		list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids)))))
+		return cls(matrix, centroids, list_offsets, list_rows, n_probe=n_probe, sq_norms=sq_norms)
+
+	@staticmethod
+	def _assign(points, points_sq, centroids, chunk=65536):
+		"""Closest centroid of every point, in chunks to bound memory."""
+		assign = np.empty(len(points), dtype=np.int64)
+		for start in range(0, len(points), chunk):
+			block = points[start:start + chunk]
+			sq = _sq_distances(centroids, block, points_sq[start:start + chunk])
+			assign[start:start + chunk] = np.argmin(sq, axis=0)
+		return assign
+
+	def search(self, queries):
+		"""
+		Approximate nearest stored row for each query.
+
+		Args:
+			queries (np.ndarray): (Q, D) float32 query encodings.
+
+		Returns:
+			tuple[np.ndarray, np.ndarray]: (Q,) row ids and (Q,) distances.
+		"""
+		cell_sq = _sq_distances(queries, self.centroids, self.centroid_sq_norms)
+		if self.n_probe < len(self.centroids):
+			probes = np.argpartition(cell_sq, self.n_probe - 1, axis=1)[:, :self.n_probe]
+		else:
+			probes = np.broadcast_to(np.arange(len(self.centroids)), cell_sq.shape)
+
+		rows = np.full(len(queries), -1, dtype=np.int64)
+		distances = np.full(len(queries), np.inf, dtype=np.float32)
+		for i, query in enumerate(queries):
+			query = query[None, :]
+			# Scan every probed cell in place, no candidate gather/copy
+			for cell in probes[i]:
+				start, stop = self.list_offsets[cell], self.list_offsets[cell + 1]
+				if start == stop:
+					continue
+				sq = _sq_distances(query, self.cell_matrix[start:stop], self.cell_sq_norms[start:stop])[0]
+				best = int(np.argmin(sq))
+				if sq[best] < distances[i]:
+					distances[i] = sq[best]
+					rows[i] = self.list_rows[start + best]
+		return rows, np.sqrt(distances)
+
+	def save(self, path):
+		"""
+		Save the index, and the cell-ordered rows in a .npy file next to it. Both are
+		replaced atomically, the rows first, so a reader of the new index finds them.
+		"""
+		with open(cells_path(path) + ".tmp", 'wb') as f:
+			np.save(f, np.ascontiguousarray(self.cell_matrix, dtype=np.float32))
+		os.replace(cells_path(path) + ".tmp", cells_path(path))
+		with open(path + ".tmp", 'wb') as f:
+			np.savez(f, kind=self.kind, n_rows=len(self.matrix), fingerprint=gallery_fingerprint(self.matrix),
+					 cells_fingerprint=gallery_fingerprint(self.cell_matrix), centroids=self.centroids,
+					 list_offsets=self.list_offsets, list_rows=self.list_rows, n_probe=self.n_probe)
+		os.replace(path + ".tmp", path)
+
+
+INDEX_BACKENDS = {
+	BruteForceIndex.kind: BruteForceIndex,
+	IVFIndex.kind: IVFIndex,
+}
+
+
+def build_index(kind, matrix, **params):
+	"""
+	Build an index of the given kind over a gallery matrix.
+
+	Args:
+		kind (str): "exact" or "ivf".
+		matrix (np.ndarray): (N, D) float32 gallery matrix.
+		**params: Backend-specific parameters (e.g. n_lists, n_probe for "ivf").
+	"""
+	if kind not in INDEX_BACKENDS:
+		raise ValueError(f"Unknown index kind: {kind} (expected one of {list(INDEX_BACKENDS)})")
+	if kind == BruteForceIndex.kind:
+		return BruteForceIndex(matrix)
+	return INDEX_BACKENDS[kind].build(matrix, **params)
+
+
+def load_index(path, matrix, n_probe=None, sq_norms=None):
+	"""
+	Load an index saved next to the encodings file.
+
+	Args:
+		path (str): Path of the .index.npz file.
+		matrix (np.ndarray): Gallery matrix the index was built for.
+		n_probe (int): Override the saved n_probe of an IVF index.
+		sq_norms (np.ndarray): Squared norms of the gallery rows (FaceGallery.sq_norms).
+
+	The cell-ordered rows saved with the index are memory-mapped, like the .fgal
+	gallery, so every process shares them instead of holding a private copy.
+
+	An index saved for other encodings (different gallery fingerprint: a retrain,
+	a compaction, or a reload that read the gallery before its new index was
+	written) is not used as is: its rows are reassigned to the saved centroids.
+
+	Returns:
+		The index, or None if the file is missing, the gallery is empty, or the
+		index is "exact" (FaceGallery already matches exactly without an index).
+	"""
+	if not os.path.exists(path) or len(matrix) == 0:
+		return None
+	data = np.load(path, allow_pickle=False)
+	kind = str(data["kind"])
+	if kind != IVFIndex.kind:
+		return None
+	n_probe = n_probe if n_probe is not None else int(data["n_probe"])
+	fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else None
+	if int(data["n_rows"]) != len(matrix) or fingerprint != gallery_fingerprint(matrix):
+		print(f"Index {path} was built for other encodings, reassigning the {len(matrix)} rows to its cells.")
+		return IVFIndex.from_centroids(matrix, data["centroids"], n_probe=n_probe, sq_norms=sq_norms)
+	cell_matrix = None
+	if os.path.exists(cells_path(path)) and "cells_fingerprint" in data.files:
+		cells = np.load(cells_path(path), mmap_mode='r', allow_pickle=False)
+		# Rows written by another save than this index are not used
+		if cells.shape == matrix.shape and gallery_fingerprint(cells) == str(data["cells_fingerprint"]):
+			cell_matrix = cells
+	return IVFIndex(matrix, data["centroids"], data["list_offsets"], data["list_rows"], n_probe=n_probe,
+					sq_norms=sq_norms, cell_matrix=cell_matrix)
@@ -0,0 +1,342 @@
+"""
+Hot-path instrumentation: per-stage timers and counters, live overlay,
+Prometheus export and profiling windows.
+
+Every stage of the attendance app and the dataset collector is wrapped in
+`metrics.timer(stage)` and every event in `metrics.count(name)`. With metrics
+disabled (the default) both return at once, so the calls can stay in the
+frame loop. Enable them in the "METRICS" section of config.json:
+
+	"METRICS" : {"ENABLED" : true, "HTTP_PORT" : 9108, "FILE" : "attendance.prom",
+				 "COLLECTOR" : {"HTTP_PORT" : 9109, "FILE" : "collector.prom"}}
+
+Scrape http://localhost:9108/metrics, or point node_exporter's textfile
+collector at the file. The attendance app and the dataset collector run side
+by side, so each app reads its own sub-section (the metrics prefix in upper
+case) over the shared keys: they need different ports and files. A profiling window ("PROFILE" : "sample") writes
+folded stacks that flamegraph.pl or speedscope turn into a flame graph.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+
+class _NullTimer:
+	"""Context manager that does nothing, returned while metrics are disabled."""
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+	def __init__(self, metrics, stage):
+		self.metrics = metrics
+		self.stage = stage
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		self.metrics.observe(self.stage, time.perf_counter() - self.start)
+		return False
+
+
+class Metrics:
+	"""
+	Thread-safe stage timers and counters.
+
+	Each stage keeps its total time and count (for the Prometheus summary)
+	and the last `window` durations (for the rolling percentiles).
+	"""
+	def __init__(self, enabled=False, prefix="attendance", window=300):
+		"""
+		Args:
+			enabled (bool): Record anything at all. Disabled metrics cost one attribute check per call.
+			prefix (str): Prefix of the exported metric names.
+			window (int): Recent durations kept per stage for the rolling stats.
+		"""
+		self.enabled = enabled
+		self.prefix = prefix
+		self.window = window
+		self.lock = threading.Lock()
+		self.counters = Counter()
+		self.gauges = {}
+		self.durations = {}  # key: stage, value: deque of recent seconds
+		self.totals = {}  # key: stage, value: [count, total seconds]
+		self.started = time.time()
+
+	def timer(self, stage):
+		"""Context manager timing one run of a stage."""
+		if not self.enabled:
+			return _NULL_TIMER
+		return _Timer(self, stage)
+
+	def observe(self, stage, seconds):
+		"""Record one duration of a stage."""
+		if not self.enabled:
+			return
+		with self.lock:
+			if stage not in self.durations:
+				self.durations[stage] = deque(maxlen=self.window)
+				self.totals[stage] = [0, 0.0]
+			self.durations[stage].append(seconds)
+			self.totals[stage][0] += 1
+			self.totals[stage][1] += seconds
+
+	def count(self, name, value=1):
+		"""Add to a counter (frames, faces, encode calls, comparisons, drops...)."""
+		if not self.enabled:
+			return
+		with self.lock:
+			self.counters[name] += value
+
+	def gauge(self, name, value):
+		"""Set a value that goes up and down (queue depth, fps...)."""
+		if not self.enabled:
+			return
+		with self.lock:
+			self.gauges[name] = value
+
+	def snapshot(self):
+		"""
+		Rolling stats of every stage and the current counters.
+
+		Returns:
+			dict: {"stages": {stage: {"p50", "p95", "mean", "count"} in ms}, "counters": {...}, "gauges": {...}}
+		"""
+		with self.lock:
+			durations = {stage: np.asarray(values) * 1000 for stage, values in self.durations.items()}
+			totals = {stage: list(values) for stage, values in self.totals.items()}
+			counters = dict(self.counters)
+			gauges = dict(self.gauges)
+		stages = {}
+		for stage, ms in durations.items():
+			if len(ms):
+				stages[stage] = {"p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95)),
+								 "mean": float(ms.mean()), "count": totals[stage][0]}
+		return {"stages": stages, "counters": counters, "gauges": gauges}
+
+	def overlay_lines(self):
+		"""Short text lines of the rolling stats, for the video overlay."""
+		snapshot = self.snapshot()
+		lines = [f"{stage:<8} p50 {s['p50']:6.1f} ms  p95 {s['p95']:6.1f} ms"
+				 for stage, s in sorted(snapshot["stages"].items())]
+		counters = snapshot["counters"]
+		frames = counters.get("frames", 0)
+		if frames:
+			lines.append(f"faces/frame {counters.get('faces', 0) / frames:.2f}  "
+						 f"encode calls {counters.get('encode_calls', 0)}  "
+						 f"drops {snapshot['gauges'].get('frame_drops', counters.get('frame_drops', 0))}")
+		return lines
+
+	def prometheus_text(self):
+		"""All metrics in the Prometheus text exposition format."""
+		snapshot = self.snapshot()
+		with self.lock:
+			totals = {stage: list(values) for stage, values in self.totals.items()}
+		name = f"{self.prefix}_stage_seconds"
+		lines = [f"# HELP {name} Time spent in each pipeline stage.", f"# TYPE {name} summary"]
+		for stage, stats in sorted(snapshot["stages"].items()):
+			lines.append(f'{name}{{stage="{stage}",quantile="0.5"}} {stats["p50"] / 1000:.6f}')
+			lines.append(f'{name}{{stage="{stage}",quantile="0.95"}} {stats["p95"] / 1000:.6f}')
+			lines.append(f'{name}_sum{{stage="{stage}"}} {totals[stage][1]:.6f}')
+			lines.append(f'{name}_count{{stage="{stage}"}} {totals[stage][0]}')
+		for counter, value in sorted(snapshot["counters"].items()):
+			lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+			lines.append(f"{self.prefix}_{counter}_total {value}")
+		for gauge, value in sorted(snapshot["gauges"].items()):
+			lines.append(f"# TYPE {self.prefix}_{gauge} gauge")
+			lines.append(f"{self.prefix}_{gauge} {value}")
+		lines.append(f"# TYPE {self.prefix}_uptime_seconds gauge")
+		lines.append(f"{self.prefix}_uptime_seconds {time.time() - self.started:.1f}")
+		return "\n".join(lines) + "\n"
+
+
+def draw_overlay(frame, lines, origin=(10, 20), line_height=18):
+	"""Draw text lines on a dark band in the top-left corner of a BGR frame (in place)."""
+	if not lines:
+		return frame
+	width = max(cv2.getTextSize(line, cv2.FONT_HERSHEY_PLAIN, 1.0, 1)[0][0] for line in lines) + 2 * origin[0]
+	height = line_height * len(lines) + origin[1] // 2
+	band = frame[:height, :width]
+	band[:] = band // 3  # Darken behind the text
+	for i, line in enumerate(lines):
+		cv2.putText(frame, line, (origin[0], origin[1] + i * line_height), cv2.FONT_HERSHEY_PLAIN, 1.0,
+					(255, 255, 255), 1, cv2.LINE_AA)
+	return frame
+
+
+class MetricsExporter:
+	"""
+	Publish the metrics in Prometheus text format: a file rewritten every
+	`interval` seconds and/or an HTTP endpoint at /metrics.
+	"""
+	def __init__(self, metrics, path=None, port=None, interval=5.0, host="127.0.0.1"):
+		self.metrics = metrics
+		self.path = path
+		self.interval = interval
+		self.stop_event = threading.Event()
+		self.server = None
+		if port:
+			exporter = self
+
+			class Handler(BaseHTTPRequestHandler):
+				def do_GET(self):
+					if self.path.split("?")[0] != "/metrics":
+						self.send_error(404)
+						return
+					body = exporter.metrics.prometheus_text().encode("utf-8")
+					self.send_response(200)
+					self.send_header("Content-Type", "text/plain; version=0.0.4")
+					self.send_header("Content-Length", str(len(body)))
+					self.end_headers()
+					self.wfile.write(body)
+
+				def log_message(self, *args):
+					pass  # No line per scrape on the console
+
+			self.server = ThreadingHTTPServer((host, port), Handler)
+			self.server.daemon_threads = True
+		self.threads = []
+		self.serving = False  # serve_forever running: shutdown() would block forever otherwise
+
+	def start(self):
+		if self.server is not None and not self.serving:
+			self.serving = True
+			self.threads.append(threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True))
+		if self.path:
+			self.threads.append(threading.Thread(target=self._write_loop, name="metrics-file", daemon=True))
+		for thread in self.threads:
+			thread.start()
+		return self
+
+	def _write_loop(self):
+		while not self.stop_event.wait(self.interval):
+			self.write()
+
+	def write(self):
+		"""Write the file atomically, so a scraper never reads half of it."""
+		with open(self.path + ".tmp", 'w') as f:
+			f.write(self.metrics.prometheus_text())
+		os.replace(self.path + ".tmp", self.path)
+
+	def stop(self):
+		self.stop_event.set()
+		if self.server is not None:
+			if self.serving:
+				self.server.shutdown()
+				self.serving = False
+			self.server.server_close()
+		if self.path:
+			self.write()
+
+
+class ProfileWindow:
+	"""
+	Profile the app for a time window, then write the result.
+
+	mode="sample": a thread samples the stack of every thread every `interval`
+	seconds and writes folded stacks (<path>.folded, one "frame;frame;... count"
+	line per stack) for flamegraph.pl or speedscope. Covers the capture,
+	recognition and Tk threads at once.
+	mode="cprofile": cProfile of the thread that calls start() (the Tk thread),
+	written to <path>.prof for snakeviz or pstats.
+	"""
+	def __init__(self, seconds=30.0, mode="sample", path="profile", interval=0.005):
+		if mode not in ("sample", "cprofile"):
+			raise ValueError(f"Unknown profile mode: {mode} (expected 'sample' or 'cprofile')")
+		self.seconds = seconds
+		self.mode = mode
+		self.path = path
+		self.interval = interval
+		self.running = False
+		self.output = None  # File written once the window ends
+
+	def start(self, root=None):
+		"""
+		Start the window. In cprofile mode `root` (the Tk root) schedules the stop on the Tk thread.
+		"""
+		if self.running:
+			return self
+		self.running = True
+		self.output = None
+		if self.mode == "sample":
+			threading.Thread(target=self._sample, name="profiler", daemon=True).start()
+		else:
+			self.profile = cProfile.Profile()
+			self.profile.enable()
+			root.after(int(self.seconds * 1000), self._stop_cprofile)
+		return self
+
+	def _stop_cprofile(self):
+		self.profile.disable()
+		self.output = self.path + ".prof"
+		self.profile.dump_stats(self.output)
+		self.running = False
+
+	def _sample(self):
+		stacks = Counter()
+		me = threading.get_ident()
+		names = {thread.ident: thread.name for thread in threading.enumerate()}
+		end = time.perf_counter() + self.seconds
+		while time.perf_counter() < end:
+			for ident, frame in sys._current_frames().items():
+				if ident == me:
+					continue
+				if ident not in names:
+					names = {thread.ident: thread.name for thread in threading.enumerate()}
+				stack = [f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})"
+						 for entry in traceback.extract_stack(frame)]
+				stacks[";".join([names.get(ident, str(ident))] + stack)] += 1
+			time.sleep(self.interval)
+		self.output = self.path + ".folded"
+		with open(self.output, 'w') as f:
+			for stack, count in stacks.most_common():
+				f.write(f"{stack} {count}\n")
+		self.running = False
+
+
+def from_config(cfg, prefix="attendance"):
+	"""
+	Metrics, exporter and profile window from the "METRICS" section of config.json.
+
+	Keys of the app's sub-section (`prefix` in upper case, e.g. "COLLECTOR")
+	override the shared ones. A port already in use (another app exporting on
+	it) only disables the HTTP endpoint, with a warning.
+
+	Returns:
+		tuple[Metrics, MetricsExporter | None, ProfileWindow | None]: The exporter
+		and profile window are None unless configured (and metrics enabled).
+	"""
+	cfg = cfg or {}
+	cfg = {**cfg, **(cfg.get(prefix.upper()) or {})}
+	metrics = Metrics(enabled=bool(cfg.get("ENABLED")), prefix=prefix)
+	if not metrics.enabled:
+		return metrics, None, None
+	exporter = None
+	if cfg.get("FILE") or cfg.get("HTTP_PORT"):
+		try:
+			exporter = MetricsExporter(metrics, path=cfg.get("FILE"), port=cfg.get("HTTP_PORT"),
+									   interval=cfg.get("EXPORT_EVERY", 5.0))
+		except OSError as e:
+			print(f"Metrics endpoint on port {cfg.get('HTTP_PORT')} disabled: {e}")
+			if cfg.get("FILE"):
+				exporter = MetricsExporter(metrics, path=cfg.get("FILE"), interval=cfg.get("EXPORT_EVERY", 5.0))
+	profiler = None
+	if cfg.get("PROFILE"):
+		profiler = ProfileWindow(cfg.get("PROFILE_SECONDS", 30.0), cfg["PROFILE"], cfg.get("PROFILE_FILE", "profile"))
+	return metrics, exporter, profiler
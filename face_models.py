@@ -0,0 +1,159 @@
+"""
+Lazy model loading for fast startup.
+
+`import face_recognition` deserializes every dlib model it ships (HOG and CNN
+detectors, 5 and 68-point predictors, the ResNet encoder) before the first
+line of the app runs. The models are now loaded the first time they are
+needed, and BackgroundLoader runs the startup steps (gallery, detector,
+encoder, warm-up) on a thread while the window and the camera preview are
+already up.
+
+Kiosks can pre-warm the OS file cache at boot, so the app reads the models
+from memory instead of a cold disk:
+
+	python face_models.py shape_predictor_68_face_landmarks.dat
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+_lock = threading.Lock()
+_models = {}  # key: model name or file, value: loaded dlib object
+
+
+def _load(key, factory):
+	with _lock:
+		if key not in _models:
+			_models[key] = factory()
+		return _models[key]
+
+
+def model_files():
+	"""Files of the face_recognition models used for encoding (5-point predictor and ResNet)."""
+	import face_recognition_models
+	return [face_recognition_models.pose_predictor_five_point_model_location(),
+			face_recognition_models.face_recognition_model_location()]
+
+
+def face_encoder():
+	"""dlib ResNet computing the 128-d descriptors, the one face_recognition.face_encodings uses."""
+	def load():
+		import dlib
+		import face_recognition_models
+		return dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+	return _load("face_encoder", load)
+
+
+def pose_predictor_5_point():
+	"""5-point landmark predictor aligning faces before encoding (face_recognition model="small")."""
+	def load():
+		import dlib
+		import face_recognition_models
+		return dlib.shape_predictor(face_recognition_models.pose_predictor_five_point_model_location())
+	return _load("pose_predictor_5_point", load)
+
+
+def shape_predictor(path):
+	"""dlib landmark predictor from a .dat file (e.g. the 68-point model of the dataset collector)."""
+	def load():
+		import dlib
+		return dlib.shape_predictor(path)
+	return _load(os.path.abspath(path), load)
+
+
+def warm_up():
+	"""
+	Load the encoding models and encode one blank face, so the first real
+	recognition does not pay for the lazy loading and first-call allocations.
+	"""
+	from face_encoding import encode_faces
+	encode_faces(np.zeros((150, 150, 3), dtype=np.uint8), [(25, 125, 125, 25)])
+
+
+def prefetch(paths, chunk=8 << 20):
+	"""
+	Read files once so they sit in the OS page cache.
+
+	Returns:
+		int: Bytes read.
+	"""
+	total = 0
+	for path in paths:
+		with open(path, 'rb') as f:
+			while True:
+				data = f.read(chunk)
+				if not data:
+					break
+				total += len(data)
+	return total
+
+
+class BackgroundLoader:
+	"""
+	Run startup steps on a background thread while the window is already up.
+
+	The Tk thread polls progress() for the indicator and take() for the
+	results, the same way it polls the recognition pipeline.
+	"""
+	def __init__(self, steps):
+		"""
+		Args:
+			steps (list[tuple]): (result name, progress message, callable) run in order. Each
+								 callable gets the results of the steps before it.
+		"""
+		self.steps = list(steps)
+		self.results = {}
+		self.step = 0
+		self.message = "Starting..."
+		self.error = None
+		self.seconds = None  # Total loading time once done
+		self.done = threading.Event()
+		self.taken = False
+		self.thread = threading.Thread(target=self.run, name="startup-loader", daemon=True)
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def run(self):
+		"""Run every step on the calling thread (also used directly to load eagerly)."""
+		start = time.perf_counter()
+		try:
+			for i, (name, message, load) in enumerate(self.steps):
+				self.step, self.message = i, message
+				self.results[name] = load(self.results)
+			self.step, self.message = len(self.steps), "Ready"
+		except Exception as e:
+			self.error = f"{type(e).__name__}: {e}"
+		self.seconds = time.perf_counter() - start
+		self.done.set()
+		return self
+
+	def progress(self):
+		"""(fraction of steps done, current message)."""
+		return self.step / max(1, len(self.steps)), self.message
+
+	def take(self):
+		"""
+		Results once, after the last step.
+
+		Returns:
+			dict: {result name: value}, or None while loading or once taken. Check
+			`error` when a step failed (the results then hold the steps done before).
+		"""
+		if not self.done.is_set() or self.taken:
+			return None
+		self.taken = True
+		return self.results
+
+
+if __name__ == "__main__":
+	paths = model_files() + sys.argv[1:]
+	start = time.perf_counter()
+	size = prefetch(paths)
+	seconds = time.perf_counter() - start
+	print(f"Prefetched {len(paths)} model files, {size / 1024 ** 2:.0f} MB in {seconds:.2f}s "
+		  f"({size / 1024 ** 2 / max(seconds, 1e-9):.0f} MB/s)")
@@ -0,0 +1,185 @@
+import queue
+import threading
+import time
+from collections import deque
+
+
+class RateMeter:
+	"""Rolling events-per-second over the last `window` seconds."""
+	def __init__(self, window=2.0):
+		self.window = window
+		self.times = deque()
+		self.lock = threading.Lock()
+
+	def tick(self):
+		now = time.time()
+		with self.lock:
+			self.times.append(now)
+			while self.times and now - self.times[0] > self.window:
+				self.times.popleft()
+
+	def rate(self):
+		now = time.time()
+		with self.lock:
+			while self.times and now - self.times[0] > self.window:
+				self.times.popleft()
+			return len(self.times) / self.window
+
+
+class LatestFrameGrabber:
+	"""
+	Capture thread that always keeps only the newest frame.
+
+	The camera is read as fast as it delivers frames, so its internal buffer
+	never backs up. A frame that is replaced before anyone took it is counted
+	as dropped.
+	"""
+	def __init__(self, capture):
+		"""
+		Args:
+			capture (cv2.VideoCapture): Opened video source.
+		"""
+		self.capture = capture
+		self.condition = threading.Condition()
+		self.frame = None
+		self.seq = 0  # Sequence number of the newest frame
+		self.taken_seq = 0  # Sequence number of the last frame handed out
+		self.dropped = 0
+		self.fps = RateMeter()
+		self.running = False
+		self.thread = threading.Thread(target=self._run, name="capture", daemon=True)
+
+	def start(self):
+		self.running = True
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.running = False
+		with self.condition:
+			self.condition.notify_all()
+		self.thread.join(timeout=1.0)
+
+	def _run(self):
+		while self.running:
+			ret, frame = self.capture.read()
+			if not ret:
+				time.sleep(0.01)
+				continue
+			self.fps.tick()
+			with self.condition:
+				if self.frame is not None and self.taken_seq < self.seq:
+					self.dropped += 1
+				self.frame = frame
+				self.seq += 1
+				self.condition.notify()
+
+	def take(self, timeout=0.5):
+		"""
+		Wait for a frame newer than the last one taken.
+
+		Returns:
+			tuple[int, np.ndarray]: (sequence number, frame), or (None, None) on timeout/stop.
+		"""
+		with self.condition:
+			if not self.condition.wait_for(lambda: self.seq > self.taken_seq or not self.running, timeout):
+				return None, None
+			if not self.running:
+				return None, None
+			self.taken_seq = self.seq
+			return self.seq, self.frame
+
+
+class RecognitionPipeline:
+	"""
+	Worker threads that run recognition on the newest captured frames.
+
+	Each worker takes the newest frame from the grabber, runs `process(frame)`
+	and puts (seq, frame, result) on a bounded results queue. When the GUI
+	falls behind, the oldest result is dropped so the display never lags.
+	"""
+	def __init__(self, grabber, process, workers=2, max_results=2):
+		"""
+		Args:
+			grabber (LatestFrameGrabber): Frame source.
+			process (callable): frame -> result, runs on the worker threads.
+			workers (int): Number of worker threads for detection and encoding.
+			max_results (int): Size of the results queue.
+		"""
+		self.grabber = grabber
+		self.process = process
+		self.results = queue.Queue(maxsize=max_results)
+		self.busy = 0  # Frames currently being processed
+		self.busy_lock = threading.Lock()
+		self.dropped = 0  # Finished results thrown away unseen
+		self.fps = RateMeter()
+		self.running = False
+		self.threads = [threading.Thread(target=self._run, name=f"recognition-{i}", daemon=True)
+						for i in range(max(1, workers))]
+
+	def start(self):
+		self.running = True
+		for thread in self.threads:
+			thread.start()
+		return self
+
+	def stop(self):
+		self.running = False
+		for thread in self.threads:
+			thread.join(timeout=1.0)
+
+	def _run(self):
+		while self.running:
+			seq, frame = self.grabber.take()
+			if frame is None:
+				continue
+			with self.busy_lock:
+				self.busy += 1
+			try:
+				result = self.process(frame)
+			except Exception as e:
+				print(f"Error processing frame: {type(e).__name__}: {e}")
+				continue
+			finally:
+				with self.busy_lock:
+					self.busy -= 1
+			self.fps.tick()
+			self._put((seq, frame, result))
+
+	def _put(self, item):
+		while True:
+			try:
+				self.results.put_nowait(item)
+				return
+			except queue.Full:
+				try:
+					self.results.get_nowait()
+					self.dropped += 1
+				except queue.Empty:
+					pass
+
+	def poll(self):
+		"""
+		Take every finished result without blocking.
+
+		Returns:
+			list[tuple[int, np.ndarray, object]]: (seq, frame, result), oldest first.
+		"""
+		items = []
+		while True:
+			try:
+				items.append(self.results.get_nowait())
+			except queue.Empty:
+				return sorted(items, key=lambda item: item[0])
+
+	def stats(self):
+		"""Queue depth and rates of every stage, for display."""
+		return {
+			"capture_fps": self.grabber.fps.rate(),
+			"capture_dropped": self.grabber.dropped,
+			"workers_busy": self.busy,
+			"workers": len(self.threads),
+			"process_fps": self.fps.rate(),
+			"results_queued": self.results.qsize(),
+			"results_dropped": self.dropped,
+		}
@@ -0,0 +1,91 @@
+import os
+import threading
+
+
+def file_signature(path):
+	"""(mtime, size) of a file, or None if it does not exist."""
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None
+	return (stat.st_mtime_ns, stat.st_size)
+
+
+class GalleryManager:
+	"""
+	Watch the gallery files and load a new version on a background thread.
+
+	Writers replace the files atomically (train_faces, FaceGallery.save,
+	update_delta), so a changed signature always means a complete file. The
+	new gallery is built entirely off the GUI thread and handed over with
+	take(): the caller swaps it in between two frames, while frames already
+	being recognized finish on the old one (copy-on-write, nothing is mutated).
+	"""
+	def __init__(self, load, paths, interval=1.0):
+		"""
+		Args:
+			load (callable): () -> FaceGallery, runs on the watcher thread.
+			paths (list[str]): Files whose changes trigger a reload (gallery, index, delta).
+			interval (float): Seconds between checks.
+		"""
+		self.load = load
+		self.paths = list(paths)
+		self.interval = interval
+		self.signatures = self._signatures()
+		self.pending = None  # Loaded gallery not taken yet
+		self.lock = threading.Lock()
+		self.reloads = 0
+		self.errors = 0
+		self.last_error = None
+		self.stop_event = threading.Event()
+		self.thread = threading.Thread(target=self._run, name="gallery-watcher", daemon=True)
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.stop_event.set()
+		self.thread.join(timeout=1.0)
+
+	def _signatures(self):
+		return [file_signature(path) for path in self.paths]
+
+	def _run(self):
+		while not self.stop_event.wait(self.interval):
+			signatures = self._signatures()
+			if signatures == self.signatures:
+				continue
+			self.signatures = signatures
+			try:
+				gallery = self.load()
+			except Exception as e:
+				# Keep serving the current gallery, retry on the next change
+				self.errors += 1
+				self.last_error = f"{type(e).__name__}: {e}"
+				continue
+			with self.lock:
+				self.pending = gallery
+			self.reloads += 1
+
+	def take(self):
+		"""
+		The newest loaded gallery, once.
+
+		Returns:
+			FaceGallery: The new gallery, or None if nothing changed since the last call.
+		"""
+		with self.lock:
+			gallery, self.pending = self.pending, None
+		return gallery
+
+
+def roster_diff(old_names, new_names):
+	"""
+	Students added and removed between two galleries.
+
+	Returns:
+		tuple[list[str], list[str]]: (added, removed), both sorted.
+	"""
+	old_names, new_names = set(old_names), set(new_names)
+	return sorted(new_names - old_names), sorted(old_names - new_names)
@@ -0,0 +1,107 @@
+"""
+Video panel rendering shared by the attendance app and the dataset collector.
+
+Turning a camera frame into a Tk image used to cost as much CPU as recognition:
+a full-size BGR->RGB conversion, a PIL LANCZOS resize and a new PhotoImage on
+every tick. FrameRenderer resizes with OpenCV first (INTER_AREA when shrinking),
+converts only the small image, pastes into the same PhotoImage while the size
+does not change, and renders at most `max_fps` times per second.
+"""
+import time
+
+import cv2
+from PIL import Image, ImageTk
+
+
+def update_label(label, **options):
+	"""
+	Reconfigure a Tk widget only with the options whose value changed.
+
+	configure() redraws the widget even when nothing changed, which adds up
+	when it is called on every frame.
+
+	Returns:
+		bool: True if the widget was reconfigured.
+	"""
+	last = label.__dict__.setdefault("_last_options", {})
+	changed = {key: value for key, value in options.items() if last.get(key) != value}
+	if changed:
+		label.configure(**changed)
+		last.update(changed)
+	return bool(changed)
+
+
+def fit_size(width, height, box_width, box_height):
+	"""Largest (width, height) with the frame's aspect ratio that fits in the box."""
+	ratio = min(box_width / width, box_height / height)
+	return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+
+def prepare_image(frame, target):
+	"""
+	Resize a BGR frame to `target` (width, height) and convert it to an RGB PIL image.
+
+	This is the whole render cost except the copy into Tk, so benchmarks can
+	time it without a window.
+	"""
+	height, width = frame.shape[:2]
+	if target != (width, height):
+		# INTER_AREA averages pixels when shrinking (no aliasing), LINEAR is enough to enlarge
+		interpolation = cv2.INTER_AREA if target[0] < width else cv2.INTER_LINEAR
+		frame = cv2.resize(frame, target, interpolation=interpolation)
+	return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+class FrameRenderer:
+	"""Show BGR frames in a Tk label, scaled to fit, at a capped frame rate."""
+	def __init__(self, label, max_fps=30, size=None):
+		"""
+		Args:
+			label (tk.Label | ttk.Label): Widget showing the video.
+			max_fps (float): Maximum renders per second, None for no cap.
+			size (tuple): Fixed (width, height) output. None fits the widget, keeping the aspect ratio.
+		"""
+		self.label = label
+		self.min_interval = 1.0 / max_fps if max_fps else 0.0
+		self.size = size
+		self.photo = None
+		self.photo_size = None
+		self.last_render = 0.0
+		self.layout_key = None  # (frame size, widget size) the cached target size was computed for
+		self.target_size = None
+		self.rendered = 0
+		self.render_ms = 0.0  # Smoothed render time
+
+	def due(self):
+		"""True once the frame rate cap allows another render."""
+		return time.perf_counter() - self.last_render >= self.min_interval
+
+	def _target_size(self, width, height):
+		if self.size is not None:
+			return self.size
+		key = (width, height, self.label.winfo_width(), self.label.winfo_height())
+		if key != self.layout_key:
+			self.layout_key = key
+			if key[2] > 1 and key[3] > 1:
+				self.target_size = fit_size(width, height, key[2], key[3])
+			else:
+				self.target_size = (width, height)  # Widget not laid out yet
+		return self.target_size
+
+	def render(self, frame):
+		"""Show a BGR frame now, regardless of the frame rate cap."""
+		start = time.perf_counter()
+		height, width = frame.shape[:2]
+		target = self._target_size(width, height)
+		image = prepare_image(frame, target)
+		if self.photo is not None and self.photo_size == target:
+			# Same size: copy the pixels into the existing Tk image, no new image or configure
+			self.photo.paste(image)
+		else:
+			self.photo = ImageTk.PhotoImage(image=image)
+			self.photo_size = target
+			self.label.configure(image=self.photo)
+			self.label.image = self.photo
+		self.last_render = time.perf_counter()
+		self.rendered += 1
+		self.render_ms = 0.9 * self.render_ms + 0.1 * (self.last_render - start) * 1000
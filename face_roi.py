@@ -0,0 +1,177 @@
+import math
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from face_detectors import HogDetector
+
+
+def _overlaps(a, b):
+	return a[0] < b[2] and b[0] < a[2] and a[3] < b[1] and b[3] < a[1]
+
+
+def _merge_boxes(boxes):
+	"""Merge overlapping (top, right, bottom, left) boxes until none overlap."""
+	boxes = list(boxes)
+	merged = True
+	while merged:
+		merged = False
+		for i in range(len(boxes)):
+			for j in range(i + 1, len(boxes)):
+				a, b = boxes[i], boxes[j]
+				if _overlaps(a, b):
+					boxes[i] = (min(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3]))
+					del boxes[j]
+					merged = True
+					break
+			if merged:
+				break
+	return boxes
+
+
+class AdaptiveDetector:
+	"""
+	Detection front end that picks the resolution and the regions to scan.
+
+	Instead of HOG over the whole frame at a fixed scale, detection runs on crops
+	around the faces found recently (and on an optional door zone, where new
+	people come in), at the scale that makes the smallest recent face about
+	`target_face_px` tall. A full-frame scan still runs every `full_scan_every`
+	detections, and whenever there is nothing to look around.
+
+	The detector's cost per pixel is measured as it runs. With `budget_ms` the
+	scale is lowered so one detection fits the budget; full scans then use the
+	largest scale the budget allows, which finds small or distant faces that the
+	fixed scale misses. The time saved against a full scan at `base_scale` is
+	reported by `stats()`.
+	"""
+	def __init__(self, base_scale=0.25, min_scale=0.1, max_scale=1.0, target_face_px=64, budget_ms=None,
+				 door_zone=None, full_scan_every=10, margin=0.75, roi_ttl=3, detect=None):
+		"""
+		Args:
+			base_scale (float): Scale of full scans without a budget (the old fixed scale).
+			min_scale, max_scale (float): Limits of the chosen scale.
+			target_face_px (int): Face height aimed for in the detector input.
+			budget_ms (float): Latency budget of one detection, None for no limit.
+			door_zone (tuple): (left, top, right, bottom) as fractions of the frame, always scanned.
+			full_scan_every (int): Detections between full-frame scans.
+			margin (float): Border added around a recent face, as a fraction of its size.
+			roi_ttl (int): Detections a face keeps its region after it was last seen.
+			detect (callable): RGB image -> list of (top, right, bottom, left), dlib HOG by default
+							   (see face_detectors).
+		"""
+		self.base_scale = base_scale
+		self.min_scale = min_scale
+		self.max_scale = max_scale
+		self.target_face_px = target_face_px
+		self.budget_ms = budget_ms
+		self.door_zone = tuple(door_zone) if door_zone else None
+		self.full_scan_every = max(1, full_scan_every)
+		self.margin = margin
+		self.roi_ttl = roi_ttl
+		self.detect_fn = detect or HogDetector().detect
+		self.lock = threading.Lock()
+		self.recent = []  # (box in full-frame pixels, detection number it was last seen)
+		self.count = 0  # Detections run
+		self.full_scans = 0
+		self.ms_per_px = None  # Measured detector cost (running average)
+		self.scale = base_scale  # Scale of the last detection
+		self.detect_ms = 0.0  # Running averages for the report
+		self.saved_ms = 0.0
+		self.scanned_fraction = 1.0
+
+	def _regions(self, height, width):
+		"""Crops to scan this time (full-frame pixels), or None for a full scan."""
+		boxes = []
+		for (top, right, bottom, left), _ in self.recent:
+			pad_y, pad_x = int((bottom - top) * self.margin), int((right - left) * self.margin)
+			boxes.append((max(0, top - pad_y), min(width, right + pad_x), min(height, bottom + pad_y), max(0, left - pad_x)))
+		if self.door_zone:
+			left, top, right, bottom = self.door_zone
+			boxes.append((int(top * height), int(right * width), int(bottom * height), int(left * width)))
+		boxes = _merge_boxes(boxes)
+		area = sum((bottom - top) * (right - left) for top, right, bottom, left in boxes)
+		# Crops covering most of the frame are no cheaper than a full scan
+		if not boxes or area > 0.6 * height * width:
+			return None
+		return boxes
+
+	def _pick_scale(self, pixels, full_scan):
+		"""Scale from the recent face sizes, capped by the latency budget."""
+		scale = None
+		if self.recent and not full_scan:
+			smallest = min(bottom - top for (top, _, bottom, _), _ in self.recent)
+			scale = self.target_face_px / max(1, smallest)
+		if self.budget_ms and self.ms_per_px:
+			fit = math.sqrt(self.budget_ms / (self.ms_per_px * pixels))
+			# Without face sizes to go by, use all the resolution the budget allows
+			scale = fit if scale is None else min(scale, fit)
+		if scale is None:
+			scale = self.base_scale
+		return min(self.max_scale, max(self.min_scale, scale))
+
+	def detect(self, frame):
+		"""
+		Find faces in a frame.
+
+		Args:
+			frame (np.ndarray): BGR frame at full size.
+
+		Returns:
+			list[tuple]: (top, right, bottom, left) in full-frame pixels.
+		"""
+		height, width = frame.shape[:2]
+		with self.lock:
+			self.count += 1
+			self.recent = [(box, seen) for box, seen in self.recent if self.count - seen <= self.roi_ttl]
+			regions = None if self.count % self.full_scan_every == 1 or self.full_scan_every == 1 \
+				else self._regions(height, width)
+			full_scan = regions is None
+			if full_scan:
+				regions = [(0, width, height, 0)]
+				self.full_scans += 1
+			scanned = sum((bottom - top) * (right - left) for top, right, bottom, left in regions)
+			scale = self._pick_scale(scanned, full_scan)
+
+		start = time.perf_counter()
+		pixels = 0
+		locations = []
+		for top, right, bottom, left in regions:
+			crop = frame[top:bottom, left:right]
+			small = cv2.resize(crop, (0, 0), fx=scale, fy=scale)
+			if min(small.shape[:2]) < 32:
+				continue  # Too small to hold a detectable face
+			pixels += small.shape[0] * small.shape[1]
+			for t, r, b, l in self.detect_fn(np.ascontiguousarray(small[:, :, ::-1])):
+				locations.append((int(t / scale) + top, int(r / scale) + left, int(b / scale) + top, int(l / scale) + left))
+		elapsed_ms = (time.perf_counter() - start) * 1000
+
+		with self.lock:
+			if pixels:
+				sample = elapsed_ms / pixels
+				self.ms_per_px = sample if self.ms_per_px is None else 0.8 * self.ms_per_px + 0.2 * sample
+			# Estimated cost of the old fixed full-frame scan, for the report
+			full_ms = (self.ms_per_px or 0.0) * height * width * self.base_scale ** 2
+			self.detect_ms = 0.9 * self.detect_ms + 0.1 * elapsed_ms
+			self.saved_ms = 0.9 * self.saved_ms + 0.1 * (full_ms - elapsed_ms)
+			self.scanned_fraction = 0.9 * self.scanned_fraction + 0.1 * scanned / (height * width)
+			self.scale = scale
+			# Faces found this time replace the recent ones they overlap
+			self.recent = [(box, seen) for box, seen in self.recent
+						   if not any(_overlaps(box, location) for location in locations)]
+			self.recent.extend((location, self.count) for location in locations)
+		return locations
+
+	def stats(self):
+		"""Running averages of the last detections, for display."""
+		with self.lock:
+			return {
+				"scale": self.scale,
+				"detect_ms": self.detect_ms,
+				"saved_ms": self.saved_ms,
+				"scanned_fraction": self.scanned_fraction,
+				"full_scans": self.full_scans,
+				"detections": self.count,
+			}
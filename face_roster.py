@@ -0,0 +1,236 @@
+"""
+Virtualized attendance roster for large classes.
+
+The attendance list used to be one ttk.Label per student in a frame wrapped
+by a Canvas, with bbox("all") recomputed on every resize: seconds to build
+and sluggish scrolling with thousands of students. Roster keeps the names
+in sorted lists (checked-in students first, optionally filtered by a search
+string) and RosterView draws only the rows that fit in the window, reusing
+the same canvas text items while scrolling.
+"""
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+CHECKED_IN = ("✓ {}: Checked In", "green")
+NOT_CHECKED_IN = ("• {}: Not Checked In", "red")
+
+
+def _sort_key(name):
+	return name.casefold(), name
+
+
+class Roster:
+	"""
+	Sorted, filterable index of the students and their status (no Tk).
+
+	Rows are kept as sorted (casefolded name, name) keys, split in checked-in
+	and absent groups when `checked_first` is on. A check-in is a dict update
+	plus a bisect move between the two groups; the order is never rebuilt.
+	"""
+	def __init__(self, status=None, checked_first=True):
+		"""
+		Args:
+			status (dict): {student name: checked in}.
+			checked_first (bool): List checked-in students before the others.
+		"""
+		self.status = dict(status or {})
+		self.checked_first = checked_first
+		self.query = ""
+		self.present = sum(1 for checked in self.status.values() if checked)
+		self.rebuild()
+
+	def rebuild(self):
+		"""Sort the matching students again (after a new query or ordering), O(n log n)."""
+		keys = sorted(_sort_key(name) for name in self.status if self.matches(name))
+		if self.checked_first:
+			self.groups = ([key for key in keys if self.status[key[1]]],
+						   [key for key in keys if not self.status[key[1]]])
+		else:
+			self.groups = (keys,)
+
+	def _group(self, checked):
+		if not self.checked_first:
+			return self.groups[0]
+		return self.groups[0] if checked else self.groups[1]
+
+	def matches(self, name):
+		return self.query in name.casefold()
+
+	def __len__(self):
+		return sum(len(group) for group in self.groups)
+
+	def row(self, i):
+		"""(name, checked in) of the i-th row in display order."""
+		for group in self.groups:
+			if i < len(group):
+				name = group[i][1]
+				return name, self.status[name]
+			i -= len(group)
+		raise IndexError(i)
+
+	def set_query(self, query):
+		"""Show only the students whose name contains `query` (case-insensitive)."""
+		query = query.strip().casefold()
+		if query != self.query:
+			self.query = query
+			self.rebuild()
+
+	def set_checked_first(self, checked_first):
+		if checked_first != self.checked_first:
+			self.checked_first = checked_first
+			self.rebuild()
+
+	def set_status(self, name, checked):
+		"""
+		Change one student's status.
+
+		Returns:
+			bool: True if the status changed.
+		"""
+		if name not in self.status:
+			self.add(name, checked)
+			return True
+		if self.status[name] == checked:
+			return False
+		if self.checked_first and self.matches(name):
+			key = _sort_key(name)
+			old = self._group(not checked)
+			del old[bisect.bisect_left(old, key)]
+			bisect.insort(self._group(checked), key)
+		self.status[name] = checked
+		self.present += 1 if checked else -1
+		return True
+
+	def add(self, name, checked=False):
+		if name in self.status:
+			self.set_status(name, checked)
+			return
+		self.status[name] = checked
+		self.present += checked
+		if self.matches(name):
+			bisect.insort(self._group(checked), _sort_key(name))
+
+	def remove(self, name):
+		if name not in self.status:
+			return
+		checked = self.status.pop(name)
+		self.present -= checked
+		if self.matches(name):
+			group = self._group(checked)
+			del group[bisect.bisect_left(group, _sort_key(name))]
+
+
+class RosterView(ttk.Frame):
+	"""
+	Search box, ordering toggle and a canvas that draws only the visible rows of a Roster.
+
+	Changes only schedule one redraw (after_idle), so many check-ins in the
+	same frame cost a single pass over the visible rows.
+	"""
+	def __init__(self, master, status=None, font=("Arial", 12), checked_first=True):
+		super().__init__(master)
+		self.roster = Roster(status, checked_first)
+		self.font = tkfont.Font(font=font)
+		self.row_height = self.font.metrics("linespace") + 6
+		self.top = 0  # Index of the first visible row
+		self.items = []  # Canvas text items, one per visible row slot
+		self.drawn = []  # (text, color) shown by each item, to skip unchanged ones
+		self.redraw_pending = False
+
+		bar = ttk.Frame(self)
+		bar.pack(side="top", fill="x", pady=(0, 5))
+		self.query = tk.StringVar()
+		self.query.trace_add("write", lambda *args: self._on_query())
+		ttk.Entry(bar, textvariable=self.query).pack(side="left", fill="x", expand=True)
+		self.checked_first = tk.BooleanVar(value=checked_first)
+		ttk.Checkbutton(bar, text="Checked in first", variable=self.checked_first,
+						command=self._on_ordering).pack(side="left", padx=(5, 0))
+		self.count_label = ttk.Label(self, text="", foreground="gray")
+		self.count_label.pack(side="bottom", anchor="w")
+
+		self.canvas = tk.Canvas(self, background="#f0f0f0", highlightthickness=0)
+		self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+		self.scrollbar.pack(side="right", fill="y")
+		self.canvas.pack(side="left", fill="both", expand=True)
+		self.canvas.bind("<Configure>", lambda event: self.refresh())
+		self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+		self.canvas.bind("<Button-4>", lambda event: self.scroll(-1, "units"))  # X11 wheel
+		self.canvas.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+		self.refresh()
+
+	def set_status(self, name, checked=True):
+		"""Update one student, O(1) on screen: only the visible rows are redrawn."""
+		if self.roster.set_status(name, checked):
+			self.refresh()
+
+	def add(self, name, checked=False):
+		self.roster.add(name, checked)
+		self.refresh()
+
+	def remove(self, name):
+		self.roster.remove(name)
+		self.refresh()
+
+	def refresh(self):
+		"""Redraw at the next idle time (coalesces many changes in one redraw)."""
+		if not self.redraw_pending:
+			self.redraw_pending = True
+			self.after_idle(self._redraw)
+
+	def visible_rows(self):
+		return max(1, self.canvas.winfo_height() // self.row_height)
+
+	def scroll(self, amount, what):
+		step = self.visible_rows() if what == "pages" else 1
+		self._scroll_to(self.top + amount * step)
+
+	def _scroll_to(self, top):
+		top = max(0, min(int(top), len(self.roster) - self.visible_rows()))
+		if top != self.top:
+			self.top = top
+			self.refresh()
+
+	def _on_scrollbar(self, command, *args):
+		if command == "moveto":
+			self._scroll_to(round(float(args[0]) * len(self.roster)))
+		else:
+			self.scroll(int(args[0]), args[1])
+
+	def _on_query(self):
+		self.roster.set_query(self.query.get())
+		self.top = 0
+		self.refresh()
+
+	def _on_ordering(self):
+		self.roster.set_checked_first(self.checked_first.get())
+		self.refresh()
+
+	def _redraw(self):
+		self.redraw_pending = False
+		rows = len(self.roster)
+		visible = self.visible_rows()
+		self.top = max(0, min(self.top, rows - visible))
+		# Grow the pool of text items to the window height, never one per student
+		while len(self.items) < visible:
+			self.items.append(self.canvas.create_text(10, len(self.items) * self.row_height + self.row_height // 2,
+													  anchor="w", font=self.font))
+			self.drawn.append(None)
+		for slot, item in enumerate(self.items):
+			row = self.top + slot
+			if slot < visible and row < rows:
+				name, checked = self.roster.row(row)
+				template, color = CHECKED_IN if checked else NOT_CHECKED_IN
+				shown = (template.format(name), color)
+			else:
+				shown = ("", "black")
+			if shown != self.drawn[slot]:
+				self.canvas.itemconfigure(item, text=shown[0], fill=shown[1])
+				self.drawn[slot] = shown
+		if rows:
+			self.scrollbar.set(self.top / rows, min(1.0, (self.top + visible) / rows))
+		else:
+			self.scrollbar.set(0.0, 1.0)
+		shown = f"{rows} shown, " if self.roster.query else ""
+		self.count_label.configure(text=f"{shown}{self.roster.present}/{len(self.roster.status)} checked in")
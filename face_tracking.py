@@ -0,0 +1,234 @@
+from collections import Counter, deque
+import itertools
+import threading
+
+
+def iou(a, b):
+	"""Intersection over union of two (top, right, bottom, left) boxes."""
+	top, bottom = max(a[0], b[0]), min(a[2], b[2])
+	left, right = max(a[3], b[3]), min(a[1], b[1])
+	inter = max(0, bottom - top) * max(0, right - left)
+	area_a = (a[2] - a[0]) * (a[1] - a[3])
+	area_b = (b[2] - b[0]) * (b[1] - b[3])
+	union = area_a + area_b - inter
+	return inter / union if union > 0 else 0.0
+
+
+class IdentityVoter:
+	"""
+	Temporal vote over the recent matches of one face track.
+
+	Each new encoding of the face adds a vote for the matched student (or "Unknown"
+	when the distance is above `tolerance`). With `weighted`, a vote counts
+	1 - distance / tolerance, so close matches weigh more than borderline ones. A student is confirmed when
+	at least `quorum` of the last `window` votes are theirs and their weighted
+	share of the window reaches `min_confidence`.
+
+	`window` and `quorum` count encodings, not frames: in tracking mode a face is
+	encoded once per detection, and a match reused between detections never votes
+	again. The defaults (10 of 10 independent encodings, unweighted) match the
+	original detect_name_buffer rule, where every frame was encoded.
+	"""
+	def __init__(self, window=10, quorum=10, tolerance=0.6, weighted=False, min_confidence=0.0):
+		self.window = window
+		self.quorum = min(quorum, window)
+		self.tolerance = tolerance
+		self.weighted = weighted
+		self.min_confidence = min_confidence
+		self.votes = deque(maxlen=window)  # (name, weight)
+
+	def add(self, name, distance):
+		"""
+		Add one match and check for a decision.
+
+		Returns:
+			tuple[str, float]: (confirmed name, confidence), or (None, confidence of the leader).
+		"""
+		if name is not None and distance < self.tolerance:
+			weight = max(0.0, 1.0 - distance / self.tolerance) if self.weighted else 1.0
+			self.votes.append((name, weight))
+		else:
+			self.votes.append(("Unknown", 0.0))
+		counts = Counter(vote for vote, _ in self.votes if vote != "Unknown")
+		if not counts:
+			return None, 0.0
+		leader, count = counts.most_common(1)[0]
+		confidence = sum(weight for vote, weight in self.votes if vote == leader) / self.window
+		if count >= self.quorum and confidence >= self.min_confidence:
+			self.votes.clear()
+			return leader, confidence
+		return None, confidence
+
+
+class FaceTrack:
+	"""One face followed across frames, with its own identity vote."""
+	def __init__(self, track_id, location, voter):
+		self.id = track_id
+		self.location = location  # (top, right, bottom, left) in the tracking image
+		self.tracker = None
+		self.confidence = float('inf')  # Correlation tracker confidence
+		self.name = None  # Last matched name (None = no encoding yet / failed)
+		self.distance = float('inf')
+		self.fresh = False  # True when name/distance come from an encoding of this frame
+		self.voter = voter
+		self.vote_confidence = 0.0
+		self.confirmed_name = None  # Name confirmed by the vote
+		self.since_encoding = 0  # Detections of the track since it was last encoded
+
+	def start(self, image, location, correlation=True):
+		"""Move the track to a detected box and (re)start its correlation tracker."""
+		self.location = location
+		self.confidence = float('inf')
+		if correlation:
+			import dlib  # Only needed with tracking, kept out of the startup imports
+			top, right, bottom, left = location
+			self.tracker = dlib.correlation_tracker()
+			self.tracker.start_track(image, dlib.rectangle(int(left), int(top), int(right), int(bottom)))
+
+	def follow(self, image):
+		"""Move the box with the tracker. Returns the peak-to-sidelobe confidence."""
+		self.confidence = self.tracker.update(image)
+		position = self.tracker.get_position()
+		self.location = (int(position.top()), int(position.right()), int(position.bottom()), int(position.left()))
+		return self.confidence
+
+	def vote(self):
+		"""Feed the track's current match to its voter. Returns the name confirmed now, or None."""
+		if self.name is None:
+			return None  # No usable encoding
+		if self.confirmed_name is not None:
+			# Re-verification: a different face may have taken over the box
+			if self.name == self.confirmed_name and self.distance < self.voter.tolerance:
+				return None
+			self.confirmed_name = None
+			self.voter.votes.clear()
+		confirmed, self.vote_confidence = self.voter.add(self.name, self.distance)
+		if confirmed is not None:
+			self.confirmed_name = confirmed
+		return confirmed
+
+
+class FaceTracker:
+	"""
+	Follows every face across frames so identity votes are kept per face.
+
+	With `detect_every` = 1 faces are detected on every frame and only associated
+	with their track by overlap. With `detect_every` = N > 1 (tracking mode) full
+	detection runs every N frames, or sooner when any track's confidence drops
+	below `min_confidence`, and faces are followed with a dlib correlation tracker
+	in between.
+
+	Tracks are encoded when they appear and then on every detection until their
+	identity is confirmed. Confirmed tracks are re-encoded every `reverify_every`
+	detections, and at once when their box jumps or changes scale, so a student
+	stepping into the spot another one just left does not inherit their name:
+	a disagreeing match drops the identity and the vote starts over.
+	"""
+	def __init__(self, detect_every=1, min_confidence=7.0, iou_threshold=0.3, voter_factory=IdentityVoter,
+				 reverify_every=5, jump_iou=0.5, max_scale_change=1.5):
+		"""
+		Args:
+			detect_every (int): Frames between full detections (1 = detect every frame).
+			min_confidence (float): Tracker confidence (PSR) below which detection reruns.
+			iou_threshold (float): Minimum overlap to match a detection to a track.
+			voter_factory (callable): Creates the IdentityVoter of a new track.
+			reverify_every (int): Detections of a confirmed track between two re-encodings.
+			jump_iou (float): Overlap with the previous box below which a confirmed track is re-encoded.
+			max_scale_change (float): Box area ratio above which a confirmed track is re-encoded.
+		"""
+		self.detect_every = max(1, detect_every)
+		self.min_confidence = min_confidence
+		self.iou_threshold = iou_threshold
+		self.reverify_every = max(1, reverify_every)
+		self.jump_iou = jump_iou
+		self.max_scale_change = max_scale_change
+		self.voter_factory = voter_factory
+		self.tracks = []
+		self.frame_count = 0
+		self.force_detect = True
+		self.ids = itertools.count(1)
+		self.lock = threading.Lock()
+		self.detections = 0  # Counters for the CPU-saving report
+		self.encodings = 0
+
+	@staticmethod
+	def _scale_change(a, b):
+		"""Ratio of the larger to the smaller box area."""
+		area_a = max(1, (a[2] - a[0]) * (a[1] - a[3]))
+		area_b = max(1, (b[2] - b[0]) * (b[1] - b[3]))
+		return max(area_a, area_b) / min(area_a, area_b)
+
+	def update(self, image, detect, encode_and_match):
+		"""
+		Advance all tracks by one frame.
+
+		With `detect_every` = 1, detection and encoding run outside the lock so
+		several worker threads can process frames at the same time.
+
+		Args:
+			image (np.ndarray): RGB image the detector and trackers run on.
+			detect (callable): image -> list of (top, right, bottom, left).
+			encode_and_match (callable): list of locations -> list of (name, distance),
+										 name None if the encoding failed.
+
+		Returns:
+			list[tuple]: (track id, location, name, distance, confirmed name) per track.
+		"""
+		correlation = self.detect_every > 1
+		locations = None
+		if not correlation:
+			locations = detect(image)
+
+		with self.lock:
+			self.frame_count += 1
+			if correlation and (self.force_detect or self.frame_count % self.detect_every == 0):
+				locations = detect(image)
+				self.force_detect = False
+			to_encode = []
+			if locations is not None:
+				self.detections += 1
+				unmatched = list(self.tracks)
+				tracks = []
+				for location in locations:
+					best = max(unmatched, key=lambda track: iou(track.location, location), default=None)
+					overlap = iou(best.location, location) if best is not None else 0.0
+					if overlap >= self.iou_threshold:
+						unmatched.remove(best)
+						track = best
+						track.since_encoding += 1
+						if track.confirmed_name is not None and (
+								track.since_encoding >= self.reverify_every or overlap < self.jump_iou
+								or self._scale_change(track.location, location) > self.max_scale_change):
+							to_encode.append(track)
+					else:
+						track = FaceTrack(next(self.ids), location, self.voter_factory())
+					track.start(image, location, correlation)
+					if track.confirmed_name is None and track not in to_encode:
+						to_encode.append(track)
+					tracks.append(track)
+				# Tracks without a detection are lost
+				self.tracks = tracks
+			else:
+				for track in self.tracks:
+					if track.follow(image) < self.min_confidence:
+						self.force_detect = True
+			for track in self.tracks:
+				track.fresh = False
+			tracks = list(self.tracks)
+			encode_locations = [track.location for track in to_encode]
+
+		matches = encode_and_match(encode_locations) if to_encode else []
+
+		with self.lock:
+			self.encodings += len(to_encode)
+			for track, (name, distance) in zip(to_encode, matches):
+				track.name, track.distance, track.fresh = name, distance, True
+				track.since_encoding = 0
+			results = []
+			for track in tracks:
+				# Only a new encoding votes: a match reused between detections
+				# would count the same evidence again on every frame
+				if track.fresh:
+					track.vote()
+				results.append((track.id, track.location, track.name, track.distance, track.confirmed_name))
+			return results
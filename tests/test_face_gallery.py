@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from face_gallery import compact_student
+
+
+def _encodings(directions, seed=0):
+	rng = np.random.default_rng(seed)
+	return [rng.normal(size=128) for _ in directions]
+
+
+def test_compact_student_keeps_at_most_k_prototypes():
+	directions = ["left"] * 10 + ["right"] * 10 + ["straight"] * 10
+	encodings = _encodings(directions)
+	for k in range(1, 12):
+		prototypes = compact_student(encodings, directions, k=k)
+		assert len(prototypes) <= k
+
+
+def test_compact_student_more_directions_than_k():
+	directions = ["straight"] * 6 + ["left"] * 3 + ["right"] * 2
+	prototypes = compact_student(_encodings(directions), directions, k=2)
+	assert len(prototypes) <= 2
+
+
+def test_compact_student_small_directions_give_their_share_away():
+	directions = ["straight"] * 20 + ["left"] * 1 + ["right"] * 1
+	prototypes = compact_student(_encodings(directions), directions, k=9)
+	assert len(prototypes) == 9
+
+
+def test_compact_student_never_more_than_encodings():
+	directions = ["straight"] * 2 + ["left"] * 1
+	assert len(compact_student(_encodings(directions), directions, k=9)) == 3